@@ -1,12 +1,12 @@
 import os
 from app import create_app, db
-from app.models import Ticket, Comment, User
+from app.models import Ticket, Comment, User, OutboxEvent
 
 app = create_app(os.environ.get('FLASK_ENV', 'development'))
 
 @app.shell_context_processor
 def make_shell_context():
-    return {'db': db, 'Ticket': Ticket, 'Comment': Comment, 'User': User}
+    return {'db': db, 'Ticket': Ticket, 'Comment': Comment, 'User': User, 'OutboxEvent': OutboxEvent}
 
 if __name__ == '__main__':
     with app.app_context():
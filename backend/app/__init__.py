@@ -3,19 +3,38 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_cors import CORS
 from config import config
+from app.utils.db_routing import RoutingSession
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 migrate = Migrate()
 
 def create_app(config_name='default'):
     app = Flask(__name__)
     app.config.from_object(config[config_name])
 
+    # Connection pool sizing / timeouts from the DB_* settings (explicit options win)
+    from app.utils.db_pool import engine_options, instrument_pool
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        **engine_options(app.config),
+        **app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})
+    }
+
+    # Optional read replica for @read_replica views
+    from app.utils import db_routing
+    db_routing.init_app(app)
+
     # Initialize extensions
     db.init_app(app)
+    with app.app_context():
+        for engine in db.engines.values():
+            instrument_pool(engine)
     migrate.init_app(app, db)
     CORS(app, origins=app.config['CORS_ORIGINS'])
 
+    # Opt-in request instrumentation (Server-Timing + /api/metrics)
+    from app.services.request_metrics import request_metrics
+    request_metrics.init_app(app)
+
     # Register blueprints
     from app.routes.tickets import tickets_bp
     from app.routes.auth import auth_bp
@@ -23,4 +42,40 @@ def create_app(config_name='default'):
     app.register_blueprint(tickets_bp, url_prefix='/api')
     app.register_blueprint(auth_bp, url_prefix='/api')
 
+    # Agent availability index for auto-assignment
+    from app.services.agent_availability import agent_index
+    agent_index.init_app(app)
+
+    # ETag versioning / response cache for ticket reads
+    from app.services import response_cache
+    response_cache.init_app(app)
+
+    # Materialized ticket counters for the dashboard summary
+    from app.services.ticket_counters import ticket_counters
+    ticket_counters.init_app(app)
+
+    # Live ticket events (SSE) fanned out through in-process or Redis pub/sub
+    from app.services.ticket_events import ticket_events
+    ticket_events.init_app(app)
+
+    # Webhook outbox delivery
+    from app.services.outbox_dispatcher import outbox_dispatcher
+    if app.config['N8N_OUTBOX_DISPATCHER'] == 'thread':
+        outbox_dispatcher.init_app(app)
+    else:
+        outbox_dispatcher.configure(app)
+
+    @app.cli.command('outbox-worker')
+    def outbox_worker():
+        """Deliver queued n8n webhooks in the foreground"""
+        outbox_dispatcher.run_forever()
+
+    @app.cli.command('outbox-purge')
+    def outbox_purge():
+        """Delete sent n8n webhook events older than N8N_OUTBOX_RETENTION_DAYS"""
+        print(f"✅ Purged {outbox_dispatcher.purge_sent()} sent webhook event(s)")
+
+    from app.cli import tickets_cli
+    app.cli.add_command(tickets_cli)
+
     return app
\ No newline at end of file
@@ -0,0 +1,85 @@
+"""
+Flask CLI commands for bulk ticket transfer and maintenance
+    flask tickets export --format csv --output tickets.csv [--status cerrado] [--updated-since 2026-01-01]
+    flask tickets import legacy.ndjson [--format ndjson] [--keep-ids]
+    flask tickets reconcile-counters
+    flask tickets archive [--older-than-days 90] [--batch-size 500]
+"""
+import sys
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from app.services.ticket_archive import archive_closed_tickets
+from app.services.ticket_counters import ticket_counters
+from app.services.ticket_transfer import FORMATS, export_tickets, import_tickets, iter_ticket_rows
+
+tickets_cli = AppGroup('tickets', help='Bulk ticket import/export and maintenance')
+
+
+@tickets_cli.command('export')
+@click.option('--format', 'fmt', type=click.Choice(FORMATS), default='ndjson')
+@click.option('--output', '-o', type=click.Path(dir_okay=False, writable=True), help='File to write (default: stdout)')
+@click.option('--status', help='Only tickets with this status')
+@click.option('--updated-since', type=click.DateTime(), help='Only tickets updated at or after this time')
+def export_command(fmt, output, status, updated_since):
+    """Stream tickets to NDJSON or CSV with constant memory"""
+    batch_size = current_app.config['TICKET_TRANSFER_BATCH_SIZE']
+    rows = iter_ticket_rows(status, updated_since, batch_size)
+
+    target = open(output, 'w', encoding='utf-8', newline='') if output else sys.stdout
+    try:
+        for chunk in export_tickets(fmt, rows, batch_size):
+            target.write(chunk)
+    finally:
+        if output:
+            target.close()
+
+    if output:
+        click.echo(f"✅ Tickets exported to {output}", err=True)
+
+
+@tickets_cli.command('import')
+@click.argument('source', type=click.File('r', encoding='utf-8-sig'))
+@click.option('--format', 'fmt', type=click.Choice(FORMATS), default=None, help='Defaults to the file extension')
+@click.option('--keep-ids', is_flag=True, help='Keep source ticket ids')
+def import_command(source, fmt, keep_ids):
+    """Import tickets from an NDJSON or CSV file ('-' for stdin)"""
+    if fmt is None:
+        fmt = 'csv' if source.name.endswith('.csv') else 'ndjson'
+
+    report = import_tickets(
+        fmt,
+        source,
+        chunk_size=current_app.config['TICKET_TRANSFER_BATCH_SIZE'],
+        keep_ids=keep_ids
+    )
+
+    click.echo(f"✅ Imported: {report['imported']}  ❌ Failed: {report['failed']}")
+    for error in report['errors']:
+        click.echo(f"   line {error['line']}: {error['error']}", err=True)
+
+
+@tickets_cli.command('reconcile-counters')
+def reconcile_counters_command():
+    """Recount the dashboard summary counters (schedule one instance, e.g. hourly from cron)"""
+    drift = ticket_counters.reconcile()
+    if drift is None:
+        click.echo("ℹ️  Another reconciliation is running, skipped")
+        return
+    if not drift:
+        click.echo("✅ Ticket counters are consistent")
+        return
+    click.echo(f"⚠️  Corrected {len(drift)} counter(s):")
+    for key, change in drift.items():
+        click.echo(f"   {key}: {change['stored']} -> {change['actual']}")
+
+
+@tickets_cli.command('archive')
+@click.option('--older-than-days', type=int, default=None, help='Defaults to ARCHIVE_CLOSED_AFTER_DAYS')
+@click.option('--batch-size', type=int, default=None, help='Tickets per transaction (default: ARCHIVE_BATCH_SIZE)')
+def archive_command(older_than_days, batch_size):
+    """Move long-closed tickets and their comments to the archive tables"""
+    if older_than_days is None:
+        older_than_days = current_app.config['ARCHIVE_CLOSED_AFTER_DAYS']
+    report = archive_closed_tickets(older_than_days, batch_size or current_app.config['ARCHIVE_BATCH_SIZE'])
+    click.echo(f"✅ Archived {report['tickets']} ticket(s) and {report['comments']} comment(s)")
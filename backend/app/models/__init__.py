@@ -1,5 +1,10 @@
 from .ticket import Ticket
 from .comment import Comment
 from .user import User
+from .outbox_event import OutboxEvent
+from .cache_version import CacheVersion
+from .ticket_counter import TicketCounter
+from .archive import ArchivedTicket, ArchivedComment
 
-__all__ = ['Ticket', 'Comment', 'User']
\ No newline at end of file
+__all__ = ['Ticket', 'Comment', 'User', 'OutboxEvent', 'CacheVersion', 'TicketCounter',
+           'ArchivedTicket', 'ArchivedComment']
@@ -0,0 +1,73 @@
+from datetime import datetime
+from app import db
+from app.models.comment import Comment
+from app.models.ticket import Ticket
+
+class ArchivedTicket(db.Model):
+    """
+    Closed ticket moved out of the hot tickets table by the archiver
+    Same columns and JSON shape as Ticket; on PostgreSQL the table is
+    partitioned by month of archived_at (see sql/20261018_create_ticket_archive.sql)
+    """
+    __tablename__ = 'tickets_archive'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    client_name = db.Column(db.String(255), nullable=False)
+    client_email = db.Column(db.String(255), nullable=False)
+    subject = db.Column(db.String(500), nullable=False)
+    description = db.Column(db.Text, nullable=False)
+    status = db.Column(db.Enum('abierto', 'en_proceso', 'cerrado', name='ticket_status'))
+    priority = db.Column(db.Enum('baja', 'media', 'alta', 'critica', name='ticket_priority'))
+    created_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime)
+    assigned_to_id = db.Column(db.Integer, nullable=True)
+    category = db.Column(db.String(100))
+    client_phone = db.Column(db.String(20))
+    department = db.Column(db.String(100))
+    comment_count = db.Column(db.Integer, nullable=False, default=0)
+    last_comment_at = db.Column(db.DateTime, nullable=True)
+    archived_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    # No foreign keys (partitioned table); joined by id only
+    assigned_user = db.relationship(
+        'User', primaryjoin='foreign(ArchivedTicket.assigned_to_id) == User.id', viewonly=True
+    )
+    comments = db.relationship(
+        'ArchivedComment', primaryjoin='ArchivedTicket.id == foreign(ArchivedComment.ticket_id)',
+        order_by='ArchivedComment.created_at', viewonly=True
+    )
+
+    # Columns copied from tickets when archiving (everything but archived_at)
+    COPIED_COLUMNS = tuple(c.key for c in Ticket.__table__.columns)
+
+    # Same loader options and JSON shape as a live ticket
+    eager_options = classmethod(Ticket.eager_options.__func__)
+    to_dict = Ticket.to_dict
+
+    def __repr__(self):
+        return f'<ArchivedTicket {self.id}: {self.subject}>'
+
+
+class ArchivedComment(db.Model):
+    """Comment of an archived ticket, archived in the same transaction"""
+    __tablename__ = 'comments_archive'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    ticket_id = db.Column(db.Integer, nullable=False)
+    author_name = db.Column(db.String(255), nullable=False)
+    author_email = db.Column(db.String(255), nullable=False)
+    comment_text = db.Column(db.Text, nullable=False)
+    is_internal = db.Column(db.Boolean, default=False)
+    created_at = db.Column(db.DateTime)
+    archived_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('idx_comments_archive_ticket_created_at', 'ticket_id', 'created_at'),
+    )
+
+    COPIED_COLUMNS = tuple(c.key for c in Comment.__table__.columns)
+
+    to_dict = Comment.to_dict
+
+    def __repr__(self):
+        return f'<ArchivedComment {self.id} for Ticket {self.ticket_id}>'
@@ -0,0 +1,40 @@
+from sqlalchemy.dialects import postgresql, sqlite
+from app import db
+
+class CacheVersion(db.Model):
+    """
+    Monotonic version of a cached collection, bumped in the writing transaction
+    Every bump updates the same row, so writers queue on its lock until they
+    commit; CACHE_VERSION_BACKEND=redis keeps the versions in Redis instead
+    """
+    __tablename__ = 'cache_versions'
+
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, default=0)
+
+    @staticmethod
+    def current(name):
+        return db.session.query(CacheVersion.version).filter_by(name=name).scalar() or 0
+
+    @staticmethod
+    def bump(executor, name):
+        """Increment the version inside the transaction of `executor` (session or connection)"""
+        table = CacheVersion.__table__
+        dialect = executor.dialect.name if hasattr(executor, 'dialect') else executor.get_bind(CacheVersion).dialect.name
+        if dialect in ('postgresql', 'sqlite'):
+            insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+            statement = insert(table).values(name=name, version=1)
+            executor.execute(statement.on_conflict_do_update(
+                index_elements=[table.c.name],
+                set_={'version': table.c.version + 1}
+            ))
+            return
+
+        result = executor.execute(
+            table.update().where(table.c.name == name).values(version=table.c.version + 1)
+        )
+        if result.rowcount == 0:
+            executor.execute(table.insert().values(name=name, version=1))
+
+    def __repr__(self):
+        return f'<CacheVersion {self.name}={self.version}>'
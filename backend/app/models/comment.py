@@ -10,7 +10,11 @@ class Comment(db.Model):
     author_email = db.Column(db.String(255), nullable=False)
     comment_text = db.Column(db.Text, nullable=False)
     is_internal = db.Column(db.Boolean, default=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('idx_comments_ticket_created_at', 'ticket_id', 'created_at'),
+    )
 
     def to_dict(self):
         return {
@@ -0,0 +1,39 @@
+from datetime import datetime
+from app import db
+
+class OutboxEvent(db.Model):
+    """Pending n8n webhook delivery, written in the same transaction as the ticket change"""
+    __tablename__ = 'webhook_outbox'
+
+    id = db.Column(db.Integer, primary_key=True)
+    event_type = db.Column(db.String(50), nullable=False)
+    ticket_id = db.Column(db.Integer, nullable=True)
+    webhook_url = db.Column(db.String(500), nullable=False)
+    payload = db.Column(db.Text, nullable=False)  # JSON-encoded request body
+    status = db.Column(db.Enum('pending', 'sent', 'failed', name='outbox_status'), default='pending', nullable=False)
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    next_attempt_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        db.Index('idx_webhook_outbox_status_next_attempt', 'status', 'next_attempt_at'),
+    )
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'event_type': self.event_type,
+            'ticket_id': self.ticket_id,
+            'webhook_url': self.webhook_url,
+            'status': self.status,
+            'attempts': self.attempts,
+            'next_attempt_at': self.next_attempt_at.isoformat() if self.next_attempt_at else None,
+            'last_error': self.last_error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'sent_at': self.sent_at.isoformat() if self.sent_at else None
+        }
+
+    def __repr__(self):
+        return f'<OutboxEvent {self.id} {self.event_type} ({self.status})>'
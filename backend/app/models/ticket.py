@@ -1,4 +1,5 @@
 from datetime import datetime
+from sqlalchemy.orm import joinedload, selectinload
 from app import db
 
 class Ticket(db.Model):
@@ -11,43 +12,106 @@ class Ticket(db.Model):
     description = db.Column(db.Text, nullable=False)
     status = db.Column(db.Enum('abierto', 'en_proceso', 'cerrado', name='ticket_status'), default='abierto')
     priority = db.Column(db.Enum('baja', 'media', 'alta', 'critica', name='ticket_priority'), default='media')
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     assigned_to_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
     category = db.Column(db.String(100))
     client_phone = db.Column(db.String(20))
     department = db.Column(db.String(100))
 
+    # Denormalized from comments (kept in sync by add_comment) so lists never load them
+    comment_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    last_comment_at = db.Column(db.DateTime, nullable=True)
+
     # Relationship with comments
     comments = db.relationship('Comment', backref='ticket', cascade='all, delete-orphan', lazy=True)
 
-    def to_dict(self):
-        assigned_user_data = None
-        if self.assigned_user:
-            assigned_user_data = {
-                'id': self.assigned_user.id,
-                'username': self.assigned_user.username,
-                'full_name': self.assigned_user.full_name,
-                'email': self.assigned_user.email
-            }
-
-        return {
-            'id': self.id,
-            'client_name': self.client_name,
-            'client_email': self.client_email,
-            'client_phone': self.client_phone,
-            'subject': self.subject,
-            'description': self.description,
-            'status': self.status,
-            'priority': self.priority,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
-            'assigned_to_id': self.assigned_to_id,
-            'assigned_to': assigned_user_data,
-            'category': self.category,
-            'department': self.department,
-            'comments': [comment.to_dict() for comment in self.comments]
-        }
+    # Indexes for the hot paths: filtered listings, keyset pagination, agent
+    # workload lookups and the unassigned backlog (partial where supported)
+    __table_args__ = (
+        db.Index('idx_tickets_status_created_at', 'status', 'created_at'),
+        db.Index('idx_tickets_assigned_status', 'assigned_to_id', 'status'),
+        db.Index('idx_tickets_assigned_created_at', 'assigned_to_id', 'created_at', 'id'),
+        db.Index('idx_tickets_created_at_id', 'created_at', 'id'),
+        db.Index(
+            'idx_tickets_unassigned_backlog', 'created_at', 'id',
+            postgresql_where=db.text("assigned_to_id IS NULL AND status IN ('abierto', 'en_proceso')"),
+            sqlite_where=db.text("assigned_to_id IS NULL AND status IN ('abierto', 'en_proceso')")
+        ),
+    )
+
+    # Statuses that count towards an agent's workload
+    ACTIVE_STATUSES = ('abierto', 'en_proceso')
+
+    # Keys accepted by to_dict(fields=...) for projected list responses
+    SERIALIZABLE_FIELDS = (
+        'id', 'client_name', 'client_email', 'client_phone', 'subject', 'description',
+        'status', 'priority', 'created_at', 'updated_at', 'assigned_to_id', 'assigned_to',
+        'category', 'department', 'comment_count', 'last_comment_at', 'comments'
+    )
+
+    # Default projection for list responses: comments only when asked for via ?fields=
+    LIST_FIELDS = tuple(f for f in SERIALIZABLE_FIELDS if f != 'comments')
+
+    @classmethod
+    def eager_options(cls, fields=None):
+        """
+        Loader options that batch the relationships to_dict() touches
+        The assignee is joined (many-to-one) and comments are fetched with one
+        extra SELECT ... IN for the whole page, so serialization costs a constant
+        number of queries instead of 2N+1
+        """
+        options = []
+        if fields is None or 'assigned_to' in fields:
+            options.append(joinedload(cls.assigned_user))
+        if fields is None or 'comments' in fields:
+            options.append(selectinload(cls.comments))
+        return options
+
+    def to_dict(self, fields=None):
+        """
+        Convert ticket to dictionary
+        fields: optional iterable of keys to include; relationships are only
+        loaded when 'assigned_to' / 'comments' are requested
+        """
+        def wanted(key):
+            return fields is None or key in fields
+
+        data = {}
+        for key in ('id', 'client_name', 'client_email', 'client_phone', 'subject', 'description',
+                    'status', 'priority'):
+            if wanted(key):
+                data[key] = getattr(self, key)
+        if wanted('created_at'):
+            data['created_at'] = self.created_at.isoformat() if self.created_at else None
+        if wanted('updated_at'):
+            data['updated_at'] = self.updated_at.isoformat() if self.updated_at else None
+        if wanted('assigned_to_id'):
+            data['assigned_to_id'] = self.assigned_to_id
+
+        if wanted('assigned_to'):
+            assigned_user_data = None
+            if self.assigned_user:
+                assigned_user_data = {
+                    'id': self.assigned_user.id,
+                    'username': self.assigned_user.username,
+                    'full_name': self.assigned_user.full_name,
+                    'email': self.assigned_user.email
+                }
+            data['assigned_to'] = assigned_user_data
+
+        if wanted('category'):
+            data['category'] = self.category
+        if wanted('department'):
+            data['department'] = self.department
+        if wanted('comment_count'):
+            data['comment_count'] = self.comment_count or 0
+        if wanted('last_comment_at'):
+            data['last_comment_at'] = self.last_comment_at.isoformat() if self.last_comment_at else None
+        if wanted('comments'):
+            data['comments'] = [comment.to_dict() for comment in self.comments]
+
+        return data
 
     def __repr__(self):
         return f'<Ticket {self.id}: {self.subject}>'
\ No newline at end of file
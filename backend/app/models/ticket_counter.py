@@ -0,0 +1,15 @@
+from app import db
+
+class TicketCounter(db.Model):
+    """
+    Materialized ticket count for one (dimension, value), e.g. ('status', 'abierto')
+    Maintained in the writing transaction; '' stands for no assignee / department
+    """
+    __tablename__ = 'ticket_counters'
+
+    dimension = db.Column(db.String(20), primary_key=True)
+    value = db.Column(db.String(100), primary_key=True)
+    count = db.Column(db.BigInteger, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<TicketCounter {self.dimension}:{self.value}={self.count}>'
@@ -1,6 +1,6 @@
 from datetime import datetime
 from app import db
-from werkzeug.security import generate_password_hash, check_password_hash
+from app.services.password_service import PasswordService
 
 class User(db.Model):
     __tablename__ = 'users'
@@ -12,6 +12,8 @@ class User(db.Model):
     full_name = db.Column(db.String(255), nullable=False)
     role = db.Column(db.Enum('admin', 'agent', name='user_role'), default='agent')
     is_active = db.Column(db.Boolean, default=True)
+    max_active_tickets = db.Column(db.Integer, nullable=True)  # None = AGENT_DEFAULT_CAPACITY
+    assignment_weight = db.Column(db.Integer, default=1, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -20,11 +22,15 @@ class User(db.Model):
 
     def set_password(self, password):
         """Hash and set password"""
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = PasswordService.hash(password)
 
     def check_password(self, password):
         """Check if password matches hash"""
-        return check_password_hash(self.password_hash, password)
+        return PasswordService.verify(self.password_hash, password)
+
+    def password_needs_rehash(self):
+        """True if the hash predates the configured method / work factor"""
+        return PasswordService.needs_rehash(self.password_hash)
 
     def to_dict(self, include_sensitive=False):
         """Convert user to dictionary"""
@@ -35,6 +41,8 @@ class User(db.Model):
             'full_name': self.full_name,
             'role': self.role,
             'is_active': self.is_active,
+            'max_active_tickets': self.max_active_tickets,
+            'assignment_weight': self.assignment_weight,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
@@ -1,12 +1,88 @@
 from flask import Blueprint, request, jsonify, current_app
 from app import db
 from app.models.user import User
+from app.services.auto_assign_service import AutoAssignService
+from app.services.n8n_service import N8nService
+from app.services.password_service import PasswordHashingBusy
+from app.services.pubsub import WorkerSignals
+from app.utils.ttl_cache import TTLCache
+from app.utils.db_pool import pool_stats
+from app.utils.db_routing import read_replica
+from app.utils.redis_client import get_redis
 from functools import wraps
 import jwt
 from datetime import datetime, timedelta
 
 auth_bp = Blueprint('auth', __name__)
 
+# Active users resolved by token_required, keyed by user id (per process)
+user_cache = TTLCache()
+
+@auth_bp.record_once
+def _configure_user_cache(state):
+    app = state.app
+    user_cache.configure(app.config['USER_CACHE_SIZE'], app.config['USER_CACHE_TTL'])
+
+    # Invalidations from the other worker processes
+    signals = WorkerSignals(get_redis(app), app.config['USER_CACHE_CHANNEL'])
+    signals.listen(lambda payload: user_cache.invalidate(payload['user_id']))
+    app.extensions['user_cache_signals'] = signals
+    if signals.enabled:
+        @app.before_request
+        def _ensure_user_cache_listener():
+            signals.start()
+
+def invalidate_cached_user(user_id):
+    """Drop a user from this process's cache and the other workers' caches"""
+    user_cache.invalidate(user_id)
+    current_app.extensions['user_cache_signals'].send({'user_id': user_id})
+
+class CachedUserDeleted(LookupError):
+    """Raised when a cached token user no longer exists in the database"""
+    pass
+
+class CachedUser:
+    """
+    Token user served from user_cache: the decorators only read id, role and
+    is_active; any other attribute loads the real User from the session on
+    first use, so views never work on a detached or transient copy
+    If that user has been deleted meanwhile, `deleted` is set and
+    token_required answers 401 whatever the view did with the error
+    """
+    __slots__ = ('id', 'role', 'is_active', 'deleted', '_user')
+
+    def __init__(self, id, role, is_active):
+        self.id = id
+        self.role = role
+        self.is_active = is_active
+        self.deleted = False
+        self._user = None
+
+    @property
+    def user(self):
+        if self._user is None:
+            self._user = db.session.get(User, self.id)
+            if self._user is None:
+                self.deleted = True
+                raise CachedUserDeleted(f'User {self.id} no longer exists')
+        return self._user
+
+    def __getattr__(self, name):
+        return getattr(self.user, name)
+
+def _load_active_user(user_id):
+    """Return the active user for a token (a CachedUser when cached, else the User)"""
+    cached = user_cache.get(user_id)
+    if cached is not None:
+        return CachedUser(user_id, cached['role'], cached['is_active'])
+
+    user = db.session.get(User, user_id)
+    if not user or not user.is_active:
+        return None
+
+    user_cache.set(user_id, {'role': user.role, 'is_active': user.is_active})
+    return user
+
 def token_required(f):
     """Decorator to protect routes requiring authentication"""
     @wraps(f)
@@ -27,7 +103,7 @@ def token_required(f):
         try:
             # Decode token
             data = jwt.decode(token, current_app.config['SECRET_KEY'], algorithms=["HS256"])
-            current_user = User.query.get(data['user_id'])
+            current_user = _load_active_user(data['user_id'])
 
             if not current_user or not current_user.is_active:
                 return jsonify({'error': 'Invalid token or user inactive'}), 401
@@ -38,7 +114,16 @@ def token_required(f):
             return jsonify({'error': 'Invalid token'}), 401
 
         # Pass current_user to the route
-        return f(current_user, *args, **kwargs)
+        try:
+            response = f(current_user, *args, **kwargs)
+        except CachedUserDeleted:
+            response = None
+
+        if isinstance(current_user, CachedUser) and current_user.deleted:
+            # Deleted while cached; views may have turned the error into a 500
+            invalidate_cached_user(current_user.id)
+            return jsonify({'error': 'Invalid token or user inactive'}), 401
+        return response
 
     return decorated
 
@@ -88,6 +173,9 @@ def register():
             'user': user.to_dict()
         }), 201
 
+    except PasswordHashingBusy as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 503, {'Retry-After': '1'}
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
@@ -111,6 +199,11 @@ def login():
         if not user.is_active:
             return jsonify({'error': 'User account is inactive'}), 401
 
+        # Transparently upgrade hashes made with an older method / work factor
+        if user.password_needs_rehash():
+            user.set_password(data['password'])
+            db.session.commit()
+
         # Generate JWT token
         token = jwt.encode({
             'user_id': user.id,
@@ -125,6 +218,9 @@ def login():
             'user': user.to_dict()
         }), 200
 
+    except PasswordHashingBusy as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 503, {'Retry-After': '1'}
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -137,6 +233,7 @@ def get_current_user(current_user):
 @auth_bp.route('/auth/users', methods=['GET'])
 @token_required
 @admin_required
+@read_replica
 def get_users(current_user):
     """Get all users (admin only)"""
     try:
@@ -167,23 +264,34 @@ def update_user(current_user, user_id):
             user.role = data['role']
         if 'is_active' in data:
             user.is_active = data['is_active']
+        if 'max_active_tickets' in data:
+            user.max_active_tickets = data['max_active_tickets']
+        if 'assignment_weight' in data:
+            user.assignment_weight = data['assignment_weight']
         if 'password' in data and data['password']:
             user.set_password(data['password'])
 
         user.updated_at = datetime.utcnow()
         db.session.commit()
 
+        # Drop the cached entry everywhere so role / is_active changes apply immediately
+        invalidate_cached_user(user_id)
+
         return jsonify({
             'message': 'User updated successfully',
             'user': user.to_dict()
         }), 200
 
+    except PasswordHashingBusy as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 503, {'Retry-After': '1'}
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 @auth_bp.route('/auth/agents', methods=['GET'])
 @token_required
+@read_replica
 def get_agents(current_user):
     """Get all active agents (for ticket assignment)"""
     try:
@@ -196,3 +304,37 @@ def get_agents(current_user):
         } for agent in agents]), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
+
+
+@auth_bp.route('/auth/agents/stats', methods=['GET'])
+@token_required
+@admin_required
+def get_agents_stats(current_user):
+    """Get agent workload statistics (admin only); ?fresh=true bypasses the cache"""
+    try:
+        use_cache = request.args.get('fresh') != 'true'
+        return jsonify(AutoAssignService.get_agent_stats(use_cache=use_cache)), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@auth_bp.route('/auth/db/pool', methods=['GET'])
+@token_required
+@admin_required
+def get_db_pool_stats(current_user):
+    """Get connection pool usage and checkout wait times for this worker (admin only)"""
+    return jsonify(pool_stats.snapshot(db.engine)), 200
+
+@auth_bp.route('/auth/cache/stats', methods=['GET'])
+@token_required
+@admin_required
+def get_user_cache_stats(current_user):
+    """Get authenticated-user cache hit/miss counters for this worker (admin only)"""
+    return jsonify(user_cache.stats()), 200
+
+@auth_bp.route('/auth/webhooks/connections', methods=['GET'])
+@token_required
+@admin_required
+def get_webhook_connection_stats(current_user):
+    """Get n8n connections created vs reused by this worker's webhook client (admin only)"""
+    return jsonify(N8nService.connection_stats()), 200
@@ -1,49 +1,218 @@
-from flask import Blueprint, request, jsonify, current_app
+import io
+from flask import Blueprint, Response, request, jsonify, current_app, stream_with_context
 from app import db
 from app.models.ticket import Ticket
 from app.models.comment import Comment
+from app.models.archive import ArchivedTicket
 from app.services.n8n_service import N8nService
 from app.services.auto_assign_service import AutoAssignService
+from app.services.bulk_ticket_service import BulkOperationError, BulkTicketService
+from app.services.ticket_counters import ticket_counters
+from app.services.ticket_events import ticket_events
+from app.services.ticket_transfer import TransferError, check_format, export_tickets, import_tickets, iter_ticket_rows
+from app.routes.auth import token_required, admin_required
+from app.services.response_cache import collection_etag, conditional_response, ticket_etag
+from app.services.search_service import SearchService
+from app.utils.db_routing import read_replica
+from app.utils.pagination import (
+    decode_cursor, decode_offset_cursor, encode_offset_cursor, paginate_asc, paginate_desc, parse_limit
+)
+from sqlalchemy.orm import load_only
 from datetime import datetime
 
 tickets_bp = Blueprint('tickets', __name__)
 
+def _parse_fields(raw_fields):
+    """Parse the ?fields= projection into a tuple of ticket keys"""
+    if not raw_fields:
+        return None
+    fields = tuple(f.strip() for f in raw_fields.split(',') if f.strip())
+    unknown = [f for f in fields if f not in Ticket.SERIALIZABLE_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return fields
+
+def _filtered_query(fields):
+    """
+    Ticket query with the projection (?fields=) and the shared list filters:
+    ?status=, ?assigned=true|false and ?assigned_to_id=
+    """
+    query = Ticket.query.options(*Ticket.eager_options(fields))
+
+    # Only load the columns the projection needs (id/created_at drive the cursor)
+    if fields is not None:
+        columns = {'id', 'created_at'}
+        columns.update(f for f in fields if f not in ('assigned_to', 'comments'))
+        if 'assigned_to' in fields:
+            columns.add('assigned_to_id')
+        query = query.options(load_only(*[getattr(Ticket, c) for c in columns]))
+
+    # Get query parameters for filtering
+    status_filter = request.args.get('status')  # 'abierto', 'en_proceso', 'cerrado'
+    assigned_filter = request.args.get('assigned')  # 'true', 'false', or None
+    assigned_to_id = request.args.get('assigned_to_id')  # specific user id
+
+    # Apply status filter
+    if status_filter:
+        query = query.filter(Ticket.status == status_filter)
+
+    # Apply assigned filter
+    if assigned_filter == 'false':
+        query = query.filter(Ticket.assigned_to_id == None)
+    elif assigned_filter == 'true':
+        query = query.filter(Ticket.assigned_to_id != None)
+
+    # Apply assigned_to_id filter
+    if assigned_to_id:
+        query = query.filter(Ticket.assigned_to_id == assigned_to_id)
+
+    return query
+
 @tickets_bp.route('/tickets', methods=['GET'])
+@read_replica
 def get_tickets():
-    """Get all tickets with optional filtering"""
+    """
+    Get tickets with optional filtering
+    Passing limit and/or cursor switches to keyset pagination on (created_at, id)
+    and returns {'tickets': [...], 'next_cursor': ...}; fields= limits the keys
+    Comments are not embedded unless requested (fields=...,comments)
+    Supports If-None-Match against the collection version (304 Not Modified)
+    """
     try:
-        # Get query parameters for filtering
-        status_filter = request.args.get('status')  # 'abierto', 'en_proceso', 'cerrado'
-        assigned_filter = request.args.get('assigned')  # 'true', 'false', or None
-        assigned_to_id = request.args.get('assigned_to_id')  # specific user id
-
-        query = Ticket.query
-
-        # Apply status filter
-        if status_filter:
-            query = query.filter(Ticket.status == status_filter)
+        # Pagination / projection parameters
+        cursor = request.args.get('cursor')
+        raw_limit = request.args.get('limit')
+        try:
+            fields = _parse_fields(request.args.get('fields')) or Ticket.LIST_FIELDS
+            limit = parse_limit(raw_limit)
+            if cursor:
+                decode_cursor(cursor)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        def build():
+            query = _filtered_query(fields)
+
+            if cursor is None and raw_limit is None:
+                # Legacy unpaginated response
+                tickets = query.order_by(Ticket.created_at.desc(), Ticket.id.desc()).all()
+                return current_app.json.dumps([ticket.to_dict(fields) for ticket in tickets])
+
+            tickets, next_cursor = paginate_desc(query, Ticket.created_at, Ticket.id, cursor, limit)
+            return current_app.json.dumps({
+                'tickets': [ticket.to_dict(fields) for ticket in tickets],
+                'next_cursor': next_cursor
+            })
+
+        return conditional_response(collection_etag(), build)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
-        # Apply assigned filter
-        if assigned_filter == 'false':
-            query = query.filter(Ticket.assigned_to_id == None)
-        elif assigned_filter == 'true':
-            query = query.filter(Ticket.assigned_to_id != None)
+@tickets_bp.route('/tickets/search', methods=['GET'])
+def search_tickets():
+    """
+    Ranked full-text search over subject, description and comment text
+    ?q= is required; accepts the same status/assigned/assigned_to_id/fields
+    filters as GET /tickets and limit/cursor paging ({'tickets', 'next_cursor'})
+    """
+    try:
+        query_text = (request.args.get('q') or '').strip()
+        if not query_text:
+            return jsonify({'error': 'q is required'}), 400
+        try:
+            fields = _parse_fields(request.args.get('fields')) or Ticket.LIST_FIELDS
+            limit = parse_limit(request.args.get('limit'))
+            offset = decode_offset_cursor(request.args.get('cursor'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        # Creates the SQLite FTS5 index on first use (no-op on PostgreSQL)
+        SearchService.prepare()
+
+        def build():
+            hits = SearchService.hits(query_text, current_app.config['SEARCH_TEXT_CONFIG'])
+            if hits is None:
+                return current_app.json.dumps({'tickets': [], 'next_cursor': None})
+
+            query = _filtered_query(fields).join(hits, hits.c.ticket_id == Ticket.id)
+            tickets = query.order_by(hits.c.rank.desc(), Ticket.id.desc()).offset(offset).limit(limit + 1).all()
+
+            next_cursor = None
+            if len(tickets) > limit:
+                tickets = tickets[:limit]
+                next_cursor = encode_offset_cursor(offset + limit)
+
+            return current_app.json.dumps({
+                'tickets': [ticket.to_dict(fields) for ticket in tickets],
+                'next_cursor': next_cursor
+            })
+
+        return conditional_response(collection_etag(), build)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
-        # Apply assigned_to_id filter
-        if assigned_to_id:
-            query = query.filter(Ticket.assigned_to_id == assigned_to_id)
+@tickets_bp.route('/tickets/summary', methods=['GET'])
+@read_replica
+def get_tickets_summary():
+    """
+    Dashboard counts: total and per status, priority, department and assignee
+    ('' = none), read from the maintained counters instead of the tickets table
+    """
+    try:
+        def build():
+            return current_app.json.dumps(ticket_counters.summary())
 
-        tickets = query.order_by(Ticket.created_at.desc()).all()
-        return jsonify([ticket.to_dict() for ticket in tickets]), 200
+        return conditional_response(collection_etag(), build)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@tickets_bp.route('/tickets/stream', methods=['GET'])
+def stream_tickets():
+    """
+    Server-sent events for committed ticket changes
+    Events: ticket_created, ticket_assigned, ticket_status_changed,
+    ticket_updated, comment_added (data = JSON with the ticket summary)
+    """
+    config = current_app.config
+    pubsub = ticket_events.pubsub
+    if pubsub.subscriber_count() >= config['EVENT_STREAM_MAX_CLIENTS']:
+        response = jsonify({'error': 'Too many event stream clients, retry later'})
+        response.headers['Retry-After'] = str(config['EVENT_STREAM_RETRY_MS'] // 1000 or 1)
+        return response, 503
+
+    body = ticket_events.stream(
+        pubsub.subscribe(),
+        heartbeat=config['EVENT_STREAM_HEARTBEAT'],
+        max_duration=config['EVENT_STREAM_MAX_DURATION'],
+        retry_ms=config['EVENT_STREAM_RETRY_MS']
+    )
+    response = Response(body, mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # disable nginx proxy buffering
+    return response
+
 @tickets_bp.route('/tickets/<int:ticket_id>', methods=['GET'])
+@read_replica
 def get_ticket(ticket_id):
-    """Get specific ticket"""
+    """
+    Get specific ticket (ETag / Last-Modified from updated_at, 304 when unchanged)
+    Falls back to the archive for closed tickets moved out by `flask tickets archive`
+    """
     try:
-        ticket = Ticket.query.get_or_404(ticket_id)
-        return jsonify(ticket.to_dict()), 200
+        model = Ticket
+        updated_at = db.session.query(Ticket.updated_at).filter(Ticket.id == ticket_id).first()
+        if updated_at is None:
+            model = ArchivedTicket
+            updated_at = db.session.query(ArchivedTicket.updated_at).filter(ArchivedTicket.id == ticket_id).first()
+        if updated_at is None:
+            return jsonify({'error': 'Ticket not found'}), 404
+        updated_at = updated_at[0]
+
+        def build():
+            ticket = model.query.options(*model.eager_options()).filter_by(id=ticket_id).first()
+            return current_app.json.dumps(ticket.to_dict())
+
+        return conditional_response(ticket_etag(ticket_id, updated_at), build, last_modified=updated_at)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -76,21 +245,28 @@ def create_ticket():
 
         # Auto-assign to available agent
         was_assigned = AutoAssignService.assign_ticket_automatically(ticket)
+        db.session.flush()
 
-        db.session.commit()
+        # Live stream events are published once the transaction commits
+        ticket_events.record('ticket_created', ticket)
+        if was_assigned:
+            ticket_events.record('ticket_assigned', ticket)
 
+        # Webhooks are queued in the outbox and committed together with the ticket
         # Step 1: ALWAYS notify client about ticket creation first
-        N8nService.trigger_new_ticket_workflow(ticket.to_dict())
+        N8nService.trigger_new_ticket_workflow(ticket)
 
         # Step 2: If assigned, notify about assignment (n8n will handle delay)
         if was_assigned:
             # Notify client about assignment (with 10s delay in n8n)
             N8nService.trigger_update_ticket_workflow(
-                ticket.to_dict(),
+                ticket,
                 f"Tu ticket ha sido asignado automáticamente a {ticket.assigned_user.full_name} quien estará trabajando en tu solicitud."
             )
             # Notify agent about new assignment
-            N8nService.trigger_agent_assignment_workflow(ticket.to_dict())
+            N8nService.trigger_agent_assignment_workflow(ticket)
+
+        db.session.commit()
 
         return jsonify(ticket.to_dict()), 201
 
@@ -112,25 +288,31 @@ def update_ticket_status(ticket_id):
         old_agent_id = ticket.assigned_to_id
         ticket.status = data['status']
         ticket.updated_at = datetime.utcnow()
+        db.session.flush()
 
-        db.session.commit()
+        if ticket.status != old_status:
+            ticket_events.record('ticket_status_changed', ticket, previous_status=old_status)
 
-        # Trigger n8n workflow if ticket is closed
+        # Queue n8n workflow if ticket is closed (committed with the status change)
         if old_status != 'cerrado' and ticket.status == 'cerrado':
-            N8nService.trigger_close_ticket_workflow(ticket.to_dict())
+            N8nService.trigger_close_ticket_workflow(ticket)
 
             # Auto-assign next ticket to the agent who just became available
             if old_agent_id:
                 next_ticket = AutoAssignService.assign_next_ticket_to_agent(old_agent_id)
 
                 if next_ticket:
+                    ticket_events.record('ticket_assigned', next_ticket)
+
                     # Notify client about assignment (with 10s delay in n8n)
                     N8nService.trigger_update_ticket_workflow(
-                        next_ticket.to_dict(),
+                        next_ticket,
                         f"Tu ticket ha sido asignado automáticamente a {next_ticket.assigned_user.full_name} quien estará trabajando en tu solicitud."
                     )
                     # Notify agent about new assignment
-                    N8nService.trigger_agent_assignment_workflow(next_ticket.to_dict())
+                    N8nService.trigger_agent_assignment_workflow(next_ticket)
+
+        db.session.commit()
 
         return jsonify(ticket.to_dict()), 200
 
@@ -144,6 +326,7 @@ def update_ticket(ticket_id):
     try:
         ticket = Ticket.query.get_or_404(ticket_id)
         data = request.get_json()
+        old_agent_id = ticket.assigned_to_id
 
         # Update fields if provided
         if 'subject' in data:
@@ -162,6 +345,12 @@ def update_ticket(ticket_id):
             ticket.assigned_to_id = data['assigned_to_id']
 
         ticket.updated_at = datetime.utcnow()
+        db.session.flush()
+
+        ticket_events.record('ticket_updated', ticket)
+        if ticket.assigned_to_id != old_agent_id:
+            ticket_events.record('ticket_assigned', ticket, previous_assigned_to_id=old_agent_id)
+
         db.session.commit()
 
         return jsonify(ticket.to_dict()), 200
@@ -170,13 +359,132 @@ def update_ticket(ticket_id):
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+@tickets_bp.route('/tickets/bulk', methods=['POST'])
+def bulk_update_tickets():
+    """
+    Apply many status/assignment/priority changes in one transaction
+    Body: {"operations": [{"ticket_id": 1, "status": "cerrado"}, {"ticket_id": 2, "assigned_to_id": 3}]}
+    Returns a per-item result array; invalid items don't block the others
+    """
+    try:
+        data = request.get_json() or {}
+        results, auto_assigned = BulkTicketService.apply(data.get('operations'))
+        db.session.commit()
+
+        succeeded = sum(1 for result in results if result['success'])
+        return jsonify({
+            'results': results,
+            'succeeded': succeeded,
+            'failed': len(results) - succeeded,
+            'auto_assigned': [{'ticket_id': t.id, 'assigned_to_id': t.assigned_to_id} for t in auto_assigned]
+        }), 200
+
+    except BulkOperationError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@tickets_bp.route('/tickets/export', methods=['GET'])
+@token_required
+@admin_required
+def export_tickets_file(current_user):
+    """
+    Stream all tickets as NDJSON (default) or CSV (admin only)
+    Optional filters: ?status=, ?updated_since=<ISO datetime> for incremental exports
+    """
+    fmt = request.args.get('format', 'ndjson')
+    try:
+        check_format(fmt)
+        updated_since = request.args.get('updated_since')
+        if updated_since:
+            updated_since = datetime.fromisoformat(updated_since)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    batch_size = current_app.config['TICKET_TRANSFER_BATCH_SIZE']
+    rows = iter_ticket_rows(request.args.get('status'), updated_since, batch_size)
+    body = stream_with_context(export_tickets(fmt, rows, batch_size))
+
+    mimetype = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    response = Response(body, mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename=tickets.{fmt}'
+    return response
+
+@tickets_bp.route('/tickets/import', methods=['POST'])
+@token_required
+@admin_required
+def import_tickets_file(current_user):
+    """
+    Import tickets from NDJSON or CSV (admin only)
+    Send the file as multipart 'file' or as the raw request body; ?format=ndjson|csv,
+    ?keep_ids=true keeps source ids. Imported tickets are not auto-assigned or notified
+    """
+    fmt = request.args.get('format', 'ndjson')
+    try:
+        check_format(fmt)
+        upload = request.files.get('file')
+        raw = upload.stream if upload is not None else request.stream
+        stream = io.TextIOWrapper(raw, encoding='utf-8-sig', newline='')
+
+        report = import_tickets(
+            fmt,
+            stream,
+            chunk_size=current_app.config['TICKET_TRANSFER_BATCH_SIZE'],
+            keep_ids=request.args.get('keep_ids') == 'true'
+        )
+        return jsonify(report), 200
+
+    except (TransferError, UnicodeDecodeError) as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
 @tickets_bp.route('/tickets/<int:ticket_id>/comments', methods=['GET'])
+@read_replica
 def get_ticket_comments(ticket_id):
-    """Get comments for a specific ticket"""
+    """
+    Get comments for a specific ticket, oldest first
+    Passing limit and/or cursor switches to keyset pagination on (created_at, id)
+    and returns {'comments': [...], 'next_cursor': ...}; since=<ISO datetime>
+    only returns comments created after that time (incremental refresh)
+    """
     try:
-        ticket = Ticket.query.get_or_404(ticket_id)
-        comments = Comment.query.filter_by(ticket_id=ticket_id).order_by(Comment.created_at.asc()).all()
-        return jsonify([comment.to_dict() for comment in comments]), 200
+        cursor = request.args.get('cursor')
+        raw_limit = request.args.get('limit')
+        since = request.args.get('since')
+        try:
+            limit = parse_limit(raw_limit)
+            if cursor:
+                decode_cursor(cursor)
+            if since:
+                since = datetime.fromisoformat(since)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        if db.session.query(Ticket.id).filter(Ticket.id == ticket_id).first() is None:
+            return jsonify({'error': 'Ticket not found'}), 404
+
+        def build():
+            query = Comment.query.filter(Comment.ticket_id == ticket_id)
+            if since:
+                query = query.filter(Comment.created_at > since)
+
+            if cursor is None and raw_limit is None:
+                # Legacy unpaginated response
+                comments = query.order_by(Comment.created_at.asc(), Comment.id.asc()).all()
+                return current_app.json.dumps([comment.to_dict() for comment in comments])
+
+            comments, next_cursor = paginate_asc(query, Comment.created_at, Comment.id, cursor, limit)
+            return current_app.json.dumps({
+                'comments': [comment.to_dict() for comment in comments],
+                'next_cursor': next_cursor
+            })
+
+        return conditional_response(collection_etag(), build)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -194,23 +502,32 @@ def add_comment(ticket_id):
                 return jsonify({'error': f'{field} is required'}), 400
 
         # Create new comment
+        now = datetime.utcnow()
         comment = Comment(
             ticket_id=ticket_id,
             author_name=data['author_name'],
             author_email=data['author_email'],
             comment_text=data['comment_text'],
-            is_internal=data.get('is_internal', False)
+            is_internal=data.get('is_internal', False),
+            created_at=now
         )
 
         db.session.add(comment)
 
-        # Update ticket timestamp
-        ticket.updated_at = datetime.utcnow()
-        db.session.commit()
+        # Update ticket timestamp and denormalized comment stats
+        # (SQL-side increment so concurrent comments don't lose counts)
+        ticket.updated_at = now
+        ticket.comment_count = Ticket.comment_count + 1
+        ticket.last_comment_at = now
+        db.session.flush()
+
+        ticket_events.record('comment_added', ticket, comment_id=comment.id, is_internal=comment.is_internal)
 
-        # Trigger n8n workflow (only for non-internal comments)
+        # Queue n8n workflow (only for non-internal comments)
         if not comment.is_internal:
-            N8nService.trigger_update_ticket_workflow(ticket.to_dict(), comment.comment_text)
+            N8nService.trigger_update_ticket_workflow(ticket, comment.comment_text)
+
+        db.session.commit()
 
         return jsonify(comment.to_dict()), 201
 
@@ -0,0 +1,275 @@
+"""
+In-memory agent availability index
+Keeps the number of active tickets and the capacity of every agent so
+auto-assignment can pick an agent without scanning the tickets table. Counts
+are updated from ORM changes after each successful commit; with Redis the
+committed deltas are also sent to the other worker processes, and the index is
+rebuilt from the database when it is older than AGENT_INDEX_TTL (or when
+auto-assignment finds no free agent). A lazily-invalidated min-heap keyed by
+load ratio gives the least-loaded agents in O(k log n)
+"""
+import heapq
+import threading
+import time
+from collections import Counter
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session, attributes
+from app import db
+from app.models.ticket import Ticket
+from app.models.user import User
+from app.services.pubsub import WorkerSignals
+from app.utils.redis_client import get_redis
+
+# User columns whose changes require reloading the agent set
+AGENT_ATTRIBUTES = ('role', 'is_active', 'max_active_tickets', 'assignment_weight')
+
+
+class AgentAvailabilityIndex:
+
+    def __init__(self, ttl=30, default_capacity=1):
+        self.ttl = ttl
+        self.default_capacity = default_capacity
+        self.version = 0  # bumped on every rebuild so strategies can resync
+        self._lock = threading.RLock()
+        self._counts = {}  # agent_id -> active ticket count, for every active agent
+        self._capacity = {}  # agent_id -> max active tickets
+        self._weights = {}  # agent_id -> assignment weight
+        self._available = []  # agent ids below capacity
+        self._positions = {}  # agent_id -> index in self._available (O(1) removal)
+        self._heap = []  # (load ratio, count, agent_id); stale entries skipped on pop
+        self._built_at = None
+        self.signals = WorkerSignals(None, None)
+
+    def init_app(self, app):
+        self.ttl = app.config['AGENT_INDEX_TTL']
+        self.default_capacity = app.config['AGENT_DEFAULT_CAPACITY']
+        app.extensions['agent_availability_index'] = self
+
+        # Committed deltas from the other worker processes (one listener per process)
+        if not self.signals.enabled:
+            self.signals = WorkerSignals(get_redis(app), app.config['AGENT_INDEX_CHANNEL'])
+            self.signals.listen(self._apply_remote)
+        if self.signals.enabled:
+            @app.before_request
+            def _ensure_agent_index_listener():
+                self.signals.start()
+
+    def _commit(self, session):
+        """Apply a committed session's deltas and pass them on to the other workers"""
+        changes = session.info.pop('agent_index_changes', None)
+        if session.info.pop('agent_index_invalidate', False):
+            self.invalidate()
+            self.signals.send({'invalidate': True})
+        elif changes:
+            self.apply(changes)
+            changed = {str(agent_id): delta for agent_id, delta in changes.items() if delta}
+            if changed:
+                self.signals.send({'changes': changed})
+
+    # Index maintenance
+
+    def rebuild(self):
+        """Reload agents and their active ticket counts (one grouped query)"""
+        agents = db.session.query(User.id, User.max_active_tickets, User.assignment_weight).filter(
+            User.role == 'agent',
+            User.is_active == True
+        ).all()
+        active_counts = dict(db.session.query(Ticket.assigned_to_id, func.count(Ticket.id)).filter(
+            Ticket.assigned_to_id.isnot(None),
+            Ticket.status.in_(Ticket.ACTIVE_STATUSES)
+        ).group_by(Ticket.assigned_to_id).all())
+
+        with self._lock:
+            self._counts = {agent_id: active_counts.get(agent_id, 0) for agent_id, _, _ in agents}
+            self._capacity = {agent_id: capacity or self.default_capacity for agent_id, capacity, _ in agents}
+            self._weights = {agent_id: max(weight or 1, 1) for agent_id, _, weight in agents}
+            self._available = [agent_id for agent_id in self._counts if self._has_room(agent_id)]
+            self._positions = {agent_id: i for i, agent_id in enumerate(self._available)}
+            self._heap = [self._heap_entry(agent_id) for agent_id in self._counts]
+            heapq.heapify(self._heap)
+            self.version += 1
+            self._built_at = time.monotonic()
+
+    def invalidate(self):
+        with self._lock:
+            self._built_at = None
+
+    def ensure_fresh(self):
+        built_at = self._built_at
+        if built_at is None or time.monotonic() - built_at > self.ttl:
+            self.rebuild()
+
+    def apply(self, changes):
+        """Apply committed {agent_id: delta} active-ticket changes"""
+        with self._lock:
+            if self._built_at is None:
+                return
+            for agent_id, delta in changes.items():
+                if agent_id not in self._counts or not delta:
+                    continue
+                self._counts[agent_id] = max(self._counts[agent_id] + delta, 0)
+                if self._has_room(agent_id):
+                    self._mark_available(agent_id)
+                else:
+                    self._mark_busy(agent_id)
+                heapq.heappush(self._heap, self._heap_entry(agent_id))
+
+            # Drop stale heap entries once they dominate
+            if len(self._heap) > 4 * len(self._counts) + 64:
+                self._heap = [self._heap_entry(agent_id) for agent_id in self._counts]
+                heapq.heapify(self._heap)
+
+    def _apply_remote(self, payload):
+        if payload.get('invalidate'):
+            self.invalidate()
+        else:
+            self.apply({int(agent_id): delta for agent_id, delta in payload.get('changes', {}).items()})
+
+    def _has_room(self, agent_id):
+        return self._counts[agent_id] < self._capacity[agent_id]
+
+    def _heap_entry(self, agent_id):
+        count = self._counts[agent_id]
+        return (count / self._capacity[agent_id], count, agent_id)
+
+    def _mark_available(self, agent_id):
+        if agent_id not in self._positions:
+            self._positions[agent_id] = len(self._available)
+            self._available.append(agent_id)
+
+    def _mark_busy(self, agent_id):
+        position = self._positions.pop(agent_id, None)
+        if position is None:
+            return
+        last = self._available.pop()
+        if last != agent_id:
+            self._available[position] = last
+            self._positions[last] = position
+
+    # Queries
+
+    def available_agent_ids(self):
+        """Agents below their capacity"""
+        self.ensure_fresh()
+        with self._lock:
+            return list(self._available)
+
+    def least_loaded(self, limit, reserve=0):
+        """
+        Up to `limit` agents with the lowest load ratio that still have more
+        than `reserve` free slots, lowest first
+        """
+        self.ensure_fresh()
+        with self._lock:
+            selected = []
+            popped = []
+            seen = set()
+            while self._heap and len(selected) < limit:
+                entry = heapq.heappop(self._heap)
+                ratio, count, agent_id = entry
+                if self._counts.get(agent_id) != count or agent_id in seen:
+                    continue  # stale or duplicate entry, drop it
+                seen.add(agent_id)
+                popped.append(entry)
+                if ratio >= 1:
+                    break  # every remaining agent is full too
+                if count < self._slot_limit(agent_id, reserve):
+                    selected.append(agent_id)
+            for entry in popped:
+                heapq.heappush(self._heap, entry)
+            return selected
+
+    def has_room(self, agent_id, reserve=0):
+        with self._lock:
+            if agent_id not in self._counts:
+                return False
+            return self._counts[agent_id] < self._slot_limit(agent_id, reserve)
+
+    def _slot_limit(self, agent_id, reserve):
+        # A reserve never takes an agent's only slot
+        capacity = self._capacity[agent_id]
+        return capacity - min(reserve, capacity - 1)
+
+    def weights(self):
+        """Copy of {agent_id: assignment weight} for every active agent"""
+        self.ensure_fresh()
+        with self._lock:
+            return dict(self._weights)
+
+
+    # Change tracking
+
+    def record_change(self, session, old_agent, old_status, new_agent, new_status):
+        """
+        Track one ticket's move between agents/statuses; also used for
+        set-based UPDATEs, which bypass the ORM flush events
+        """
+        if old_agent == new_agent and _is_active(old_status) == _is_active(new_status):
+            return
+        changes = session.info.setdefault('agent_index_changes', Counter())
+        if old_agent and _is_active(old_status):
+            changes[old_agent] -= 1
+        if new_agent and _is_active(new_status):
+            changes[new_agent] += 1
+
+    def _collect(self, session):
+        """Turn pending Ticket/User changes into per-agent deltas stored on the session"""
+        changes = session.info.setdefault('agent_index_changes', Counter())
+
+        for obj in session.new:
+            if isinstance(obj, Ticket):
+                if obj.assigned_to_id and _is_active(obj.status):
+                    changes[obj.assigned_to_id] += 1
+            elif isinstance(obj, User):
+                session.info['agent_index_invalidate'] = True
+
+        for obj in session.dirty:
+            if isinstance(obj, Ticket):
+                old_agent, new_agent = _old_and_new(obj, 'assigned_to_id')
+                old_status, new_status = _old_and_new(obj, 'status')
+                self.record_change(session, old_agent, old_status, new_agent, new_status)
+            elif isinstance(obj, User):
+                if any(attributes.get_history(obj, key).has_changes() for key in AGENT_ATTRIBUTES):
+                    session.info['agent_index_invalidate'] = True
+
+        for obj in session.deleted:
+            if isinstance(obj, Ticket) and obj.assigned_to_id and _is_active(obj.status):
+                changes[obj.assigned_to_id] -= 1
+            elif isinstance(obj, User):
+                session.info['agent_index_invalidate'] = True
+
+
+def _is_active(status):
+    # New tickets get the 'abierto' default at INSERT time
+    return status is None or status in Ticket.ACTIVE_STATUSES
+
+
+def _old_and_new(obj, key):
+    history = attributes.get_history(obj, key)
+    new = getattr(obj, key)
+    if history.deleted:
+        return history.deleted[0], new
+    if history.added:
+        return None, new
+    return new, new
+
+
+agent_index = AgentAvailabilityIndex()
+
+
+# Session is global and init_app runs once per app, so the hooks are registered here, once
+
+@event.listens_for(Session, 'before_flush')
+def _collect_agent_changes(session, flush_context, instances):
+    agent_index._collect(session)
+
+
+@event.listens_for(Session, 'after_commit')
+def _apply_agent_changes(session):
+    agent_index._commit(session)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_agent_changes(session):
+    session.info.pop('agent_index_changes', None)
+    session.info.pop('agent_index_invalidate', None)
@@ -0,0 +1,144 @@
+"""
+Pluggable auto-assignment strategies
+A strategy proposes candidate agents for a ticket (best first) from the agent
+availability index and decides the order in which the unassigned backlog is
+handed out. AutoAssignService confirms the candidates under a row lock
+"""
+import heapq
+import random
+import threading
+from sqlalchemy import case
+from app.models.ticket import Ticket
+
+# Tickets that jump the queue and may use an agent's last free slot
+URGENT_PRIORITIES = ('critica', 'alta')
+
+
+class AssignmentStrategy:
+    """Base strategy: agents with spare capacity in random order, oldest ticket first"""
+    name = None
+
+    def candidates(self, index, ticket, limit):
+        """Return up to `limit` agent ids to try for `ticket`, best first"""
+        raise NotImplementedError
+
+    def assigned(self, agent_id):
+        """Called once the ticket has been assigned to `agent_id`"""
+        pass
+
+    def backlog_order(self):
+        """ORDER BY clauses for picking the next unassigned ticket"""
+        return (Ticket.created_at.asc(), Ticket.id.asc())
+
+
+class RandomStrategy(AssignmentStrategy):
+    """Random agent among those with spare capacity (original behaviour)"""
+    name = 'random'
+
+    def candidates(self, index, ticket, limit):
+        candidate_ids = index.available_agent_ids()
+        random.shuffle(candidate_ids)
+        return candidate_ids[:limit]
+
+
+class LeastLoadedStrategy(AssignmentStrategy):
+    """Agent with the lowest active tickets / capacity ratio"""
+    name = 'least_loaded'
+
+    def candidates(self, index, ticket, limit):
+        return index.least_loaded(limit)
+
+
+class WeightedRoundRobinStrategy(AssignmentStrategy):
+    """
+    Stride scheduling: every agent advances by 1/weight when it receives a
+    ticket and the agent with the smallest pass value goes next, so an agent
+    with weight 3 gets three tickets for each one a weight-1 agent gets
+    """
+    name = 'weighted_round_robin'
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._heap = []  # (pass value, agent_id)
+        self._passes = {}
+        self._strides = {}
+        self._version = None
+
+    def _sync(self, index):
+        weights = index.weights()
+        if self._version == index.version:
+            return
+        # New agents start at the current minimum so they do not flood
+        floor = min(self._passes.values()) if self._passes else 0.0
+        self._strides = {agent_id: 1.0 / weight for agent_id, weight in weights.items()}
+        self._passes = {agent_id: self._passes.get(agent_id, floor) for agent_id in weights}
+        self._heap = [(pass_value, agent_id) for agent_id, pass_value in self._passes.items()]
+        heapq.heapify(self._heap)
+        self._version = index.version
+
+    def candidates(self, index, ticket, limit):
+        with self._lock:
+            self._sync(index)
+            selected = []
+            popped = []
+            while self._heap and len(selected) < limit:
+                entry = heapq.heappop(self._heap)
+                pass_value, agent_id = entry
+                if self._passes.get(agent_id) != pass_value:
+                    continue  # stale entry
+                popped.append(entry)
+                if index.has_room(agent_id):
+                    selected.append(agent_id)
+            for entry in popped:
+                heapq.heappush(self._heap, entry)
+            return selected
+
+    def assigned(self, agent_id):
+        with self._lock:
+            if agent_id not in self._passes:
+                return
+            self._passes[agent_id] += self._strides[agent_id]
+            heapq.heappush(self._heap, (self._passes[agent_id], agent_id))
+
+
+class PriorityAwareStrategy(AssignmentStrategy):
+    """
+    Least-loaded selection where urgent tickets (critica/alta) may use every
+    slot but other tickets leave `reserve` slots free on each agent, and the
+    backlog is handed out urgent-first
+    """
+    name = 'priority'
+
+    def __init__(self, reserve=1):
+        self.reserve = reserve
+
+    def candidates(self, index, ticket, limit):
+        reserve = 0 if ticket.priority in URGENT_PRIORITIES else self.reserve
+        return index.least_loaded(limit, reserve=reserve)
+
+    def backlog_order(self):
+        priority_rank = case(
+            (Ticket.priority == 'critica', 0),
+            (Ticket.priority == 'alta', 1),
+            (Ticket.priority == 'media', 2),
+            else_=3
+        )
+        return (priority_rank, Ticket.created_at.asc(), Ticket.id.asc())
+
+
+STRATEGIES = {
+    RandomStrategy.name: RandomStrategy,
+    LeastLoadedStrategy.name: LeastLoadedStrategy,
+    WeightedRoundRobinStrategy.name: WeightedRoundRobinStrategy,
+    PriorityAwareStrategy.name: PriorityAwareStrategy,
+}
+
+
+def create_strategy(config):
+    """Instantiate the strategy named by ASSIGNMENT_STRATEGY"""
+    name = config['ASSIGNMENT_STRATEGY']
+    if name not in STRATEGIES:
+        raise ValueError(f"Unknown assignment strategy '{name}', expected one of {', '.join(STRATEGIES)}")
+    if name == PriorityAwareStrategy.name:
+        return PriorityAwareStrategy(reserve=config['ASSIGNMENT_PRIORITY_RESERVE'])
+    return STRATEGIES[name]()
@@ -1,46 +1,97 @@
 """
 Auto-assignment service for tickets
-Assigns tickets automatically to available agents using round-robin
+Assigns tickets automatically to available agents, using the in-memory
+availability index instead of scanning active tickets
+
+Concurrency: candidates from the (per-process, possibly stale) index are
+confirmed under a row lock taken with SELECT ... FOR UPDATE SKIP LOCKED, so
+two workers never hand the same agent or the same queued ticket out twice.
+SQLite ignores FOR UPDATE; there the preceding INSERT/UPDATE flush already
+holds the database write lock, which serializes assignment instead
 """
-import random
+import time
+from flask import current_app
+from sqlalchemy import func
 from app.models.user import User
 from app.models.ticket import Ticket
+from app.services.agent_availability import agent_index
+from app.services.assignment_strategies import create_strategy
 from app import db
 
+# Free agents from the index to try before giving up on a ticket
+MAX_ASSIGN_CANDIDATES = 5
+
+# Per-process cache for get_agent_stats()
+_stats_cache = {'value': None, 'expires_at': 0.0}
+
 
 class AutoAssignService:
 
     @staticmethod
     def get_available_agents():
         """
-        Get all agents who are NOT currently assigned to any active ticket
+        Get all agents below their active ticket capacity
         Active tickets = status is 'abierto' or 'en_proceso'
         """
-        # Get all agents (non-admin users)
-        all_agents = User.query.filter(
-            User.role == 'agent',
-            User.is_active == True
-        ).all()
-
-        if not all_agents:
+        available_ids = agent_index.available_agent_ids()
+        if not available_ids:
             return []
 
-        # Get agents who have active tickets assigned
-        busy_agent_ids = db.session.query(Ticket.assigned_to_id).filter(
-            Ticket.assigned_to_id.isnot(None),
-            Ticket.status.in_(['abierto', 'en_proceso'])
-        ).distinct().all()
+        return User.query.filter(User.id.in_(available_ids)).all()
+
+    @staticmethod
+    def get_strategy():
+        """Assignment strategy configured by ASSIGNMENT_STRATEGY (one per app)"""
+        strategy = current_app.extensions.get('assignment_strategy')
+        if strategy is None:
+            strategy = create_strategy(current_app.config)
+            current_app.extensions['assignment_strategy'] = strategy
+        return strategy
+
+    @staticmethod
+    def set_strategy(strategy):
+        """Swap the strategy at runtime (an AssignmentStrategy instance)"""
+        current_app.extensions['assignment_strategy'] = strategy
+
+    @staticmethod
+    def count_active_tickets(agent_id, exclude_ticket_id=None):
+        """Indexed count of a single agent's workload in the current transaction"""
+        query = db.session.query(func.count(Ticket.id)).filter(
+            Ticket.assigned_to_id == agent_id,
+            Ticket.status.in_(Ticket.ACTIVE_STATUSES)
+        )
+        if exclude_ticket_id is not None:
+            query = query.filter(Ticket.id != exclude_ticket_id)
+        return query.scalar()
+
+    @staticmethod
+    def lock_free_agent(candidate_ids, exclude_ticket_id=None):
+        """
+        Lock and return the first candidate agent that is still below capacity
+        Agents locked by a concurrent assignment are skipped, not waited on.
+        FOR NO KEY UPDATE (key_share) still lets other transactions insert and
+        update tickets referencing the agent while the lock is held
+        Returns: User or None
+        """
+        for agent_id in candidate_ids:
+            agent = User.query.filter(
+                User.id == agent_id,
+                User.role == 'agent',
+                User.is_active == True
+            ).with_for_update(skip_locked=True, key_share=True).first()
+
+            if agent is None:
+                continue
 
-        # Flatten the list of tuples to a list of IDs
-        busy_agent_ids = [agent_id[0] for agent_id in busy_agent_ids]
+            capacity = agent.max_active_tickets or current_app.config['AGENT_DEFAULT_CAPACITY']
+            if AutoAssignService.count_active_tickets(agent_id, exclude_ticket_id) >= capacity:
+                # Another worker filled this agent since our index was built
+                agent_index.invalidate()
+                continue
 
-        # Filter out busy agents
-        available_agents = [
-            agent for agent in all_agents
-            if agent.id not in busy_agent_ids
-        ]
+            return agent
 
-        return available_agents
+        return None
 
     @staticmethod
     def assign_ticket_automatically(ticket):
@@ -48,18 +99,24 @@ class AutoAssignService:
         Automatically assign a ticket to an available agent
         Returns: True if assigned successfully, False otherwise
         """
-        available_agents = AutoAssignService.get_available_agents()
+        strategy = AutoAssignService.get_strategy()
+        candidate_ids = strategy.candidates(agent_index, ticket, MAX_ASSIGN_CANDIDATES)
+        selected_agent = AutoAssignService.lock_free_agent(candidate_ids, ticket.id)
+
+        if selected_agent is None:
+            # The index may not know yet that another worker freed a slot; recount once
+            agent_index.rebuild()
+            candidate_ids = strategy.candidates(agent_index, ticket, MAX_ASSIGN_CANDIDATES)
+            selected_agent = AutoAssignService.lock_free_agent(candidate_ids, ticket.id)
 
-        if not available_agents:
+        if selected_agent is None:
             # No agents available, leave ticket unassigned
             print(f"⚠️  No available agents for ticket #{ticket.id}")
             return False
 
-        # Select random agent from available ones
-        selected_agent = random.choice(available_agents)
-
         # Assign ticket
         ticket.assigned_to_id = selected_agent.id
+        strategy.assigned(selected_agent.id)
 
         # Change status to 'en_proceso' when assigned
         if ticket.status == 'abierto':
@@ -70,25 +127,36 @@ class AutoAssignService:
         return True
 
     @staticmethod
-    def get_oldest_unassigned_ticket():
+    def get_oldest_unassigned_ticket(lock=False):
         """
-        Get the oldest ticket that is not assigned to any agent
+        Get the next ticket that is not assigned to any agent (oldest first, or
+        as ordered by the assignment strategy, e.g. urgent first)
+        lock=True locks the row, skipping tickets another worker is assigning
         Returns: Ticket object or None
         """
-        unassigned_ticket = Ticket.query.filter(
+        query = Ticket.query.filter(
             Ticket.assigned_to_id.is_(None),
-            Ticket.status.in_(['abierto', 'en_proceso'])
-        ).order_by(Ticket.created_at.asc()).first()
+            Ticket.status.in_(Ticket.ACTIVE_STATUSES)
+        ).order_by(*AutoAssignService.get_strategy().backlog_order())
+
+        if lock:
+            query = query.with_for_update(skip_locked=True)
 
-        return unassigned_ticket
+        return query.first()
 
     @staticmethod
     def assign_next_ticket_to_agent(agent_id):
         """
-        Assign the oldest unassigned ticket to a specific agent
+        Assign the next unassigned ticket to a specific agent
+        The agent is locked and rechecked first (still an active agent, still
+        below capacity), like any other assignment
         Returns: Ticket object if assigned, None otherwise
         """
-        oldest_ticket = AutoAssignService.get_oldest_unassigned_ticket()
+        if AutoAssignService.lock_free_agent([agent_id]) is None:
+            print(f"ℹ️  El agente ID {agent_id} no está disponible para recibir tickets")
+            return None
+
+        oldest_ticket = AutoAssignService.get_oldest_unassigned_ticket(lock=True)
 
         if not oldest_ticket:
             print(f"ℹ️  No hay tickets sin asignar para el agente ID {agent_id}")
@@ -96,41 +164,126 @@ class AutoAssignService:
 
         # Assign ticket to the agent
         oldest_ticket.assigned_to_id = agent_id
+        AutoAssignService.get_strategy().assigned(agent_id)
 
         # Change status to 'en_proceso' when assigned
         if oldest_ticket.status == 'abierto':
             oldest_ticket.status = 'en_proceso'
 
-        db.session.commit()
+        # Caller commits, so the assignment and its webhooks land in one transaction
+        db.session.flush()
 
         print(f"✅ Ticket #{oldest_ticket.id} auto-asignado al agente ID {agent_id} ({oldest_ticket.assigned_user.full_name})")
 
         return oldest_ticket
 
     @staticmethod
-    def get_agent_stats():
+    def assign_backlog_to_agents(freed_slots):
+        """
+        Hand queued tickets to agents that just freed capacity (bulk closes)
+        One locked backlog query for all slots, dealt out round-robin
+        freed_slots: {agent_id: number of tickets the agent gave up}
+        Returns: list of assigned Ticket objects
+        """
+        slots = {agent_id: count for agent_id, count in freed_slots.items() if count > 0}
+        total = sum(slots.values())
+        if not total:
+            return []
+
+        tickets = Ticket.query.filter(
+            Ticket.assigned_to_id.is_(None),
+            Ticket.status.in_(Ticket.ACTIVE_STATUSES)
+        ).order_by(
+            *AutoAssignService.get_strategy().backlog_order()
+        ).limit(total).with_for_update(skip_locked=True).all()
+
+        # Interleave agents so each gets its first ticket before anyone gets a second
+        order = []
+        while slots:
+            for agent_id in list(slots):
+                order.append(agent_id)
+                slots[agent_id] -= 1
+                if not slots[agent_id]:
+                    del slots[agent_id]
+
+        strategy = AutoAssignService.get_strategy()
+        for ticket, agent_id in zip(tickets, order):
+            ticket.assigned_to_id = agent_id
+            strategy.assigned(agent_id)
+            if ticket.status == 'abierto':
+                ticket.status = 'en_proceso'
+
+        # Caller commits together with the bulk changes
+        db.session.flush()
+        for ticket in tickets[:len(order)]:
+            # The assignee may already be loaded (as None) from an earlier query
+            db.session.expire(ticket, ['assigned_user'])
+
+        if tickets:
+            print(f"✅ {len(tickets)} ticket(s) de la cola auto-asignados tras operación masiva")
+
+        return tickets
+
+    @staticmethod
+    def get_agent_stats(use_cache=True):
         """
         Get statistics about agent workload
-        Returns dict with agent info and their active ticket count
+        One LEFT JOIN users -> tickets grouped by agent, status and priority;
+        cached for AGENT_STATS_CACHE_TTL seconds (0 disables the cache)
+        Returns list with agent info, active ticket count and breakdowns
         """
-        agents = User.query.filter(
+        ttl = current_app.config['AGENT_STATS_CACHE_TTL']
+        cached = _stats_cache.get('value')
+        if use_cache and ttl > 0 and cached is not None and time.monotonic() < _stats_cache['expires_at']:
+            return cached
+
+        rows = db.session.query(
+            User.id,
+            User.full_name,
+            User.email,
+            User.max_active_tickets,
+            Ticket.status,
+            Ticket.priority,
+            func.count(Ticket.id)
+        ).outerjoin(
+            Ticket, Ticket.assigned_to_id == User.id
+        ).filter(
             User.role == 'agent',
             User.is_active == True
-        ).all()
-
-        stats = []
-        for agent in agents:
-            active_tickets = Ticket.query.filter(
-                Ticket.assigned_to_id == agent.id,
-                Ticket.status.in_(['abierto', 'en_proceso'])
-            ).count()
-
-            stats.append({
-                'agent_id': agent.id,
-                'agent_name': agent.full_name,
-                'agent_email': agent.email,
-                'active_tickets': active_tickets,
-                'is_available': active_tickets == 0
-            })
-
-        return stats
+        ).group_by(
+            User.id, User.full_name, User.email, User.max_active_tickets, Ticket.status, Ticket.priority
+        ).order_by(User.id).all()
+
+        default_capacity = current_app.config['AGENT_DEFAULT_CAPACITY']
+        stats = {}
+        for agent_id, full_name, email, capacity, status, priority, count in rows:
+            agent_stats = stats.get(agent_id)
+            if agent_stats is None:
+                agent_stats = stats[agent_id] = {
+                    'agent_id': agent_id,
+                    'agent_name': full_name,
+                    'agent_email': email,
+                    'capacity': capacity or default_capacity,
+                    'active_tickets': 0,
+                    'total_tickets': 0,
+                    'by_status': {},
+                    'active_by_priority': {}
+                }
+            if status is None:
+                continue  # agent without tickets (LEFT JOIN padding)
+
+            agent_stats['total_tickets'] += count
+            agent_stats['by_status'][status] = agent_stats['by_status'].get(status, 0) + count
+            if status in Ticket.ACTIVE_STATUSES:
+                agent_stats['active_tickets'] += count
+                agent_stats['active_by_priority'][priority] = agent_stats['active_by_priority'].get(priority, 0) + count
+
+        result = list(stats.values())
+        for agent_stats in result:
+            agent_stats['is_available'] = agent_stats['active_tickets'] < agent_stats['capacity']
+
+        if ttl > 0:
+            _stats_cache['value'] = result
+            _stats_cache['expires_at'] = time.monotonic() + ttl
+
+        return result
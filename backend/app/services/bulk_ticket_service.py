@@ -0,0 +1,164 @@
+"""
+Bulk ticket operations (POST /api/tickets/bulk)
+Applies many status / assignment / priority changes in one transaction:
+items with identical changes share one set-based UPDATE ... WHERE id IN (...),
+freed agents are refilled from the backlog with a single locked query, and
+webhooks / live events / summary counter changes are queued for all affected
+tickets at once
+"""
+from collections import Counter, defaultdict
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import update
+from app import db
+from app.models.ticket import Ticket
+from app.models.user import User
+from app.services.agent_availability import agent_index
+from app.services.auto_assign_service import AutoAssignService
+from app.services.n8n_service import N8nService
+from app.services.response_cache import mark_tickets_changed
+from app.services.ticket_counters import counter_values, ticket_counters
+from app.services.ticket_events import ticket_events
+
+BULK_FIELDS = ('status', 'assigned_to_id', 'priority')
+STATUS_VALUES = tuple(Ticket.__table__.c.status.type.enums)
+PRIORITY_VALUES = tuple(Ticket.__table__.c.priority.type.enums)
+
+
+class BulkOperationError(ValueError):
+    """The request as a whole is invalid (not a per-item failure)"""
+
+
+class BulkTicketService:
+
+    @staticmethod
+    def apply(operations):
+        """
+        Apply a list of {'ticket_id': ..., 'status'|'assigned_to_id'|'priority': ...}
+        changes in the current transaction (caller commits)
+        Returns: (per-item results, auto-assigned tickets)
+        """
+        if not isinstance(operations, list) or not operations:
+            raise BulkOperationError('operations must be a non-empty list')
+        max_items = current_app.config['BULK_MAX_OPERATIONS']
+        if len(operations) > max_items:
+            raise BulkOperationError(f'At most {max_items} operations per request')
+
+        results = [None] * len(operations)
+        requested = {}  # ticket_id -> (item index, {field: value})
+        for i, operation in enumerate(operations):
+            ticket_id, changes, error = BulkTicketService._validate(operation)
+            if error is None and ticket_id in requested:
+                error = 'Duplicate ticket_id in request'
+            if error is not None:
+                results[i] = {'ticket_id': ticket_id, 'success': False, 'error': error}
+            else:
+                requested[ticket_id] = (i, changes)
+
+        # Current state of every referenced ticket, locked for the transaction
+        current = {
+            row.id: row for row in db.session.query(
+                Ticket.id, Ticket.status, Ticket.assigned_to_id, Ticket.priority
+            ).filter(Ticket.id.in_(requested)).order_by(Ticket.id).with_for_update().all()
+        } if requested else {}
+
+        agent_ids = {changes['assigned_to_id'] for _, changes in requested.values()
+                     if changes.get('assigned_to_id') is not None}
+        valid_agents = {
+            user_id for (user_id,) in db.session.query(User.id).filter(
+                User.id.in_(agent_ids),
+                User.is_active == True
+            )
+        } if agent_ids else set()
+
+        groups = defaultdict(list)  # frozen changes -> ticket ids
+        previous = {}  # ticket_id -> state row before the update
+        for ticket_id, (i, changes) in requested.items():
+            row = current.get(ticket_id)
+            if row is None:
+                results[i] = {'ticket_id': ticket_id, 'success': False, 'error': 'Ticket not found'}
+                continue
+            assignee = changes.get('assigned_to_id')
+            if assignee is not None and assignee not in valid_agents:
+                results[i] = {'ticket_id': ticket_id, 'success': False, 'error': f'User {assignee} not found or inactive'}
+                continue
+
+            effective = {field: value for field, value in changes.items() if getattr(row, field) != value}
+            results[i] = {'ticket_id': ticket_id, 'success': True, 'changed': sorted(effective)}
+            if effective:
+                groups[frozenset(effective.items())].append(ticket_id)
+                previous[ticket_id] = row
+
+        if not previous:
+            return results, []
+
+        now = datetime.utcnow()
+        for frozen_changes, ticket_ids in groups.items():
+            db.session.execute(
+                update(Ticket).where(Ticket.id.in_(ticket_ids)).values(updated_at=now, **dict(frozen_changes)),
+                execution_options={'synchronize_session': False}
+            )
+        mark_tickets_changed(db.session)
+
+        # Reload changed tickets once (with assignee) for index deltas, webhooks and events
+        tickets = Ticket.query.options(*Ticket.eager_options(('assigned_to',))).filter(
+            Ticket.id.in_(previous)
+        ).populate_existing().all()
+
+        freed_slots = Counter()
+        for ticket in tickets:
+            old = previous[ticket.id]
+            agent_index.record_change(db.session, old.assigned_to_id, old.status, ticket.assigned_to_id, ticket.status)
+            new_values = counter_values(ticket)
+            ticket_counters.record_change(db.session, {**new_values, **old._asdict()}, new_values)
+
+            if ticket.status != old.status:
+                ticket_events.record('ticket_status_changed', ticket, previous_status=old.status)
+                if old.status != 'cerrado' and ticket.status == 'cerrado':
+                    N8nService.trigger_close_ticket_workflow(ticket)
+                    if old.assigned_to_id:
+                        freed_slots[old.assigned_to_id] += 1
+            if ticket.assigned_to_id != old.assigned_to_id:
+                ticket_events.record('ticket_assigned', ticket, previous_assigned_to_id=old.assigned_to_id)
+                if ticket.assigned_to_id and ticket.status in Ticket.ACTIVE_STATUSES:
+                    N8nService.trigger_agent_assignment_workflow(ticket)
+            if ticket.priority != old.priority:
+                ticket_events.record('ticket_updated', ticket)
+
+        # Refill agents whose tickets were closed, same as the single-ticket close
+        assigned = AutoAssignService.assign_backlog_to_agents(freed_slots)
+        for ticket in assigned:
+            ticket_events.record('ticket_assigned', ticket)
+            N8nService.trigger_update_ticket_workflow(
+                ticket,
+                f"Tu ticket ha sido asignado automáticamente a {ticket.assigned_user.full_name} quien estará trabajando en tu solicitud."
+            )
+            N8nService.trigger_agent_assignment_workflow(ticket)
+
+        return results, assigned
+
+    @staticmethod
+    def _validate(operation):
+        """Returns: (ticket_id, {field: value}, error message or None)"""
+        if not isinstance(operation, dict):
+            return None, None, 'Operation must be an object'
+
+        ticket_id = operation.get('ticket_id')
+        if not isinstance(ticket_id, int) or isinstance(ticket_id, bool):
+            return ticket_id, None, 'ticket_id must be an integer'
+
+        changes = {field: operation[field] for field in BULK_FIELDS if field in operation}
+        unknown = set(operation) - set(BULK_FIELDS) - {'ticket_id'}
+        if unknown:
+            return ticket_id, None, f"Unknown fields: {', '.join(sorted(unknown))}"
+        if not changes:
+            return ticket_id, None, f"One of {', '.join(BULK_FIELDS)} is required"
+        if 'status' in changes and changes['status'] not in STATUS_VALUES:
+            return ticket_id, None, f"Invalid status '{changes['status']}'"
+        if 'priority' in changes and changes['priority'] not in PRIORITY_VALUES:
+            return ticket_id, None, f"Invalid priority '{changes['priority']}'"
+        assignee = changes.get('assigned_to_id')
+        if assignee is not None and (not isinstance(assignee, int) or isinstance(assignee, bool)):
+            return ticket_id, None, 'assigned_to_id must be an integer or null'
+
+        return ticket_id, changes, None
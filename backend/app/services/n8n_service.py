@@ -1,192 +1,91 @@
-import requests
 import logging
+import time
 from flask import current_app
+from app import db
+from app.models.outbox_event import OutboxEvent
+from app.services.http_client import PooledHttpClient
+from app.services.request_metrics import request_metrics
+from app.services.webhook_payloads import build_payload, encode_payload
 
 logger = logging.getLogger(__name__)
 
 class N8nService:
-    @staticmethod
-    def trigger_new_ticket_workflow(ticket_data):
-        """Trigger n8n workflow for new ticket creation"""
-        try:
-            webhook_url = current_app.config['N8N_WEBHOOK_NEW_TICKET']
-            # Send data in snake_case as n8n expects
-            payload = {
-                # snake_case (original)
-                'ticket_id': ticket_data['id'],
-                'client_name': ticket_data['client_name'],
-                'client_email': ticket_data['client_email'],
-                'client_phone': ticket_data.get('client_phone'),
-                'subject': ticket_data['subject'],
-                'description': ticket_data['description'],
-                'priority': ticket_data['priority'],
-                'department': ticket_data.get('department'),
-                'category': ticket_data.get('category'),
-                # camelCase aliases (workflow compatibility)
-                'ticketId': ticket_data['id'],
-                'clientName': ticket_data['client_name'],
-                'clientEmail': ticket_data['client_email'],
-                'clientPhone': ticket_data.get('client_phone'),
-                'department': ticket_data.get('department'),
-                'category': ticket_data.get('category'),
-                'priority': ticket_data['priority'],
-                'subject': ticket_data['subject'],
-                'description': ticket_data['description']
-            }
-
-            logger.info(f"Sending payload to n8n: {payload}")
-            response = requests.post(webhook_url, json=payload, timeout=10)
-            response.raise_for_status()
-            logger.info(f"New ticket workflow triggered for ticket {ticket_data['id']}")
-            return True
-
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Failed to trigger new ticket workflow: {str(e)}")
-            return False
+    """
+    Builds n8n webhook payloads and queues them in the webhook outbox
+    Calls must happen before the surrounding db.session.commit() so the event
+    is persisted atomically with the ticket change; OutboxDispatcher delivers it
+    """
 
     @staticmethod
-    def trigger_update_ticket_workflow(ticket_data, comment_text):
-        """Trigger n8n workflow for ticket update"""
+    def _enqueue(event_type, config_key, ticket, comment_text=None):
+        """Build, encode and add a webhook delivery to the current transaction"""
         try:
-            webhook_url = current_app.config['N8N_WEBHOOK_UPDATE_TICKET']
-
-            # Get agent info if assigned
-            agent_name = None
-            agent_email = None
-            if ticket_data.get('assigned_to'):
-                agent_name = ticket_data['assigned_to'].get('full_name')
-                agent_email = ticket_data['assigned_to'].get('email')
+            webhook_url = current_app.config[config_key]
+            camel_case = event_type in current_app.config['N8N_CAMELCASE_WEBHOOKS']
+            payload = build_payload(event_type, ticket, comment_text, camel_case)
+        except (KeyError, AttributeError) as e:
+            logger.error(f"Failed to queue {event_type} workflow: {str(e)}")
+            return False
 
-            # Send data in snake_case as n8n expects
-            payload = {
-                # snake_case (original)
-                'ticket_id': ticket_data['id'],
-                'client_name': ticket_data['client_name'],
-                'client_email': ticket_data['client_email'],
-                'client_phone': ticket_data.get('client_phone'),
-                'subject': ticket_data['subject'],
-                'comment_text': comment_text,
-                'agent_name': agent_name,
-                'agent_email': agent_email,
-                'department': ticket_data.get('department'),
-                'category': ticket_data.get('category'),
-                # camelCase aliases (workflow compatibility)
-                'ticketId': ticket_data['id'],
-                'clientName': ticket_data['client_name'],
-                'clientEmail': ticket_data['client_email'],
-                'clientPhone': ticket_data.get('client_phone'),
-                'subject': ticket_data['subject'],
-                'commentText': comment_text,
-                'agentName': agent_name,
-                'agentEmail': agent_email,
-                'department': ticket_data.get('department'),
-                'category': ticket_data.get('category')
-            }
+        event = OutboxEvent(
+            event_type=event_type,
+            ticket_id=ticket.id,
+            webhook_url=webhook_url,
+            payload=encode_payload(payload)
+        )
+        db.session.add(event)
+        db.session.info['outbox_pending'] = True
+        logger.info(f"Queued {event_type} webhook for ticket {ticket.id}")
+        logger.debug(f"Webhook payload: {event.payload}")
+        return True
 
-            logger.info(f"Sending payload to n8n: {payload}")
-            response = requests.post(webhook_url, json=payload, timeout=10)
-            response.raise_for_status()
-            logger.info(f"Update ticket workflow triggered for ticket {ticket_data['id']}")
-            return True
+    @staticmethod
+    def http_client():
+        """Per-app pooled keep-alive HTTP client used for every webhook"""
+        client = current_app.extensions.get('n8n_http_client')
+        if client is None:
+            client = PooledHttpClient.from_config(current_app.config)
+            current_app.extensions['n8n_http_client'] = client
+        return client
 
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Failed to trigger update ticket workflow: {str(e)}")
-            return False
+    @staticmethod
+    def connection_stats():
+        """Connections created vs reused by this process's webhook session"""
+        return N8nService.http_client().stats()
 
     @staticmethod
-    def trigger_close_ticket_workflow(ticket_data):
-        """Trigger n8n workflow for ticket closure"""
+    def deliver(webhook_url, body):
+        """POST an already-encoded JSON body to n8n; raises RequestException on failure"""
+        started = time.perf_counter()
+        success = False
         try:
-            webhook_url = current_app.config['N8N_WEBHOOK_CLOSE_TICKET']
-
-            # Get agent info if assigned
-            agent_name = None
-            agent_email = None
-            if ticket_data.get('assigned_to'):
-                agent_name = ticket_data['assigned_to'].get('full_name')
-                agent_email = ticket_data['assigned_to'].get('email')
-
-            # Send data in snake_case as n8n expects
-            payload = {
-                # snake_case (original)
-                'ticket_id': ticket_data['id'],
-                'client_name': ticket_data['client_name'],
-                'client_email': ticket_data['client_email'],
-                'client_phone': ticket_data.get('client_phone'),
-                'subject': ticket_data['subject'],
-                'agent_name': agent_name,
-                'agent_email': agent_email,
-                'department': ticket_data.get('department'),
-                'category': ticket_data.get('category'),
-                # camelCase aliases (workflow compatibility)
-                'ticketId': ticket_data['id'],
-                'clientName': ticket_data['client_name'],
-                'clientEmail': ticket_data['client_email'],
-                'clientPhone': ticket_data.get('client_phone'),
-                'subject': ticket_data['subject'],
-                'agentName': agent_name,
-                'agentEmail': agent_email,
-                'department': ticket_data.get('department'),
-                'category': ticket_data.get('category')
-            }
-
-            logger.info(f"Sending payload to n8n: {payload}")
-            response = requests.post(webhook_url, json=payload, timeout=10)
+            response = N8nService.http_client().post(
+                webhook_url,
+                data=body,
+                headers={'Content-Type': 'application/json'}
+            )
             response.raise_for_status()
-            logger.info(f"Close ticket workflow triggered for ticket {ticket_data['id']}")
-            return True
-
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Failed to trigger close ticket workflow: {str(e)}")
-            return False
+            success = True
+            return response
+        finally:
+            request_metrics.observe_n8n_call(time.perf_counter() - started, success)
 
     @staticmethod
-    def trigger_agent_assignment_workflow(ticket_data):
-        """Trigger n8n workflow to notify agent about new assignment"""
-        try:
-            webhook_url = current_app.config['N8N_WEBHOOK_AGENT_ASSIGNMENT']
-
-            # Get agent info
-            agent_name = None
-            agent_email = None
-            if ticket_data.get('assigned_to'):
-                agent_name = ticket_data['assigned_to'].get('full_name')
-                agent_email = ticket_data['assigned_to'].get('email')
+    def trigger_new_ticket_workflow(ticket):
+        """Trigger n8n workflow for new ticket creation"""
+        return N8nService._enqueue('new_ticket', 'N8N_WEBHOOK_NEW_TICKET', ticket)
 
-            # Send data in snake_case as n8n expects
-            payload = {
-                # snake_case (original)
-                'ticket_id': ticket_data['id'],
-                'client_name': ticket_data['client_name'],
-                'client_email': ticket_data['client_email'],
-                'client_phone': ticket_data.get('client_phone'),
-                'subject': ticket_data['subject'],
-                'description': ticket_data['description'],
-                'priority': ticket_data['priority'],
-                'category': ticket_data.get('category'),
-                'department': ticket_data.get('department'),
-                'agent_name': agent_name,
-                'agent_email': agent_email,
-                # camelCase aliases (workflow compatibility)
-                'ticketId': ticket_data['id'],
-                'clientName': ticket_data['client_name'],
-                'clientEmail': ticket_data['client_email'],
-                'clientPhone': ticket_data.get('client_phone'),
-                'subject': ticket_data['subject'],
-                'description': ticket_data['description'],
-                'priority': ticket_data['priority'],
-                'category': ticket_data.get('category'),
-                'department': ticket_data.get('department'),
-                'agentName': agent_name,
-                'agentEmail': agent_email
-            }
+    @staticmethod
+    def trigger_update_ticket_workflow(ticket, comment_text):
+        """Trigger n8n workflow for ticket update"""
+        return N8nService._enqueue('update_ticket', 'N8N_WEBHOOK_UPDATE_TICKET', ticket, comment_text)
 
-            logger.info(f"Sending agent assignment notification to n8n: {payload}")
-            response = requests.post(webhook_url, json=payload, timeout=10)
-            response.raise_for_status()
-            logger.info(f"Agent assignment workflow triggered for ticket {ticket_data['id']} to {agent_name}")
-            return True
+    @staticmethod
+    def trigger_close_ticket_workflow(ticket):
+        """Trigger n8n workflow for ticket closure"""
+        return N8nService._enqueue('close_ticket', 'N8N_WEBHOOK_CLOSE_TICKET', ticket)
 
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Failed to trigger agent assignment workflow: {str(e)}")
-            return False
\ No newline at end of file
+    @staticmethod
+    def trigger_agent_assignment_workflow(ticket):
+        """Trigger n8n workflow to notify agent about new assignment"""
+        return N8nService._enqueue('agent_assignment', 'N8N_WEBHOOK_AGENT_ASSIGNMENT', ticket)
@@ -0,0 +1,227 @@
+"""
+Background delivery of queued n8n webhooks
+Events are claimed from the webhook_outbox table with a short lease, POSTed to
+n8n and marked sent; failures are retried with exponential backoff.
+Sent events are deleted after N8N_OUTBOX_RETENTION_DAYS
+"""
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import and_, delete, event, exists, select
+from sqlalchemy.orm import Session, aliased
+import requests
+from app import db
+from app.models.outbox_event import OutboxEvent
+from app.services.n8n_service import N8nService
+from app.services.webhook_coalescer import WebhookCoalescer
+
+logger = logging.getLogger(__name__)
+
+
+class OutboxDispatcher:
+
+    def __init__(self, app=None):
+        self.app = None
+        self.coalescer = WebhookCoalescer()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._next_purge = 0.0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Start the dispatcher thread lazily on the first request of each worker process"""
+        self.configure(app)
+
+        @app.before_request
+        def _ensure_outbox_dispatcher():
+            self.start()
+
+    def configure(self, app):
+        self.app = app
+        self.coalescer = WebhookCoalescer.from_config(app.config)
+        app.extensions['outbox_dispatcher'] = self
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self.run_forever, name='outbox-dispatcher', daemon=True)
+            self._thread.start()
+
+    def wake(self):
+        self._wakeup.set()
+
+    def stop(self, timeout=5):
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def run_forever(self):
+        """Poll the outbox until stop() is called"""
+        poll_interval = self.app.config['N8N_OUTBOX_POLL_INTERVAL']
+        with self.app.app_context():
+            while not self._stopping.is_set():
+                try:
+                    processed = self.dispatch_once()
+                    if not processed and time.monotonic() >= self._next_purge:
+                        self._next_purge = time.monotonic() + self.app.config['N8N_OUTBOX_PURGE_INTERVAL']
+                        self.purge_sent()
+                except Exception as e:
+                    db.session.rollback()
+                    logger.error(f"Outbox dispatch failed: {str(e)}")
+                    processed = 0
+                finally:
+                    db.session.remove()
+
+                # Drain immediately while there is backlog, otherwise wait for a commit or the poll tick
+                if not processed:
+                    self._wakeup.wait(poll_interval)
+                    self._wakeup.clear()
+
+    def dispatch_once(self):
+        """
+        Deliver one batch of due events (coalesced per webhook URL when enabled)
+        Returns: number of events processed
+        """
+        config = self.app.config
+        events = self._claim_batch(config['N8N_OUTBOX_BATCH_SIZE'], config['N8N_OUTBOX_LEASE_SECONDS'])
+
+        # (ticket_id, webhook_url) pairs that failed this round; later events for them must wait
+        blocked = set()
+        for webhook_url, group in self.coalescer.group(events):
+            keys = {(outbox_event.ticket_id, webhook_url) for outbox_event in group}
+            if keys & blocked:
+                for outbox_event in group:
+                    self._release(outbox_event)
+                continue
+
+            try:
+                N8nService.deliver(webhook_url, self.coalescer.encode(group))
+            except requests.exceptions.RequestException as e:
+                for outbox_event in group:
+                    self._record_failure(outbox_event, str(e))
+                blocked |= keys
+                continue
+
+            sent_at = datetime.utcnow()
+            for outbox_event in group:
+                outbox_event.status = 'sent'
+                outbox_event.sent_at = sent_at
+                outbox_event.last_error = None
+            logger.info(f"Delivered {len(group)} webhook event(s) to {webhook_url}")
+
+        if events:
+            db.session.commit()
+        return len(events)
+
+    def _claim_batch(self, batch_size, lease_seconds):
+        """
+        Lock due events and push their next_attempt_at past the lease window so
+        other workers skip them while this one delivers (SKIP LOCKED on PostgreSQL)
+        Events queued behind an earlier, not-yet-delivered event for the same
+        ticket and webhook are left alone to keep per-ticket ordering
+        """
+        now = datetime.utcnow()
+        earlier = aliased(OutboxEvent)
+        waiting_on_earlier = exists().where(and_(
+            earlier.status == 'pending',
+            earlier.ticket_id == OutboxEvent.ticket_id,
+            earlier.webhook_url == OutboxEvent.webhook_url,
+            earlier.id < OutboxEvent.id,
+            earlier.next_attempt_at > now
+        ))
+
+        query = OutboxEvent.query.filter(
+            OutboxEvent.status == 'pending',
+            OutboxEvent.next_attempt_at <= now,
+            ~waiting_on_earlier
+        )
+        if self.coalescer.enabled:
+            # Let bursts accumulate for the coalescing window before shipping them
+            query = query.filter(OutboxEvent.created_at <= now - timedelta(seconds=self.coalescer.window))
+
+        events = query.order_by(OutboxEvent.id.asc()).limit(batch_size).with_for_update(skip_locked=True).all()
+
+        lease_until = now + timedelta(seconds=lease_seconds)
+        for outbox_event in events:
+            outbox_event.attempts += 1
+            outbox_event.next_attempt_at = lease_until
+
+        # Keep the claimed rows loaded; otherwise every event is reloaded one by one on first access
+        session = db.session()
+        expire_on_commit, session.expire_on_commit = session.expire_on_commit, False
+        try:
+            session.commit()
+        finally:
+            session.expire_on_commit = expire_on_commit
+        return events
+
+    def purge_sent(self, retention_days=None, batch_size=1000):
+        """
+        Delete events delivered more than `retention_days` ago (default
+        N8N_OUTBOX_RETENTION_DAYS, 0 keeps them), one short transaction per batch
+        Failed events are kept for inspection
+        Returns: number of events deleted
+        """
+        if retention_days is None:
+            retention_days = self.app.config['N8N_OUTBOX_RETENTION_DAYS']
+        if retention_days <= 0:
+            return 0
+
+        cutoff = datetime.utcnow() - timedelta(days=retention_days)
+        deleted = 0
+        while True:
+            batch = select(OutboxEvent.id).where(
+                OutboxEvent.status == 'sent',
+                OutboxEvent.sent_at < cutoff
+            ).order_by(OutboxEvent.id).limit(batch_size).scalar_subquery()
+            count = db.session.execute(
+                delete(OutboxEvent).where(OutboxEvent.id.in_(batch)).execution_options(synchronize_session=False)
+            ).rowcount
+            db.session.commit()
+            deleted += count
+            if count < batch_size:
+                break
+
+        if deleted:
+            logger.info(f"Purged {deleted} sent webhook event(s) older than {retention_days} day(s)")
+        return deleted
+
+    def _release(self, outbox_event):
+        """Hand a claimed event back without counting the attempt"""
+        outbox_event.attempts -= 1
+        outbox_event.next_attempt_at = datetime.utcnow()
+
+    def _record_failure(self, outbox_event, error):
+        config = self.app.config
+        outbox_event.last_error = error
+        if outbox_event.attempts >= config['N8N_OUTBOX_MAX_ATTEMPTS']:
+            outbox_event.status = 'failed'
+            logger.error(f"Giving up on {outbox_event.event_type} webhook {outbox_event.id} after {outbox_event.attempts} attempts: {error}")
+            return
+
+        delay = min(
+            config['N8N_OUTBOX_BACKOFF_BASE'] * (2 ** (outbox_event.attempts - 1)),
+            config['N8N_OUTBOX_BACKOFF_MAX']
+        )
+        outbox_event.next_attempt_at = datetime.utcnow() + timedelta(seconds=delay)
+        logger.warning(f"Webhook {outbox_event.id} failed (attempt {outbox_event.attempts}), retrying in {delay}s: {error}")
+
+
+outbox_dispatcher = OutboxDispatcher()
+
+
+# Wake the dispatcher as soon as a transaction with queued events commits
+# (registered once here: Session is global, init_app runs per app)
+@event.listens_for(Session, 'after_commit')
+def _notify_outbox(session):
+    if session.info.pop('outbox_pending', False):
+        outbox_dispatcher.wake()
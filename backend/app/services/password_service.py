@@ -0,0 +1,141 @@
+"""
+Password hashing backend
+Hashes are computed in a small per-process pool so a login storm cannot pin
+every web worker's CPU; a semaphore bounds the number of hashes in flight
+and callers get PasswordHashingBusy instead of queueing indefinitely
+Pool workers are started by a fork server (spawn where unavailable), so they
+never inherit the web worker's threads, locks or database connections; like
+any spawned process they import the main module, so scripts that hash
+passwords need the usual `if __name__ == '__main__':` guard. If the pool breaks
+anyway (e.g. its workers cannot start), the process falls back to hashing inline
+"""
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from flask import current_app
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+
+logger = logging.getLogger(__name__)
+
+
+class PasswordHashingBusy(Exception):
+    """Raised when too many hash operations are already pending"""
+    pass
+
+
+class PasswordService:
+
+    _pool = None
+    _pool_pid = None
+    _pool_broken_pid = None
+    _pool_lock = threading.Lock()
+    _slots = None
+    _slots_size = None
+
+    @staticmethod
+    def method():
+        """Configured werkzeug method, e.g. 'scrypt:32768:8:1' or 'pbkdf2:sha256:600000'"""
+        return current_app.config['PASSWORD_HASH_METHOD']
+
+    @classmethod
+    def hash(cls, password):
+        return cls._run(generate_password_hash, password, _normalized_method(cls.method()))
+
+    @classmethod
+    def verify(cls, password_hash, password):
+        return cls._run(check_password_hash, password_hash, password)
+
+    @classmethod
+    def needs_rehash(cls, password_hash):
+        """True when the stored hash was made with a different method or work factor"""
+        return password_hash.split('$', 1)[0] != _normalized_method(cls.method())
+
+    @classmethod
+    def _run(cls, func, *args):
+        config = current_app.config
+        slots = cls._get_slots(config['PASSWORD_HASH_MAX_PENDING'])
+        if not slots.acquire(timeout=config['PASSWORD_HASH_QUEUE_TIMEOUT']):
+            raise PasswordHashingBusy('Too many password operations in progress')
+
+        workers = config['PASSWORD_HASH_WORKERS']
+        if workers <= 0 or cls._pool_broken_pid == os.getpid():
+            try:
+                return func(*args)
+            finally:
+                slots.release()
+
+        try:
+            future = cls._get_pool(workers).submit(func, *args)
+        except BrokenProcessPool:
+            slots.release()
+            return cls._run_after_pool_failure(func, *args)
+        except Exception:
+            slots.release()
+            raise
+        # The slot stays taken until the hash really finishes (or is cancelled), so
+        # timed-out work still counts against PASSWORD_HASH_MAX_PENDING
+        future.add_done_callback(lambda _: slots.release())
+        try:
+            return future.result(timeout=config['PASSWORD_HASH_TIMEOUT'])
+        except FutureTimeoutError:
+            future.cancel()
+            raise PasswordHashingBusy('Password hashing timed out')
+        except BrokenProcessPool:
+            return cls._run_after_pool_failure(func, *args)
+
+    @classmethod
+    def _run_after_pool_failure(cls, func, *args):
+        """Stop using the pool in this process and hash inline from now on"""
+        with cls._pool_lock:
+            if cls._pool_broken_pid != os.getpid():
+                logger.error('Password hash pool is broken (missing main-module guard?); hashing inline in this process')
+                cls._pool_broken_pid = os.getpid()
+                if cls._pool is not None and cls._pool_pid == os.getpid():
+                    cls._pool.shutdown(wait=False, cancel_futures=True)
+                cls._pool = None
+        return func(*args)
+
+    @classmethod
+    def _get_slots(cls, size):
+        if cls._slots is None or cls._slots_size != size:
+            with cls._pool_lock:
+                if cls._slots is None or cls._slots_size != size:
+                    cls._slots = threading.BoundedSemaphore(size)
+                    cls._slots_size = size
+        return cls._slots
+
+    @classmethod
+    def _get_pool(cls, workers):
+        """One pool per process, created lazily after gunicorn forks"""
+        if cls._pool is None or cls._pool_pid != os.getpid():
+            with cls._pool_lock:
+                if cls._pool is None or cls._pool_pid != os.getpid():
+                    # Children only run werkzeug hash functions, never the app or its DB connections
+                    cls._pool = ProcessPoolExecutor(max_workers=workers, mp_context=_pool_context())
+                    cls._pool_pid = os.getpid()
+        return cls._pool
+
+
+def _pool_context():
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+
+
+# werkzeug's n, r, p for a bare 'scrypt'
+_SCRYPT_DEFAULTS = ('32768', '8', '1')
+
+
+def _normalized_method(method):
+    """
+    The method prefix werkzeug stores for `method`, with its defaults filled in,
+    e.g. 'pbkdf2:sha256' -> 'pbkdf2:sha256:1000000', 'scrypt:16384' -> 'scrypt:16384:8:1'
+    """
+    name, *args = method.split(':')
+    if name == 'scrypt' and len(args) < 3:
+        return ':'.join(['scrypt', *args, *_SCRYPT_DEFAULTS[len(args):]])
+    if name == 'pbkdf2' and len(args) < 2:
+        return f"pbkdf2:{args[0] if args else 'sha256'}:{DEFAULT_PBKDF2_ITERATIONS}"
+    return method
@@ -0,0 +1,214 @@
+"""
+Pluggable publish/subscribe used to fan ticket events out to SSE clients and
+to signal other worker processes (agent index deltas, user cache invalidation)
+- InProcessPubSub: subscribers in this process only (tests, single worker)
+- RedisPubSub: publishes to a Redis channel; one listener thread per worker
+  process relays messages to that process's local subscribers and listeners
+"""
+import json
+import logging
+import os
+import queue
+import socket
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    """Bounded queue of messages for one client"""
+
+    def __init__(self, pubsub, maxsize):
+        self._pubsub = pubsub
+        self._queue = queue.Queue(maxsize=maxsize)
+        self.closed = False
+
+    def get(self, timeout=None):
+        """Next message, or None on timeout / once closed"""
+        if self.closed:
+            return None
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def put(self, message):
+        """Returns False when the client is too slow to keep up"""
+        try:
+            self._queue.put_nowait(message)
+            return True
+        except queue.Full:
+            return False
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self._pubsub.unsubscribe(self)
+
+
+class InProcessPubSub:
+
+    def __init__(self, queue_size=100):
+        self.queue_size = queue_size
+        self._subscribers = set()
+        self._callbacks = []
+        self._lock = threading.Lock()
+
+    def add_listener(self, callback):
+        """Call callback(message) for every message, on the delivering thread"""
+        self._callbacks.append(callback)
+        self.start()
+
+    def start(self):
+        """Start delivering messages (nothing to start in-process)"""
+        pass
+
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+    def subscribe(self):
+        subscription = Subscription(self, self.queue_size)
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def publish(self, message):
+        self._fan_out(message)
+
+    def _fan_out(self, message):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            if not subscription.put(message):
+                # Drop clients that fall behind; EventSource reconnects on its own
+                logger.warning("Dropping slow event stream subscriber")
+                subscription.close()
+        for callback in self._callbacks:
+            try:
+                callback(message)
+            except Exception as e:
+                logger.error(f"Pub/sub listener failed: {str(e)}")
+
+
+class RedisPubSub(InProcessPubSub):
+
+    def __init__(self, client, channel, queue_size=100, reconnect_delay=1.0):
+        super().__init__(queue_size)
+        self.client = client
+        self.channel = channel
+        self.reconnect_delay = reconnect_delay
+        self._listener = None
+        self._listener_lock = threading.Lock()
+        self._stopping = threading.Event()
+
+    def subscribe(self):
+        self.start()
+        return super().subscribe()
+
+    def publish(self, message):
+        try:
+            self.client.publish(self.channel, message)
+        except Exception as e:
+            # Keep local clients informed even if Redis is briefly unavailable
+            logger.error(f"Redis publish failed, delivering locally only: {str(e)}")
+            self._fan_out(message)
+
+    def stop(self):
+        self._stopping.set()
+
+    def start(self):
+        """Start (or restart, e.g. after a fork) this process's listener thread"""
+        if self._listener is not None and self._listener.is_alive():
+            return
+        with self._listener_lock:
+            if self._listener is not None and self._listener.is_alive():
+                return
+            self._stopping.clear()
+            self._listener = threading.Thread(target=self._listen, name=f'pubsub-listener:{self.channel}', daemon=True)
+            self._listener.start()
+
+    def _listen(self):
+        while not self._stopping.is_set():
+            pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+            try:
+                pubsub.subscribe(self.channel)
+                while not self._stopping.is_set():
+                    item = pubsub.get_message(timeout=1.0)
+                    if item is None:
+                        continue
+                    data = item['data']
+                    self._fan_out(data.decode('utf-8') if isinstance(data, bytes) else data)
+            except Exception as e:
+                logger.error(f"Redis event listener error: {str(e)}")
+                self._stopping.wait(self.reconnect_delay)
+            finally:
+                try:
+                    pubsub.close()
+                except Exception:
+                    pass
+
+
+def create_pubsub(config, redis_client=None):
+    """
+    Build the backend selected by EVENT_STREAM_BACKEND
+    'auto' uses Redis when a client is available, otherwise in-process
+    """
+    backend = config['EVENT_STREAM_BACKEND']
+    queue_size = config['EVENT_STREAM_QUEUE_SIZE']
+
+    if backend == 'redis' or (backend == 'auto' and redis_client is not None):
+        if redis_client is None:
+            raise ValueError('EVENT_STREAM_BACKEND=redis requires REDIS_URL')
+        return RedisPubSub(redis_client, config['EVENT_STREAM_CHANNEL'], queue_size)
+    if backend in ('auto', 'memory'):
+        return InProcessPubSub(queue_size)
+    raise ValueError(f"Unknown EVENT_STREAM_BACKEND '{backend}'")
+
+
+class WorkerSignals:
+    """
+    JSON messages to the other worker processes over a Redis channel
+    Messages from this process are filtered out (it already applied them);
+    without Redis, send() is a no-op and workers rely on their TTLs
+    """
+
+    def __init__(self, redis_client, channel):
+        self.pubsub = RedisPubSub(redis_client, channel) if redis_client is not None else None
+
+    @property
+    def enabled(self):
+        return self.pubsub is not None
+
+    def listen(self, callback):
+        """Call callback(payload dict) for messages sent by other processes"""
+        if self.pubsub is None:
+            return
+
+        def _deliver(message):
+            data = json.loads(message)
+            if data.get('origin') != _origin():
+                callback(data['payload'])
+
+        self.pubsub.add_listener(_deliver)
+
+    def start(self):
+        """Restart the listener if needed (call lazily, e.g. before each request)"""
+        if self.pubsub is not None:
+            self.pubsub.start()
+
+    def send(self, payload):
+        if self.pubsub is None:
+            return
+        try:
+            self.pubsub.publish(json.dumps({'origin': _origin(), 'payload': payload}, separators=(',', ':')))
+        except Exception as e:
+            logger.error(f"Failed to signal other workers on {self.pubsub.channel}: {str(e)}")
+
+
+def _origin():
+    # Evaluated per call so forked workers never share it
+    return f'{socket.gethostname()}:{os.getpid()}'
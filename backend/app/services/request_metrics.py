@@ -0,0 +1,162 @@
+"""
+Opt-in per-request instrumentation (METRICS_ENABLED)
+Records wall time, SQL statement count/time (SQLAlchemy engine events) and
+outbound n8n call time for every request, returns them in a Server-Timing
+header and exposes per-route Prometheus histograms at /api/metrics, along
+with connection pool checkout wait / usage
+
+Under gunicorn, set PROMETHEUS_MULTIPROC_DIR to an empty writable directory
+so /api/metrics aggregates every worker instead of whichever one answers
+"""
+import logging
+import os
+import time
+from flask import Response, g, has_request_context, jsonify, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.utils.db_pool import pool_stats
+
+try:
+    from prometheus_client import (
+        CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, generate_latest, multiprocess
+    )
+except ImportError:  # pragma: no cover - metrics are optional
+    Histogram = None
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+
+
+class RequestMetrics:
+
+    def __init__(self):
+        self.enabled = False
+        self._metrics = None
+
+    def init_app(self, app):
+        if not app.config['METRICS_ENABLED']:
+            return
+        if Histogram is None:
+            logger.warning("METRICS_ENABLED is set but prometheus_client is not installed; metrics disabled")
+            return
+
+        self.enabled = True
+        self._auth_token = app.config.get('METRICS_AUTH_TOKEN')
+        if self._metrics is None:
+            self._metrics = self._create_histograms()
+            self._register_sql_listeners()
+            pool_stats.listeners.append(self._on_pool_event)
+
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+        app.add_url_rule('/api/metrics', 'metrics', self._metrics_view, methods=['GET'])
+
+    def _create_histograms(self):
+        return {
+            'request': Histogram(
+                'http_request_duration_seconds', 'Request wall time',
+                ['method', 'route', 'status'], buckets=LATENCY_BUCKETS
+            ),
+            'sql_statements': Histogram(
+                'http_request_sql_statements', 'SQL statements executed per request',
+                ['method', 'route'], buckets=STATEMENT_BUCKETS
+            ),
+            'sql_time': Histogram(
+                'http_request_sql_duration_seconds', 'Time spent in SQL per request',
+                ['method', 'route'], buckets=LATENCY_BUCKETS
+            ),
+            'n8n': Histogram(
+                'n8n_webhook_duration_seconds', 'Outbound n8n webhook call time',
+                ['outcome'], buckets=LATENCY_BUCKETS
+            ),
+            'pool_wait': Histogram(
+                'db_pool_checkout_wait_seconds', 'Time waiting for a pooled database connection',
+                buckets=LATENCY_BUCKETS
+            ),
+            'pool_timeouts': Counter(
+                'db_pool_checkout_timeouts', 'Checkouts that gave up after DB_POOL_TIMEOUT'
+            ),
+            'pool_checked_out': Gauge(
+                'db_pool_connections_checked_out', 'Database connections currently in use',
+                multiprocess_mode='livesum'
+            ),
+        }
+
+    def _register_sql_listeners(self):
+        # Global Engine events; statements outside a request (dispatcher thread) are ignored
+        @event.listens_for(Engine, 'before_cursor_execute')
+        def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            if has_request_context() and 'request_metrics' in g:
+                conn.info.setdefault('metrics_query_start', []).append(time.perf_counter())
+
+        @event.listens_for(Engine, 'after_cursor_execute')
+        def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            starts = conn.info.get('metrics_query_start')
+            if not starts or not has_request_context() or 'request_metrics' not in g:
+                return
+            stats = g.request_metrics
+            stats['sql_count'] += 1
+            stats['sql_time'] += time.perf_counter() - starts.pop()
+
+    def _on_pool_event(self, name, value):
+        if name == 'wait':
+            self._metrics['pool_wait'].observe(value)
+        elif name == 'timeout':
+            self._metrics['pool_timeouts'].inc()
+        elif name == 'checked_out':
+            self._metrics['pool_checked_out'].set(value)
+
+    # Request hooks
+
+    def _start_request(self):
+        g.request_metrics = {'start': time.perf_counter(), 'sql_count': 0, 'sql_time': 0.0,
+                             'n8n_count': 0, 'n8n_time': 0.0}
+
+    def _finish_request(self, response):
+        stats = g.pop('request_metrics', None)
+        if stats is None:
+            return response
+
+        total = time.perf_counter() - stats['start']
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        if route == '/api/metrics':
+            return response
+
+        self._metrics['request'].labels(request.method, route, str(response.status_code)).observe(total)
+        self._metrics['sql_statements'].labels(request.method, route).observe(stats['sql_count'])
+        self._metrics['sql_time'].labels(request.method, route).observe(stats['sql_time'])
+
+        timings = [
+            f'app;dur={total * 1000:.2f}',
+            f'db;dur={stats["sql_time"] * 1000:.2f};desc="{stats["sql_count"]} queries"',
+        ]
+        if stats['n8n_count']:
+            timings.append(f'n8n;dur={stats["n8n_time"] * 1000:.2f};desc="{stats["n8n_count"]} calls"')
+        response.headers.add('Server-Timing', ', '.join(timings))
+        return response
+
+    def observe_n8n_call(self, seconds, success):
+        """Record one outbound webhook call (from requests or the outbox dispatcher)"""
+        if not self.enabled:
+            return
+        self._metrics['n8n'].labels('success' if success else 'error').observe(seconds)
+        if has_request_context() and 'request_metrics' in g:
+            g.request_metrics['n8n_count'] += 1
+            g.request_metrics['n8n_time'] += seconds
+
+    # Exposition
+
+    def _metrics_view(self):
+        if self._auth_token and request.headers.get('Authorization') != f'Bearer {self._auth_token}':
+            return jsonify({'error': 'Invalid metrics token'}), 401
+
+        registry = REGISTRY
+        if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+        return Response(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
+
+
+request_metrics = RequestMetrics()
@@ -0,0 +1,173 @@
+"""
+Conditional GET and server-side response caching for ticket reads
+- Every transaction that writes tickets or comments bumps the 'tickets'
+  version, which versions the collection ETag and the cache keys (so a write
+  invalidates every cached list at once). CACHE_VERSION_BACKEND picks where it
+  lives: 'database' (a CacheVersion row bumped inside the writing transaction)
+  or 'redis' (INCR right after the commit, so writers don't queue on that row)
+- Single tickets use an ETag / Last-Modified derived from Ticket.updated_at
+- Response bodies are kept in Redis for RESPONSE_CACHE_TTL seconds when
+  REDIS_URL is configured; otherwise only the 304 path is used
+"""
+import hashlib
+import logging
+from flask import request, current_app, Response
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.models.cache_version import CacheVersion
+from app.models.comment import Comment
+from app.models.ticket import Ticket
+from app.utils.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+TICKETS_VERSION = 'tickets'
+REDIS_VERSION_KEY = 'cache_version:{}'
+
+
+def init_app(app):
+    backend = app.config['CACHE_VERSION_BACKEND']
+    if backend not in ('database', 'redis'):
+        raise ValueError(f"Unknown CACHE_VERSION_BACKEND '{backend}'")
+    if backend == 'redis' and get_redis(app) is None:
+        raise ValueError('CACHE_VERSION_BACKEND=redis requires REDIS_URL')
+
+
+# The version hooks sit on the global Session class, so they are registered
+# at import time rather than in init_app (which runs for every app created)
+
+@event.listens_for(Session, 'before_flush')
+def _track_ticket_writes(session, flush_context, instances):
+    if _touches_tickets(session):
+        session.info['tickets_changed'] = True
+
+
+@event.listens_for(Session, 'before_commit')
+def _bump_tickets_version(session):
+    if session.info.pop('tickets_changed', False) or _touches_tickets(session):
+        if _versions_in_redis():
+            session.info['tickets_version_pending'] = True
+        else:
+            CacheVersion.bump(session, TICKETS_VERSION)
+
+
+@event.listens_for(Session, 'after_commit')
+def _bump_tickets_version_in_redis(session):
+    if session.info.pop('tickets_version_pending', False):
+        bump_tickets_version()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_ticket_writes(session):
+    session.info.pop('tickets_changed', None)
+    session.info.pop('tickets_version_pending', None)
+
+
+def mark_tickets_changed(session):
+    """Flag a write the ORM cannot see (bulk UPDATE) so the version is bumped on commit"""
+    session.info['tickets_changed'] = True
+
+
+def bump_tickets_version(connection=None):
+    """
+    Bump the version for a write already committed outside the ORM session
+    (`connection` is used, in its own transaction, by the database backend)
+    """
+    if _versions_in_redis():
+        try:
+            get_redis().incr(REDIS_VERSION_KEY.format(TICKETS_VERSION))
+        except Exception as e:
+            logger.error(f"Cache version bump failed, cached lists may be stale: {str(e)}")
+        return
+    with connection.begin():
+        CacheVersion.bump(connection, TICKETS_VERSION)
+
+
+def current_version():
+    """Current 'tickets' version, or None when it cannot be read (skip caching)"""
+    if not _versions_in_redis():
+        return CacheVersion.current(TICKETS_VERSION)
+    try:
+        value = get_redis().get(REDIS_VERSION_KEY.format(TICKETS_VERSION))
+    except Exception as e:
+        logger.warning(f"Cache version read failed: {str(e)}")
+        return None
+    return int(value) if value is not None else 0
+
+
+def _versions_in_redis():
+    return current_app.config['CACHE_VERSION_BACKEND'] == 'redis'
+
+
+def _touches_tickets(session):
+    for collection in (session.new, session.dirty, session.deleted):
+        for obj in collection:
+            if isinstance(obj, (Ticket, Comment)):
+                return True
+    return False
+
+
+def collection_etag():
+    """Weak ETag for the current request on the ticket collection (None if unversioned)"""
+    version = current_version()
+    if version is None:
+        return None
+    args = request.query_string.decode('utf-8')
+    digest = hashlib.sha1(f'{request.path}?{args}'.encode('utf-8')).hexdigest()[:16]
+    return f'{TICKETS_VERSION}-{version}-{digest}'
+
+
+def ticket_etag(ticket_id, updated_at):
+    stamp = updated_at.isoformat() if updated_at else '0'
+    return f'ticket-{ticket_id}-{stamp}'
+
+
+def conditional_response(etag, build, status=200, last_modified=None):
+    """
+    Return 304 if the client already has `etag`, a cached body if one exists,
+    otherwise call build() -> (body_str) and cache it
+    Without an etag the body is always built and nothing is cached
+    """
+    if etag is None:
+        response = Response(build(), status=status, mimetype='application/json')
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    else:
+        body = _cache_get(etag)
+        if body is None:
+            body = build()
+            _cache_set(etag, body)
+        response = Response(body, status=status, mimetype='application/json')
+
+    response.set_etag(etag, weak=True)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    # Let browsers keep the body but revalidate on every poll
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+def _cache_get(etag):
+    client = get_redis()
+    if client is None:
+        return None
+    try:
+        body = client.get(f'resp:{etag}')
+    except Exception as e:
+        logger.warning(f"Response cache read failed: {str(e)}")
+        return None
+    return body.decode('utf-8') if body is not None else None
+
+
+def _cache_set(etag, body):
+    client = get_redis()
+    ttl = current_app.config['RESPONSE_CACHE_TTL']
+    if client is None or ttl <= 0:
+        return
+    try:
+        client.set(f'resp:{etag}', body, ex=int(ttl))
+    except Exception as e:
+        logger.warning(f"Response cache write failed: {str(e)}")
@@ -0,0 +1,122 @@
+"""
+Full-text search over ticket subject/description and comment text
+- PostgreSQL: stored tsvector columns with GIN indexes (see
+  sql/20261018_add_ticket_search.sql), queried with websearch_to_tsquery
+- SQLite (development): FTS5 external-content tables kept in sync by triggers,
+  created on first use
+Both return a (ticket_id, rank) subquery, higher rank = better match; a ticket
+matching in several comments accumulates their ranks
+"""
+import re
+import threading
+from sqlalchemy import Float, Integer, func, select, text
+from app import db
+
+# Weight of a comment hit relative to a hit in the ticket itself
+COMMENT_RANK_WEIGHT = 0.5
+
+_POSTGRES_HITS = """
+SELECT t.id AS ticket_id, ts_rank_cd(t.search_vector, q.query) AS rank
+FROM tickets t, websearch_to_tsquery(CAST(:config AS regconfig), :q) AS q(query)
+WHERE t.search_vector @@ q.query
+UNION ALL
+SELECT c.ticket_id, ts_rank_cd(c.search_vector, q.query) * :comment_weight
+FROM comments c, websearch_to_tsquery(CAST(:config AS regconfig), :q) AS q(query)
+WHERE c.search_vector @@ q.query
+"""
+
+_SQLITE_HITS = """
+SELECT rowid AS ticket_id, -bm25(tickets_fts, 2.0, 1.0) AS rank
+FROM tickets_fts WHERE tickets_fts MATCH :q
+UNION ALL
+SELECT c.ticket_id, -bm25(comments_fts) * :comment_weight
+FROM comments_fts JOIN comments c ON c.id = comments_fts.rowid
+WHERE comments_fts MATCH :q
+"""
+
+# External-content FTS5 tables and the triggers that keep them in sync
+_SQLITE_SCHEMA = (
+    """CREATE VIRTUAL TABLE tickets_fts USING fts5(
+        subject, description, content='tickets', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2')""",
+    """CREATE VIRTUAL TABLE comments_fts USING fts5(
+        comment_text, content='comments', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2')""",
+    """CREATE TRIGGER tickets_fts_ai AFTER INSERT ON tickets BEGIN
+        INSERT INTO tickets_fts(rowid, subject, description) VALUES (new.id, new.subject, new.description);
+    END""",
+    """CREATE TRIGGER tickets_fts_ad AFTER DELETE ON tickets BEGIN
+        INSERT INTO tickets_fts(tickets_fts, rowid, subject, description) VALUES ('delete', old.id, old.subject, old.description);
+    END""",
+    """CREATE TRIGGER tickets_fts_au AFTER UPDATE OF subject, description ON tickets BEGIN
+        INSERT INTO tickets_fts(tickets_fts, rowid, subject, description) VALUES ('delete', old.id, old.subject, old.description);
+        INSERT INTO tickets_fts(rowid, subject, description) VALUES (new.id, new.subject, new.description);
+    END""",
+    """CREATE TRIGGER comments_fts_ai AFTER INSERT ON comments BEGIN
+        INSERT INTO comments_fts(rowid, comment_text) VALUES (new.id, new.comment_text);
+    END""",
+    """CREATE TRIGGER comments_fts_ad AFTER DELETE ON comments BEGIN
+        INSERT INTO comments_fts(comments_fts, rowid, comment_text) VALUES ('delete', old.id, old.comment_text);
+    END""",
+    """CREATE TRIGGER comments_fts_au AFTER UPDATE OF comment_text ON comments BEGIN
+        INSERT INTO comments_fts(comments_fts, rowid, comment_text) VALUES ('delete', old.id, old.comment_text);
+        INSERT INTO comments_fts(rowid, comment_text) VALUES (new.id, new.comment_text);
+    END""",
+    "INSERT INTO tickets_fts(tickets_fts) VALUES ('rebuild')",
+    "INSERT INTO comments_fts(comments_fts) VALUES ('rebuild')",
+)
+
+_sqlite_ready = set()  # engine urls whose FTS5 tables exist
+_sqlite_lock = threading.Lock()
+
+
+class SearchService:
+
+    @staticmethod
+    def prepare():
+        """Create the SQLite FTS5 index if needed; call before the request touches the session"""
+        engine = db.engine
+        if engine.dialect.name != 'sqlite' or str(engine.url) in _sqlite_ready:
+            return
+        with _sqlite_lock:
+            if str(engine.url) in _sqlite_ready:
+                return
+            with engine.begin() as connection:
+                exists = connection.execute(text(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'tickets_fts'"
+                )).first()
+                if not exists:
+                    for statement in _SQLITE_SCHEMA:
+                        connection.execute(text(statement))
+            _sqlite_ready.add(str(engine.url))
+
+    @staticmethod
+    def hits(query_text, config):
+        """
+        Subquery of (ticket_id, rank) for tickets whose text or comments match
+        Returns None when the query has no searchable terms
+        """
+        dialect = db.engine.dialect.name
+        if dialect == 'postgresql':
+            if not query_text.strip():
+                return None
+            raw = text(_POSTGRES_HITS).bindparams(q=query_text, config=config, comment_weight=COMMENT_RANK_WEIGHT)
+        else:
+            match = SearchService._fts5_query(query_text)
+            if match is None:
+                return None
+            raw = text(_SQLITE_HITS).bindparams(q=match, comment_weight=COMMENT_RANK_WEIGHT)
+
+        matches = raw.columns(ticket_id=Integer, rank=Float).subquery('search_matches')
+        return select(
+            matches.c.ticket_id,
+            func.sum(matches.c.rank).label('rank')
+        ).group_by(matches.c.ticket_id).subquery('search_hits')
+
+    @staticmethod
+    def _fts5_query(query_text):
+        """Quote every word so user input can't use FTS5 syntax; terms are ANDed"""
+        terms = re.findall(r'\w+', query_text, re.UNICODE)
+        if not terms:
+            return None
+        return ' '.join(f'"{term}"' for term in terms)
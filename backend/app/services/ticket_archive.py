@@ -0,0 +1,83 @@
+"""
+Archival of closed tickets
+Tickets closed (status 'cerrado') and untouched for ARCHIVE_CLOSED_AFTER_DAYS
+are moved with their comments into tickets_archive / comments_archive, one
+transaction per batch, so the hot tables and their indexes only hold live work
+- PostgreSQL: the archive tables are partitioned by month of archived_at; the
+  current month's partitions are created on demand, and old months can be
+  detached or dropped as a whole
+- Archived tickets keep their ids, still count in the summary counters and are
+  served read-only by GET /api/tickets/<id>; they leave the search index
+"""
+import logging
+from datetime import datetime, timedelta
+from sqlalchemy import DateTime, insert, literal, select, text
+from app import db
+from app.models.archive import ArchivedComment, ArchivedTicket
+from app.models.comment import Comment
+from app.models.ticket import Ticket
+from app.services.response_cache import mark_tickets_changed
+
+logger = logging.getLogger(__name__)
+
+
+def archive_closed_tickets(older_than_days, batch_size=500):
+    """
+    Move closed tickets last updated more than `older_than_days` ago
+    Returns: {'tickets': n, 'comments': n} moved
+    """
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    report = {'tickets': 0, 'comments': 0}
+
+    while True:
+        ticket_ids = [ticket_id for (ticket_id,) in db.session.query(Ticket.id).filter(
+            Ticket.status == 'cerrado',
+            Ticket.updated_at < cutoff
+        ).order_by(Ticket.id).limit(batch_size).with_for_update(skip_locked=True)]
+        if not ticket_ids:
+            db.session.rollback()
+            break
+
+        moved_comments = _move_batch(ticket_ids, datetime.utcnow())
+        db.session.commit()
+
+        report['tickets'] += len(ticket_ids)
+        report['comments'] += moved_comments
+        logger.info(f"Archived {len(ticket_ids)} ticket(s) and {moved_comments} comment(s)")
+
+    return report
+
+
+def _move_batch(ticket_ids, archived_at):
+    """Copy tickets and comments into the archive and delete the originals (caller commits)"""
+    if db.engine.dialect.name == 'postgresql':
+        _ensure_partitions(archived_at)
+
+    tickets = Ticket.__table__
+    comments = Comment.__table__
+    stamp = literal(archived_at, DateTime)
+
+    db.session.execute(insert(ArchivedTicket.__table__).from_select(
+        [*ArchivedTicket.COPIED_COLUMNS, 'archived_at'],
+        select(*[tickets.c[key] for key in ArchivedTicket.COPIED_COLUMNS], stamp).where(tickets.c.id.in_(ticket_ids))
+    ))
+    moved_comments = db.session.execute(insert(ArchivedComment.__table__).from_select(
+        [*ArchivedComment.COPIED_COLUMNS, 'archived_at'],
+        select(*[comments.c[key] for key in ArchivedComment.COPIED_COLUMNS], stamp).where(comments.c.ticket_id.in_(ticket_ids))
+    )).rowcount
+
+    db.session.execute(comments.delete().where(comments.c.ticket_id.in_(ticket_ids)))
+    db.session.execute(tickets.delete().where(tickets.c.id.in_(ticket_ids)))
+    mark_tickets_changed(db.session)
+    return moved_comments
+
+
+def _ensure_partitions(archived_at):
+    """Create this month's archive partitions if missing (PostgreSQL)"""
+    start = archived_at.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    end = (start + timedelta(days=32)).replace(day=1)
+    for table in (ArchivedTicket.__tablename__, ArchivedComment.__tablename__):
+        db.session.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {table}_{start:%Y_%m} PARTITION OF {table} "
+            f"FOR VALUES FROM ('{start:%Y-%m-%d}') TO ('{end:%Y-%m-%d}')"
+        ))
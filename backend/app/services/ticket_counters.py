@@ -0,0 +1,259 @@
+"""
+Materialized ticket counters for the dashboard summary (GET /api/tickets/summary)
+Ticket counts per status, priority, department and assignee live in the
+ticket_counters table. ORM changes are turned into per-counter deltas on flush
+and written with one upsert just before the transaction commits, so counters
+change atomically with the tickets; set-based writes (bulk updates, imports)
+report their changes through record_change(). Archiving moves tickets without
+touching the counters. reconcile() recounts from the tickets and archive
+tables and fixes any drift; run it as one scheduled job
+(`flask tickets reconcile-counters`), not from the web workers
+"""
+import logging
+from collections import Counter
+from sqlalchemy import event, func, select, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session, attributes
+from app import db
+from app.models.archive import ArchivedTicket
+from app.models.ticket import Ticket
+from app.models.ticket_counter import TicketCounter
+from app.services.response_cache import bump_tickets_version
+
+logger = logging.getLogger(__name__)
+
+# Counter dimension -> Ticket column
+DIMENSIONS = {
+    'status': 'status',
+    'priority': 'priority',
+    'department': 'department',
+    'assignee': 'assigned_to_id',
+}
+STATUS_VALUES = tuple(Ticket.__table__.c.status.type.enums)
+PRIORITY_VALUES = tuple(Ticket.__table__.c.priority.type.enums)
+
+# Stored value for NULL (no assignee / department)
+NONE_VALUE = ''
+
+# pg_try_advisory_lock key so only one reconciliation runs at a time
+RECONCILE_LOCK_KEY = 724301
+
+
+class TicketCounters:
+
+    def __init__(self):
+        self.app = None
+
+    def init_app(self, app):
+        self.app = app
+        app.extensions['ticket_counters'] = self
+
+    # Change tracking
+
+    def record_change(self, session, old, new):
+        """
+        Track one ticket moving between counters; old / new are mappings of
+        Ticket columns (None for an insert / delete). Used directly by
+        set-based writes, which bypass the ORM flush events
+        """
+        deltas = session.info.setdefault('ticket_counter_deltas', Counter())
+        for dimension, column in DIMENSIONS.items():
+            old_value = _counter_value(column, old[column]) if old is not None else None
+            new_value = _counter_value(column, new[column]) if new is not None else None
+            if old_value == new_value:
+                continue
+            if old is not None:
+                deltas[(dimension, old_value)] -= 1
+            if new is not None:
+                deltas[(dimension, new_value)] += 1
+
+    def _collect(self, session):
+        for obj in session.new:
+            if isinstance(obj, Ticket):
+                self.record_change(session, None, counter_values(obj))
+
+        for obj in session.dirty:
+            if isinstance(obj, Ticket):
+                old = {}
+                for column in DIMENSIONS.values():
+                    history = attributes.get_history(obj, column)
+                    if history.deleted:
+                        old[column] = history.deleted[0]
+                    elif history.added:
+                        old[column] = None  # never loaded, e.g. left NULL at INSERT
+                    else:
+                        old[column] = getattr(obj, column)
+                self.record_change(session, old, counter_values(obj))
+
+        for obj in session.deleted:
+            if isinstance(obj, Ticket):
+                self.record_change(session, counter_values(obj), None)
+
+    def _apply(self, executor, dialect, deltas):
+        """
+        Add the deltas (session or connection) with one upsert, in key order so
+        concurrent writers lock rows alike
+        """
+        rows = [
+            {'dimension': dimension, 'value': value, 'count': delta}
+            for (dimension, value), delta in sorted(deltas.items()) if delta
+        ]
+        if not rows:
+            return
+
+        table = TicketCounter.__table__
+        if dialect in ('postgresql', 'sqlite'):
+            insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+            statement = insert(table).values(rows)
+            statement = statement.on_conflict_do_update(
+                index_elements=[table.c.dimension, table.c.value],
+                set_={'count': table.c.count + statement.excluded.count}
+            )
+            executor.execute(statement)
+            return
+
+        for row in rows:
+            result = executor.execute(
+                table.update().where(
+                    table.c.dimension == row['dimension'], table.c.value == row['value']
+                ).values(count=table.c.count + row['count'])
+            )
+            if result.rowcount == 0:
+                executor.execute(table.insert().values(**row))
+
+    # Reads
+
+    def summary(self):
+        """Counts per dimension from the counters table (one small query)"""
+        counts = {
+            (dimension, value): count
+            for dimension, value, count in db.session.query(
+                TicketCounter.dimension, TicketCounter.value, TicketCounter.count
+            )
+        }
+        if not counts:
+            # Not backfilled yet (fresh database); `flask tickets reconcile-counters` fills the table
+            counts = self._count_tickets(db.session)
+
+        summary = {
+            'by_status': {status: 0 for status in STATUS_VALUES},
+            'by_priority': {priority: 0 for priority in PRIORITY_VALUES},
+            'by_department': {},
+            'by_assignee': {},
+        }
+        for (dimension, value), count in counts.items():
+            if count:
+                summary[f'by_{dimension}'][value] = count
+        summary['total'] = sum(summary['by_status'].values())
+        return summary
+
+    # Reconciliation
+
+    def reconcile(self):
+        """
+        Recount every counter from the tickets and archive tables and correct
+        the rows that drifted. Run as a single job (`flask tickets reconcile-counters`
+        from cron); on PostgreSQL an advisory lock makes overlapping runs skip
+        Returns {'dimension:value': {'stored': n, 'actual': n}} for the drifted
+        rows, or None when another run holds the lock
+        """
+        engine = db.engine
+        postgres = engine.dialect.name == 'postgresql'
+        with engine.connect() as connection:
+            if postgres:
+                locked = connection.execute(text('SELECT pg_try_advisory_lock(:key)'), {'key': RECONCILE_LOCK_KEY}).scalar()
+                connection.commit()
+                if not locked:
+                    logger.info("Ticket counter reconciliation already running elsewhere, skipping")
+                    return None
+            try:
+                return self._reconcile(connection, postgres)
+            finally:
+                if postgres:
+                    connection.execute(text('SELECT pg_advisory_unlock(:key)'), {'key': RECONCILE_LOCK_KEY})
+                    connection.commit()
+
+    def _reconcile(self, connection, postgres):
+        # Counts and counters from one snapshot: writers commit both together, so
+        # any difference is real drift. Nothing is locked while the tables are scanned
+        with connection.begin():
+            if postgres:
+                connection.execute(text('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ, READ ONLY'))
+            actual = self._count_tickets(connection)
+            stored = {
+                (dimension, value): count
+                for dimension, value, count in connection.execute(
+                    select(TicketCounter.dimension, TicketCounter.value, TicketCounter.count)
+                )
+            }
+
+        deltas = Counter()
+        drift = {}
+        for key in sorted(set(actual) | set(stored)):
+            if actual.get(key, 0) != stored.get(key, 0):
+                deltas[key] = actual.get(key, 0) - stored.get(key, 0)
+                drift[f'{key[0]}:{key[1]}'] = {'stored': stored.get(key, 0), 'actual': actual.get(key, 0)}
+
+        # Relative corrections commute with the deltas writers added since the snapshot
+        table = TicketCounter.__table__
+        with connection.begin():
+            if deltas:
+                self._apply(connection, connection.dialect.name, deltas)
+            connection.execute(table.delete().where(table.c.count == 0))
+        if deltas:
+            bump_tickets_version(connection)
+
+        if drift and stored:
+            logger.warning(f"Ticket counters drifted, corrected: {drift}")
+        return drift
+
+    def _count_tickets(self, executor):
+        """
+        {(dimension, value): count} straight from the tickets and archive tables
+        (one GROUP BY per table); archived tickets still count
+        """
+        columns = tuple(DIMENSIONS.values())
+        counts = Counter()
+        for model in (Ticket, ArchivedTicket):
+            group = [getattr(model, column) for column in columns]
+            for row in executor.execute(select(*group, func.count()).group_by(*group)):
+                for (dimension, column), value in zip(DIMENSIONS.items(), row):
+                    counts[(dimension, _counter_value(column, value))] += row[-1]
+        return dict(counts)
+
+
+def counter_values(ticket):
+    """The counted columns of a Ticket, as record_change() expects them"""
+    return {column: getattr(ticket, column) for column in DIMENSIONS.values()}
+
+
+def _counter_value(column, value):
+    if value is None:
+        # New tickets get the column default at INSERT time
+        default = Ticket.__table__.c[column].default
+        value = default.arg if default is not None else None
+    return NONE_VALUE if value is None else str(value)
+
+
+ticket_counters = TicketCounters()
+
+
+# Session is global and init_app runs once per app, so the hooks are registered here, once
+
+@event.listens_for(Session, 'before_flush')
+def _collect_counter_changes(session, flush_context, instances):
+    ticket_counters._collect(session)
+
+
+@event.listens_for(Session, 'before_commit')
+def _write_counter_changes(session):
+    # before_commit runs ahead of the final flush; flush now so its changes are counted
+    session.flush()
+    deltas = session.info.pop('ticket_counter_deltas', None)
+    if deltas:
+        ticket_counters._apply(session, session.get_bind(TicketCounter).dialect.name, deltas)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_counter_changes(session):
+    session.info.pop('ticket_counter_deltas', None)
@@ -0,0 +1,82 @@
+"""
+Live ticket change events for the /api/tickets/stream SSE endpoint
+Routes record events on the current session; they are published only after
+the transaction commits (and dropped on rollback), then fanned out to every
+worker's subscribers through the configured pub/sub backend
+"""
+import json
+import logging
+import time
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app import db
+from app.services.pubsub import create_pubsub
+from app.utils.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Ticket keys sent with every event; clients refetch for anything else
+EVENT_TICKET_FIELDS = ('id', 'subject', 'status', 'priority', 'assigned_to_id', 'updated_at')
+
+
+class TicketEvents:
+
+    def __init__(self, app=None):
+        self.app = None
+        self.pubsub = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.pubsub = create_pubsub(app.config, get_redis(app))
+        app.extensions['ticket_events'] = self
+
+    def record(self, event_type, ticket, **extra):
+        """Stage an event in the current transaction (call after flush)"""
+        data = {'type': event_type, 'ticket': ticket.to_dict(EVENT_TICKET_FIELDS)}
+        data.update(extra)
+        db.session.info.setdefault('ticket_events', []).append(data)
+
+    def publish(self, data):
+        """Publish a ready-to-send SSE frame so subscribers never re-encode it"""
+        frame = f"event: {data['type']}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+        try:
+            self.pubsub.publish(frame)
+        except Exception as e:
+            logger.error(f"Failed to publish {data.get('type')} event: {str(e)}")
+
+    def stream(self, subscription, heartbeat, max_duration, retry_ms):
+        """
+        SSE body for one client: events as they arrive, a comment line every
+        `heartbeat` seconds, and a clean close after `max_duration` so the
+        worker is released (EventSource reconnects automatically)
+        """
+        deadline = time.monotonic() + max_duration
+        try:
+            yield f"retry: {retry_ms}\n\n"
+            while not subscription.closed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                frame = subscription.get(timeout=min(heartbeat, remaining))
+                yield frame if frame is not None else ': keep-alive\n\n'
+        finally:
+            subscription.close()
+
+
+ticket_events = TicketEvents()
+
+
+# Staged events are published from hooks on the global Session class, which
+# are registered once at import (init_app runs for every app in the process)
+
+@event.listens_for(Session, 'after_commit')
+def _publish_ticket_events(session):
+    for message in session.info.pop('ticket_events', ()):
+        ticket_events.publish(message)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_ticket_events(session):
+    session.info.pop('ticket_events', None)
@@ -0,0 +1,229 @@
+"""
+Bulk ticket import / export in NDJSON or CSV with constant memory
+- Export streams a single SELECT through a server-side cursor (yield_per), so
+  rows are fetched and encoded in batches instead of loading the table
+- Import parses the input lazily and writes chunks with bulk_insert_mappings,
+  committing per chunk; imported tickets don't trigger webhooks or auto-assignment
+"""
+import csv
+import io
+import json
+import logging
+from datetime import datetime
+from sqlalchemy import select, text
+from sqlalchemy.exc import SQLAlchemyError
+from app import db
+from app.models.ticket import Ticket
+from app.models.user import User
+from app.services.agent_availability import agent_index
+from app.services.response_cache import mark_tickets_changed
+from app.services.ticket_counters import ticket_counters
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ('ndjson', 'csv')
+EXPORT_COLUMNS = (
+    'id', 'client_name', 'client_email', 'client_phone', 'subject', 'description',
+    'status', 'priority', 'category', 'department', 'assigned_to_id', 'created_at', 'updated_at'
+)
+REQUIRED_COLUMNS = ('client_name', 'client_email', 'subject', 'description')
+STATUS_VALUES = tuple(Ticket.__table__.c.status.type.enums)
+PRIORITY_VALUES = tuple(Ticket.__table__.c.priority.type.enums)
+
+# Errors kept in the import report (all are counted)
+MAX_REPORTED_ERRORS = 100
+
+
+class TransferError(ValueError):
+    """Unsupported format or unusable input"""
+
+
+def check_format(fmt):
+    if fmt not in FORMATS:
+        raise TransferError(f"Unsupported format '{fmt}', expected one of: {', '.join(FORMATS)}")
+    return fmt
+
+
+# Export
+
+def iter_ticket_rows(status=None, updated_since=None, batch_size=1000):
+    """Yield export rows (dicts) in id order from one streamed query"""
+    columns = [getattr(Ticket, name) for name in EXPORT_COLUMNS]
+    query = select(*columns).order_by(Ticket.id)
+    if status:
+        query = query.where(Ticket.status == status)
+    if updated_since:
+        query = query.where(Ticket.updated_at >= updated_since)
+
+    result = db.session.execute(query.execution_options(yield_per=batch_size))
+    for row in result.mappings():
+        yield dict(row)
+
+
+def export_tickets(fmt, rows, batch_size=1000):
+    """Encode rows as NDJSON lines or CSV, yielding one text chunk per batch"""
+    check_format(fmt)
+    buffer = io.StringIO()
+    writer = None
+    if fmt == 'csv':
+        writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS, lineterminator='\n')
+        writer.writeheader()
+
+    pending = 0
+    for row in rows:
+        for key in ('created_at', 'updated_at'):
+            if row[key] is not None:
+                row[key] = row[key].isoformat()
+        if writer is not None:
+            writer.writerow(row)
+        else:
+            buffer.write(json.dumps(row, ensure_ascii=False))
+            buffer.write('\n')
+
+        pending += 1
+        if pending >= batch_size:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+# Import
+
+def read_records(fmt, stream):
+    """Lazily yield (line number, dict) from a text stream"""
+    check_format(fmt)
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for record in reader:
+            yield reader.line_num, record
+        return
+
+    for line_number, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield line_number, e
+            continue
+        yield line_number, record
+
+
+def import_tickets(fmt, stream, chunk_size=1000, keep_ids=False):
+    """
+    Insert tickets from an NDJSON/CSV text stream in committed chunks
+    keep_ids=True preserves source ids (and moves the id sequence past them)
+    Returns: {'imported', 'failed', 'errors'} report
+    """
+    check_format(fmt)
+    user_ids = {user_id for (user_id,) in db.session.query(User.id)}
+    report = {'imported': 0, 'failed': 0, 'errors': []}
+    chunk = []
+    chunk_lines = []
+
+    def fail(line_number, message):
+        report['failed'] += 1
+        if len(report['errors']) < MAX_REPORTED_ERRORS:
+            report['errors'].append({'line': line_number, 'error': message})
+
+    def flush():
+        try:
+            db.session.bulk_insert_mappings(Ticket, chunk)
+            mark_tickets_changed(db.session)
+            for values in chunk:
+                ticket_counters.record_change(db.session, None, values)
+            db.session.commit()
+            report['imported'] += len(chunk)
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            logger.error(f"Ticket import chunk failed (lines {chunk_lines[0]}-{chunk_lines[-1]}): {str(e)}")
+            for line_number in chunk_lines:
+                fail(line_number, 'Chunk rejected by the database')
+        chunk.clear()
+        chunk_lines.clear()
+
+    for line_number, record in read_records(fmt, stream):
+        try:
+            if isinstance(record, Exception):
+                raise ValueError(f'Invalid JSON: {record}')
+            chunk.append(_normalize(record, user_ids, keep_ids))
+            chunk_lines.append(line_number)
+        except ValueError as e:
+            fail(line_number, str(e))
+            continue
+        if len(chunk) >= chunk_size:
+            flush()
+
+    if chunk:
+        flush()
+
+    if report['imported']:
+        if keep_ids:
+            _sync_id_sequence()
+        # Imported tickets may be assigned; recount agent workloads
+        agent_index.invalidate()
+
+    return report
+
+
+def _normalize(record, user_ids, keep_ids):
+    """Validate one input record and map it to Ticket columns"""
+    if not isinstance(record, dict):
+        raise ValueError('Record must be an object')
+
+    values = {}
+    for column in EXPORT_COLUMNS:
+        value = record.get(column)
+        if isinstance(value, str):
+            value = value.strip()
+        values[column] = value if value not in ('', None) else None
+
+    missing = [column for column in REQUIRED_COLUMNS if not values[column]]
+    if missing:
+        raise ValueError(f"Missing required fields: {', '.join(missing)}")
+
+    values['status'] = values['status'] or 'abierto'
+    values['priority'] = values['priority'] or 'media'
+    if values['status'] not in STATUS_VALUES:
+        raise ValueError(f"Invalid status '{values['status']}'")
+    if values['priority'] not in PRIORITY_VALUES:
+        raise ValueError(f"Invalid priority '{values['priority']}'")
+
+    for column in ('id', 'assigned_to_id'):
+        if values[column] is not None:
+            try:
+                values[column] = int(values[column])
+            except (TypeError, ValueError):
+                raise ValueError(f'{column} must be an integer')
+    if values['assigned_to_id'] is not None and values['assigned_to_id'] not in user_ids:
+        raise ValueError(f"Unknown assigned_to_id {values['assigned_to_id']}")
+
+    now = datetime.utcnow()
+    for column in ('created_at', 'updated_at'):
+        if values[column] is None:
+            values[column] = now
+        elif not isinstance(values[column], datetime):
+            try:
+                values[column] = datetime.fromisoformat(values[column])
+            except (TypeError, ValueError):
+                raise ValueError(f'{column} must be an ISO 8601 datetime')
+
+    if not keep_ids or values['id'] is None:
+        values.pop('id')
+    return values
+
+
+def _sync_id_sequence():
+    """Move the PostgreSQL id sequence past imported and archived ids (SQLite needs nothing)"""
+    if db.engine.dialect.name != 'postgresql':
+        return
+    db.session.execute(text(
+        "SELECT setval(pg_get_serial_sequence('tickets', 'id'), "
+        "GREATEST(COALESCE((SELECT MAX(id) FROM tickets), 1), COALESCE((SELECT MAX(id) FROM tickets_archive), 1)))"
+    ))
+    db.session.commit()
@@ -0,0 +1,49 @@
+"""
+Coalescing of queued n8n webhooks
+When a window is configured, outbox events are held for that long and then
+shipped as one POST per webhook URL: {"count": n, "events": [payload, ...]}
+with events in commit order, so per-ticket ordering is preserved
+"""
+
+
+class WebhookCoalescer:
+
+    def __init__(self, window=0, max_events=100):
+        self.window = window
+        self.max_events = max_events
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            window=config['N8N_COALESCE_WINDOW'],
+            max_events=config['N8N_COALESCE_MAX_EVENTS']
+        )
+
+    @property
+    def enabled(self):
+        return self.window > 0
+
+    def group(self, events):
+        """
+        Split claimed events (ordered by id) into deliveries
+        Returns: list of (webhook_url, [events]) in order of first event
+        """
+        if not self.enabled:
+            return [(event.webhook_url, [event]) for event in events]
+
+        groups = {}
+        for event in events:
+            groups.setdefault(event.webhook_url, []).append(event)
+
+        deliveries = []
+        for webhook_url, grouped in groups.items():
+            for start in range(0, len(grouped), self.max_events):
+                deliveries.append((webhook_url, grouped[start:start + self.max_events]))
+        deliveries.sort(key=lambda delivery: delivery[1][0].id)
+        return deliveries
+
+    def encode(self, events):
+        """Build the request body; payloads are stored pre-encoded so they are spliced, not re-parsed"""
+        if not self.enabled:
+            return events[0].payload
+        return '{"count": %d, "events": [%s]}' % (len(events), ', '.join(event.payload for event in events))
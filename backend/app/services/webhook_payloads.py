@@ -0,0 +1,74 @@
+"""
+n8n webhook payload builder
+Payloads are built straight from the Ticket row (only the assignee is touched,
+never the comments) and encoded once; camelCase aliases are opt-in per webhook
+"""
+import json
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+# Keys sent to each webhook, in snake_case as the n8n workflows expect
+WEBHOOK_FIELDS = {
+    'new_ticket': (
+        'ticket_id', 'client_name', 'client_email', 'client_phone', 'subject',
+        'description', 'priority', 'department', 'category'
+    ),
+    'update_ticket': (
+        'ticket_id', 'client_name', 'client_email', 'client_phone', 'subject',
+        'comment_text', 'agent_name', 'agent_email', 'department', 'category'
+    ),
+    'close_ticket': (
+        'ticket_id', 'client_name', 'client_email', 'client_phone', 'subject',
+        'agent_name', 'agent_email', 'department', 'category'
+    ),
+    'agent_assignment': (
+        'ticket_id', 'client_name', 'client_email', 'client_phone', 'subject',
+        'description', 'priority', 'category', 'department', 'agent_name', 'agent_email'
+    ),
+}
+
+# Legacy camelCase aliases for workflows built against the old payloads
+CAMEL_CASE_ALIASES = {
+    'ticket_id': 'ticketId',
+    'client_name': 'clientName',
+    'client_email': 'clientEmail',
+    'client_phone': 'clientPhone',
+    'comment_text': 'commentText',
+    'agent_name': 'agentName',
+    'agent_email': 'agentEmail',
+}
+
+
+def build_payload(event_type, ticket, comment_text=None, camel_case=False):
+    """Build the payload dict for a webhook from a Ticket model instance"""
+    fields = WEBHOOK_FIELDS[event_type]
+    agent = ticket.assigned_user if ('agent_name' in fields and ticket.assigned_to_id) else None
+
+    values = {
+        'ticket_id': ticket.id,
+        'comment_text': comment_text,
+        'agent_name': agent.full_name if agent else None,
+        'agent_email': agent.email if agent else None,
+    }
+
+    payload = {}
+    for field in fields:
+        payload[field] = values[field] if field in values else getattr(ticket, field)
+
+    if camel_case:
+        for field in fields:
+            alias = CAMEL_CASE_ALIASES.get(field)
+            if alias:
+                payload[alias] = payload[field]
+
+    return payload
+
+
+def encode_payload(payload):
+    """Serialize a payload to a compact JSON string (orjson when installed)"""
+    if orjson is not None:
+        return orjson.dumps(payload).decode('utf-8')
+    return json.dumps(payload, separators=(',', ':'), ensure_ascii=False, default=str)
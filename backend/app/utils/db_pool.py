@@ -0,0 +1,149 @@
+"""
+Database engine / connection pool configuration and pool metrics
+engine_options() turns the DB_* settings into SQLALCHEMY_ENGINE_OPTIONS;
+instrument_pool() counts connects, checkouts, invalidations, checkout wait
+time and timeouts for /api/auth/db/pool and /api/metrics
+"""
+import threading
+import time
+from sqlalchemy import event, exc
+from sqlalchemy.pool import NullPool, QueuePool
+
+
+class PoolStats:
+    """Per-process pool counters; listeners get (event, value) for 'wait', 'timeout' and 'checked_out'"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.listeners = []
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.connects = 0
+            self.checkouts = 0
+            self.invalidations = 0
+            self.timeouts = 0
+            self.checked_out = 0
+            self.wait_total = 0.0
+            self.wait_max = 0.0
+
+    def _notify(self, name, value):
+        for listener in self.listeners:
+            listener(name, value)
+
+    def record_wait(self, seconds):
+        with self._lock:
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+        self._notify('wait', seconds)
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+        self._notify('timeout', 1)
+
+    def _checkout(self, *args):
+        with self._lock:
+            self.checkouts += 1
+            self.checked_out += 1
+            checked_out = self.checked_out
+        self._notify('checked_out', checked_out)
+
+    def _checkin(self, *args):
+        with self._lock:
+            self.checked_out = max(self.checked_out - 1, 0)
+            checked_out = self.checked_out
+        self._notify('checked_out', checked_out)
+
+    def _connect(self, *args):
+        with self._lock:
+            self.connects += 1
+
+    def _invalidate(self, *args):
+        with self._lock:
+            self.invalidations += 1
+
+    def snapshot(self, engine=None):
+        with self._lock:
+            data = {
+                'connects': self.connects,
+                'checkouts': self.checkouts,
+                'checked_out': self.checked_out,
+                'invalidations': self.invalidations,
+                'timeouts': self.timeouts,
+                'wait_avg_ms': round(self.wait_total / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                'wait_max_ms': round(self.wait_max * 1000, 3),
+            }
+        if engine is not None:
+            pool = engine.pool
+            data['pool_class'] = type(pool).__name__
+            if isinstance(pool, QueuePool):
+                data['pool_size'] = pool.size()
+                data['overflow'] = pool.overflow()
+                data['idle'] = pool.checkedin()
+        return data
+
+
+pool_stats = PoolStats()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that reports how long each checkout waited for a connection"""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            pool_stats.record_timeout()
+            raise
+        finally:
+            pool_stats.record_wait(time.perf_counter() - started)
+
+
+def engine_options(config, uri=None):
+    """
+    Engine options for the configured database (or `uri`, e.g. the read replica)
+    PostgreSQL gets a bounded, pre-pinged, recycled LIFO pool and a per-statement
+    timeout; with DB_PGBOUNCER the app keeps no pool of its own (PgBouncer in
+    transaction mode does the pooling) and sends no startup options, so set
+    statement_timeout on the database role instead
+    """
+    uri = uri or config['SQLALCHEMY_DATABASE_URI']
+    if not uri.startswith('postgresql'):
+        return {}
+
+    connect_args = {
+        'connect_timeout': config['DB_CONNECT_TIMEOUT'],
+        'application_name': config['DB_APPLICATION_NAME'],
+    }
+
+    if config['DB_PGBOUNCER']:
+        return {
+            'poolclass': NullPool,
+            'connect_args': connect_args,
+        }
+
+    if config['DB_STATEMENT_TIMEOUT_MS']:
+        connect_args['options'] = f"-c statement_timeout={config['DB_STATEMENT_TIMEOUT_MS']}"
+
+    return {
+        'poolclass': InstrumentedQueuePool,
+        'pool_size': config['DB_POOL_SIZE'],
+        'max_overflow': config['DB_MAX_OVERFLOW'],
+        'pool_timeout': config['DB_POOL_TIMEOUT'],
+        'pool_recycle': config['DB_POOL_RECYCLE'],
+        'pool_pre_ping': config['DB_POOL_PRE_PING'],
+        # Reuse the most recent connection so idle extras age out after a failover storm
+        'pool_use_lifo': True,
+        'connect_args': connect_args,
+    }
+
+
+def instrument_pool(engine):
+    """Attach pool_stats to an engine's pool events"""
+    event.listen(engine, 'connect', pool_stats._connect)
+    event.listen(engine, 'checkout', pool_stats._checkout)
+    event.listen(engine, 'checkin', pool_stats._checkin)
+    event.listen(engine, 'invalidate', pool_stats._invalidate)
@@ -0,0 +1,68 @@
+"""
+Read-replica routing (SQLALCHEMY_REPLICA_URI)
+Views decorated with @read_replica run their queries on the 'replica' bind;
+flushes, INSERT/UPDATE/DELETE statements and every other view stay on the
+primary. After a client's successful write its reads stick to the primary for
+DB_REPLICA_STICKY_SECONDS (a short-lived cookie), so replication lag never hides
+the client's own changes
+"""
+from functools import wraps
+import sqlalchemy as sa
+from flask import current_app, g, has_app_context, request
+from flask_sqlalchemy.session import Session
+
+REPLICA_BIND = 'replica'
+STICKY_COOKIE = 'db_primary'
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class RoutingSession(Session):
+    """db.session class that sends plain reads to the replica when the view asks for it"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and _reads_from_replica() and not self._flushing and not self._has_writes(clause):
+            replica = self._db.engines.get(REPLICA_BIND)
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _has_writes(self, clause):
+        return isinstance(clause, sa.UpdateBase) or not self._is_clean()
+
+
+def _reads_from_replica():
+    return has_app_context() and g.get('db_use_replica', False)
+
+
+def init_app(app):
+    """Register the replica bind (before db.init_app) and the stickiness cookie"""
+    replica_uri = app.config.get('SQLALCHEMY_REPLICA_URI')
+    if not replica_uri:
+        return
+
+    from app.utils.db_pool import engine_options
+    app.config['SQLALCHEMY_BINDS'] = {
+        **app.config.get('SQLALCHEMY_BINDS', {}),
+        REPLICA_BIND: {'url': replica_uri, **engine_options(app.config, replica_uri)},
+    }
+
+    @app.after_request
+    def _stick_to_primary(response):
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            response.set_cookie(
+                STICKY_COOKIE, '1', max_age=app.config['DB_REPLICA_STICKY_SECONDS'],
+                httponly=True, samesite='Lax'
+            )
+        return response
+
+
+def read_replica(f):
+    """Decorator for read-only views whose queries may be served by the replica"""
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        if current_app.config.get('SQLALCHEMY_REPLICA_URI') and not request.cookies.get(STICKY_COOKIE):
+            g.db_use_replica = True
+        return f(*args, **kwargs)
+
+    return decorated
@@ -0,0 +1,117 @@
+"""
+Keyset (cursor) pagination helpers
+Cursors are opaque base64 tokens encoding the (created_at, id) of the last row
+"""
+import base64
+import json
+from datetime import datetime
+from sqlalchemy import and_, or_
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a cursor or page size cannot be parsed"""
+    pass
+
+
+def encode_cursor(created_at, row_id):
+    """
+    Build an opaque cursor from the sort key of the last returned row
+    The sort column must be NOT NULL: a NULL has no place in the seek order
+    """
+    if created_at is None:
+        raise ValueError(f'Cannot build a cursor for row {row_id} without created_at')
+    raw = json.dumps([created_at.isoformat(), row_id])
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Return the (created_at, id) tuple encoded in a cursor"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, TypeError):
+        raise InvalidCursorError('Invalid cursor')
+
+
+def encode_offset_cursor(offset):
+    """Cursor for ranked results, where there is no stable sort key to seek on"""
+    raw = json.dumps({'offset': offset})
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_offset_cursor(cursor):
+    """Return the offset encoded by encode_offset_cursor (0 for no cursor)"""
+    if not cursor:
+        return 0
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        offset = int(json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))['offset'])
+    except (ValueError, TypeError, KeyError):
+        raise InvalidCursorError('Invalid cursor')
+    if offset < 0:
+        raise InvalidCursorError('Invalid cursor')
+    return offset
+
+
+def parse_limit(value):
+    """Parse the ?limit= argument, clamped to MAX_PAGE_SIZE"""
+    if value is None:
+        return DEFAULT_PAGE_SIZE
+    try:
+        limit = int(value)
+    except ValueError:
+        raise InvalidCursorError('limit must be an integer')
+    if limit < 1:
+        raise InvalidCursorError('limit must be positive')
+    return min(limit, MAX_PAGE_SIZE)
+
+
+def paginate_desc(query, created_col, id_col, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    Apply newest-first keyset pagination to a query
+    Returns: (rows, next_cursor) where next_cursor is None on the last page
+    """
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.filter(or_(
+            created_col < created_at,
+            and_(created_col == created_at, id_col < row_id)
+        ))
+
+    # Fetch one extra row to know whether another page exists
+    rows = query.order_by(created_col.desc(), id_col.desc()).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, created_col.key), getattr(last, id_col.key))
+
+    return rows, next_cursor
+
+
+def paginate_asc(query, created_col, id_col, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    Oldest-first counterpart of paginate_desc (e.g. comment threads)
+    Returns: (rows, next_cursor) where next_cursor is None on the last page
+    """
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.filter(or_(
+            created_col > created_at,
+            and_(created_col == created_at, id_col > row_id)
+        ))
+
+    rows = query.order_by(created_col.asc(), id_col.asc()).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, created_col.key), getattr(last, id_col.key))
+
+    return rows, next_cursor
@@ -0,0 +1,87 @@
+"""
+SQL statement counting helpers
+Used to check that endpoints execute a bounded number of queries, and by
+benchmarks/load_test.py to report statements per request
+Only statements executed by the counting thread are recorded, so background
+threads (outbox dispatcher, pub/sub listeners) and concurrent clients don't
+inflate the count
+"""
+import threading
+import weakref
+from contextlib import contextmanager
+from sqlalchemy import event
+from app import db
+
+
+class QueryCounter:
+    """Collects the SQL statements executed while active"""
+
+    def __init__(self):
+        self.statements = []
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+
+class _StatementRecorder:
+    """One listener per engine, feeding the counters active in each thread"""
+
+    def __init__(self, engine):
+        self._local = threading.local()
+        event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+
+    def active(self):
+        if not hasattr(self._local, 'counters'):
+            self._local.counters = []
+        return self._local.counters
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        for counter in getattr(self._local, 'counters', ()):
+            counter.statements.append(statement)
+
+
+_recorders = weakref.WeakKeyDictionary()
+_recorders_lock = threading.Lock()
+
+
+def watch_engine(engine=None):
+    """
+    Install the statement listener on `engine` (done on first use). SQLAlchemy
+    listeners must not be added while the engine runs statements in other
+    threads, so call this before starting concurrent work
+    """
+    engine = engine or db.engine
+    with _recorders_lock:
+        recorder = _recorders.get(engine)
+        if recorder is None:
+            recorder = _recorders[engine] = _StatementRecorder(engine)
+    return recorder
+
+
+@contextmanager
+def count_queries(engine=None):
+    """
+    Count statements this thread executes on the engine inside the block
+    Usage:
+        with count_queries() as counter:
+            client.get('/api/tickets')
+        print(counter.count)
+    """
+    active = watch_engine(engine).active()
+    counter = QueryCounter()
+    active.append(counter)
+    try:
+        yield counter
+    finally:
+        active.remove(counter)
+
+
+@contextmanager
+def assert_max_queries(limit, engine=None):
+    """Raise AssertionError if the block executes more than `limit` statements"""
+    with count_queries(engine) as counter:
+        yield counter
+    if counter.count > limit:
+        executed = '\n'.join(counter.statements)
+        raise AssertionError(f'Expected at most {limit} queries, got {counter.count}:\n{executed}')
@@ -0,0 +1,33 @@
+"""
+Optional Redis connection shared by the response cache and event streams
+Returns None when REDIS_URL is unset or the redis package is not installed
+"""
+import logging
+from flask import current_app
+
+try:
+    import redis
+except ImportError:  # pragma: no cover - redis is optional in development
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+
+def get_redis(app=None):
+    app = app or current_app._get_current_object()
+    if 'redis' in app.extensions:
+        return app.extensions['redis']
+
+    client = None
+    url = app.config.get('REDIS_URL')
+    if url and redis is not None:
+        client = redis.Redis.from_url(
+            url,
+            socket_connect_timeout=app.config['REDIS_SOCKET_TIMEOUT'],
+            socket_timeout=app.config['REDIS_SOCKET_TIMEOUT']
+        )
+    elif url:
+        logger.warning("REDIS_URL is set but the redis package is not installed; Redis features disabled")
+
+    app.extensions['redis'] = client
+    return client
@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+Stress test concurrent auto-assignment
+Seeds agents with a small capacity, then has N client threads (optionally in
+several processes, like gunicorn workers with their own availability index)
+create tickets and close assigned ones at the same time. Afterwards checks
+the invariants the row locks are meant to guarantee and reports latency
+
+- no agent holds more active tickets than its capacity      (failure)
+- no active ticket is left unassigned while an agent has room (reported; with
+  --strict a failure, since SKIP LOCKED may pass over a busy agent)
+- the summary counters equal a COUNT(*) of the tickets, and reconcile()
+  finds no drift                                                (failure)
+- each worker's agent availability index equals a COUNT(*) of active tickets
+  per agent (failure; with several processes only when Redis carries the
+  deltas between them). A saturated run rebuilds the index on every failed
+  assignment, which hides drift, so also run with spare capacity, e.g.
+  --agents 50 --capacity 5 --tickets 200
+
+Usage (from backend/):
+    python -m benchmarks.assign_stress --agents 20 --capacity 3 --tickets 2000 --clients 16
+    DATABASE_URL=postgresql://... python -m benchmarks.assign_stress --processes 4 --clients 8
+
+SQLite serializes writers, so run against PostgreSQL to exercise the locks
+"""
+import argparse
+import multiprocessing
+import os
+import queue
+import random
+import sys
+import tempfile
+import threading
+import time
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--agents', type=int, default=20)
+    parser.add_argument('--capacity', type=int, default=3, help='max_active_tickets of every agent')
+    parser.add_argument('--tickets', type=int, default=2000, help='tickets created in total')
+    parser.add_argument('--clients', type=int, default=16, help='client threads per process')
+    parser.add_argument('--processes', type=int, default=1, help='worker processes (own app and index each)')
+    parser.add_argument('--close-ratio', type=float, default=0.5,
+                        help='chance that a client closes an assigned ticket after each create')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--strict', action='store_true', help='also fail when tickets are stranded')
+    return parser.parse_args()
+
+
+def seed(db, args):
+    from sqlalchemy import insert
+    from app.models import User
+
+    template = User(username='template')
+    template.set_password('stress')
+    db.session.execute(insert(User), [{
+        'username': f'stress_agent_{i}', 'email': f'stress_agent_{i}@example.com',
+        'password_hash': template.password_hash, 'full_name': f'Agent {i}', 'role': 'agent',
+        'is_active': True, 'assignment_weight': 1, 'max_active_tickets': args.capacity
+    } for i in range(args.agents)])
+    db.session.commit()
+
+
+def run_worker(index, args, results, app=None):
+    """
+    One worker process: its own app (created here when spawned), `args.clients`
+    threads sharing the quota. Puts (samples, agent index mismatches) on `results`
+    """
+    if app is None:
+        from app import create_app
+        app = create_app('production')
+    quota = [args.tickets // args.processes + (1 if index < args.tickets % args.processes else 0)]
+    lock = threading.Lock()
+    samples = []
+
+    def client_loop(thread_index):
+        rng = random.Random(args.seed + index * 1000 + thread_index)
+        client = app.test_client()
+        mine = []
+        local = []
+        while True:
+            with lock:
+                if quota[0] <= 0:
+                    break
+                quota[0] -= 1
+            started = time.perf_counter()
+            response = client.post('/api/tickets', json={
+                'client_name': 'Stress', 'client_email': 'stress@example.com',
+                'subject': 'Prueba de asignación', 'description': 'Creado por la prueba de estrés',
+                'priority': rng.choice(('baja', 'media', 'alta', 'critica'))
+            })
+            elapsed = time.perf_counter() - started
+            body = response.get_json(silent=True) or {}
+            local.append(('create', elapsed, response.status_code == 201))
+            if body.get('assigned_to_id'):
+                mine.append(body['id'])
+
+            if mine and rng.random() < args.close_ratio:
+                ticket_id = mine.pop(rng.randrange(len(mine)))
+                started = time.perf_counter()
+                response = client.put(f'/api/tickets/{ticket_id}/status', json={'status': 'cerrado'})
+                local.append(('close', time.perf_counter() - started, response.status_code == 200))
+        with lock:
+            samples.extend(local)
+
+    threads = [threading.Thread(target=client_loop, args=(i,)) for i in range(args.clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    with app.app_context():
+        mismatches = check_agent_index(app, args.processes)
+    results.put((samples, mismatches))
+
+
+def active_counts(db):
+    """{agent_id: active tickets} straight from the tickets table"""
+    from sqlalchemy import func
+    from app.models import Ticket
+
+    return dict(db.session.query(Ticket.assigned_to_id, func.count(Ticket.id)).filter(
+        Ticket.assigned_to_id.isnot(None),
+        Ticket.status.in_(Ticket.ACTIVE_STATUSES)
+    ).group_by(Ticket.assigned_to_id).all())
+
+
+def check_agent_index(app, processes):
+    """
+    {agent_id: (index count, actual count)} where this process's availability
+    index disagrees with the tickets table, or None when it cannot be compared
+    (several processes without Redis only converge on the index TTL)
+    """
+    from app import db
+    from app.services.agent_availability import agent_index
+
+    if processes > 1 and not agent_index.signals.enabled:
+        return None
+    # Read the counts as they are, without ensure_fresh(): a rebuild would hide drift
+    with agent_index._lock:
+        indexed = dict(agent_index._counts)
+    actual = active_counts(db)
+    return {
+        agent_id: (count, actual.get(agent_id, 0))
+        for agent_id, count in indexed.items() if count != actual.get(agent_id, 0)
+    }
+
+
+def check_counters(db):
+    """{'dimension:value': (counter, actual)} where the summary counters disagree with COUNT(*)"""
+    from sqlalchemy import func
+    from app.models import Ticket
+    from app.services.ticket_counters import ticket_counters
+
+    summary = ticket_counters.summary()
+    columns = {
+        'status': Ticket.status, 'priority': Ticket.priority,
+        'department': Ticket.department, 'assignee': Ticket.assigned_to_id,
+    }
+    mismatches = {}
+    for dimension, column in columns.items():
+        actual = {
+            '' if value is None else str(value): count
+            for value, count in db.session.query(column, func.count(Ticket.id)).group_by(column)
+        }
+        stored = summary[f'by_{dimension}']
+        for value in set(actual) | set(stored):
+            if stored.get(value, 0) != actual.get(value, 0):
+                mismatches[f'{dimension}:{value}'] = (stored.get(value, 0), actual.get(value, 0))
+    total = db.session.query(func.count(Ticket.id)).scalar()
+    if summary['total'] != total:
+        mismatches['total'] = (summary['total'], total)
+    return mismatches
+
+
+def check_invariants(db):
+    """Returns (over-capacity agents, stranded tickets, active tickets per agent)"""
+    from app.models import Ticket, User
+    from flask import current_app
+
+    default_capacity = current_app.config['AGENT_DEFAULT_CAPACITY']
+    active = active_counts(db)
+    agents = User.query.filter(User.role == 'agent', User.is_active == True).all()
+
+    over = {}
+    free_slots = 0
+    for agent in agents:
+        capacity = agent.max_active_tickets or default_capacity
+        count = active.get(agent.id, 0)
+        if count > capacity:
+            over[agent.id] = (count, capacity)
+        free_slots += max(capacity - count, 0)
+
+    unassigned = Ticket.query.filter(
+        Ticket.assigned_to_id.is_(None),
+        Ticket.status.in_(Ticket.ACTIVE_STATUSES)
+    ).count()
+    return over, min(unassigned, free_slots), active
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(pct / 100.0 * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def print_report(samples, wall):
+    print(f"\n{len(samples)} requests in {wall:.1f}s ({len(samples) / wall if wall else 0.0:.1f} req/s)\n")
+    header = f"{'request':8s} {'reqs':>6s} {'err':>5s} {'p50 ms':>9s} {'p95 ms':>9s} {'p99 ms':>9s}"
+    print(header)
+    print('-' * len(header))
+    for name in ('create', 'close'):
+        rows = [(elapsed, ok) for kind, elapsed, ok in samples if kind == name]
+        if not rows:
+            continue
+        latencies = sorted(elapsed * 1000 for elapsed, _ in rows)
+        errors = sum(1 for _, ok in rows if not ok)
+        print(f"{name:8s} {len(rows):6d} {errors:5d} {percentile(latencies, 50):9.2f} "
+              f"{percentile(latencies, 95):9.2f} {percentile(latencies, 99):9.2f}")
+
+
+def main():
+    args = parse_args()
+
+    # Environment must be in place before config.py is imported (and inherited by the workers)
+    from benchmarks.load_test import start_n8n_stub
+    stub = start_n8n_stub()
+    stub.handle_error = lambda request, client_address: None  # exiting workers reset keep-alive connections
+    os.environ['N8N_BASE_URL'] = f'http://127.0.0.1:{stub.server_address[1]}'
+    for key in ('N8N_WEBHOOK_NEW_TICKET', 'N8N_WEBHOOK_UPDATE_TICKET',
+                'N8N_WEBHOOK_CLOSE_TICKET', 'N8N_WEBHOOK_AGENT_ASSIGNMENT'):
+        os.environ.pop(key, None)
+    if not os.environ.get('DATABASE_URL') and not os.environ.get('POSTGRES_USER'):
+        path = os.path.join(tempfile.gettempdir(), 'tickets_assign_stress.db')
+        if os.path.exists(path):
+            os.remove(path)
+        os.environ['DATABASE_URL'] = f'sqlite:///{path}'
+
+    from app import create_app, db
+
+    app = create_app('production')
+    with app.app_context():
+        db.create_all()
+        seed(db, args)
+
+    print(f"Creating {args.tickets} tickets from {args.processes} process(es) x {args.clients} clients "
+          f"({args.agents} agents x {args.capacity} slots)...")
+    started = time.perf_counter()
+    if args.processes == 1:
+        results = queue.Queue()
+        # Same process, same app: a second create_app() would be a second worker in disguise
+        run_worker(0, args, results, app)
+    else:
+        context = multiprocessing.get_context('spawn')
+        results = context.Queue()
+        workers = [context.Process(target=run_worker, args=(i, args, results)) for i in range(args.processes)]
+        for worker in workers:
+            worker.start()
+    samples = []
+    index_mismatches = []
+    for _ in range(args.processes):
+        worker_samples, mismatches = results.get()
+        samples.extend(worker_samples)
+        index_mismatches.append(mismatches)
+    if args.processes > 1:
+        for worker in workers:
+            worker.join()
+    wall = time.perf_counter() - started
+    print_report(samples, wall)
+
+    with app.app_context():
+        over, stranded, active = check_invariants(db)
+
+    print(f"\nActive tickets per agent: max {max(active.values(), default=0)}, capacity {args.capacity}")
+    failed = False
+    if over:
+        failed = True
+        print(f"❌ {len(over)} agent(s) over capacity: "
+              + ', '.join(f'#{agent_id} {count}/{capacity}' for agent_id, (count, capacity) in sorted(over.items())))
+    else:
+        print("✅ No agent over capacity")
+    if stranded:
+        failed = failed or args.strict
+        print(f"{'❌' if args.strict else '⚠️ '} {stranded} active ticket(s) unassigned while agents have free slots")
+    else:
+        print("✅ No ticket stranded while an agent had room")
+
+    if any(mismatches for mismatches in index_mismatches):
+        failed = True
+        for worker, mismatches in enumerate(index_mismatches):
+            if mismatches:
+                print(f"❌ Worker {worker} agent index disagrees with COUNT(*): "
+                      + ', '.join(f'#{agent_id} {indexed}!={actual}'
+                                  for agent_id, (indexed, actual) in sorted(mismatches.items())))
+    elif all(mismatches is None for mismatches in index_mismatches):
+        print("⚠️  Agent index not compared (several processes without Redis)")
+    else:
+        print("✅ Agent index matches the active tickets")
+
+    # The maintained summary counters must match a recount of the tickets
+    from app.services.ticket_counters import ticket_counters
+    with app.app_context():
+        counter_mismatches = check_counters(db)
+        drift = ticket_counters.reconcile()
+    if counter_mismatches:
+        failed = True
+        print(f"❌ {len(counter_mismatches)} summary counter(s) differ from COUNT(*): "
+              + ', '.join(f'{key} {stored}!={actual}' for key, (stored, actual) in sorted(counter_mismatches.items())))
+    if drift:
+        failed = True
+        print(f"❌ {len(drift)} summary counter(s) drifted: "
+              + ', '.join(f"{key} {change['stored']}->{change['actual']}" for key, change in sorted(drift.items())))
+    elif drift is None:
+        print("⚠️  Counter reconciliation skipped (another run holds the lock)")
+    else:
+        print("✅ Summary counters match the tickets")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
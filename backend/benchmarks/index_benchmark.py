@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Benchmark the ticket hot queries with and without the composite indexes
+Seeds a synthetic dataset, then reports the query plan and median latency of
+each query before (indexes dropped) and after (indexes created)
+
+Usage (from backend/):
+    python -m benchmarks.index_benchmark --tickets 1000000
+    DATABASE_URL=postgresql://... python -m benchmarks.index_benchmark --tickets 1000000 --keep-data
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tickets', type=int, default=1000000)
+    parser.add_argument('--agents', type=int, default=50)
+    parser.add_argument('--comments-per-ticket', type=float, default=0.5)
+    parser.add_argument('--repeat', type=int, default=20, help='runs per query (median reported)')
+    parser.add_argument('--keep-data', action='store_true', help='reuse an already seeded database')
+    return parser.parse_args()
+
+
+# Indexes under test: name -> (table, model Index)
+def index_definitions():
+    from app.models import Ticket, Comment
+    indexes = {}
+    for model in (Ticket, Comment):
+        for index in model.__table__.indexes:
+            if index.name.startswith(('idx_tickets_', 'idx_comments_')):
+                indexes[index.name] = index
+    return indexes
+
+
+def hot_queries(agent_id, ticket_id):
+    """(label, SQL, params) for each hot path"""
+    return [
+        ('list by status (newest first)',
+         "SELECT id FROM tickets WHERE status = :status ORDER BY created_at DESC, id DESC LIMIT 50",
+         {'status': 'abierto'}),
+        ('keyset page for an agent',
+         "SELECT id FROM tickets WHERE assigned_to_id = :agent AND created_at < :cursor "
+         "ORDER BY created_at DESC, id DESC LIMIT 50",
+         {'agent': agent_id, 'cursor': datetime.utcnow()}),
+        ('agent active workload',
+         "SELECT count(id) FROM tickets WHERE assigned_to_id = :agent AND status IN ('abierto', 'en_proceso')",
+         {'agent': agent_id}),
+        ('oldest unassigned ticket',
+         "SELECT id FROM tickets WHERE assigned_to_id IS NULL AND status IN ('abierto', 'en_proceso') "
+         "ORDER BY created_at ASC, id ASC LIMIT 1",
+         {}),
+        ('comments of a ticket',
+         "SELECT id FROM comments WHERE ticket_id = :ticket ORDER BY created_at ASC",
+         {'ticket': ticket_id}),
+    ]
+
+
+def seed(db, args):
+    from sqlalchemy import insert
+    from app.models import Ticket, Comment, User
+
+    print(f"Seeding {args.agents} agents, {args.tickets} tickets...")
+    started = time.perf_counter()
+    db.session.execute(insert(User), [{
+        'username': f'bench_agent_{i}', 'email': f'bench_agent_{i}@example.com',
+        'password_hash': '!', 'full_name': f'Agent {i}', 'role': 'agent', 'is_active': True,
+        'assignment_weight': 1
+    } for i in range(args.agents)])
+    agent_ids = [row[0] for row in db.session.query(User.id).filter(User.role == 'agent').all()]
+
+    rng = random.Random(42)
+    base = datetime.utcnow() - timedelta(days=730)
+    chunk = 20000
+    for start in range(0, args.tickets, chunk):
+        rows = []
+        for i in range(start, min(start + chunk, args.tickets)):
+            # ~85% closed history, a small open backlog, active work spread over agents
+            roll = rng.random()
+            status = 'cerrado' if roll < 0.85 else ('en_proceso' if roll < 0.97 else 'abierto')
+            assigned = None if status == 'abierto' and rng.random() < 0.5 else rng.choice(agent_ids)
+            created = base + timedelta(seconds=i * (730 * 86400 / args.tickets))
+            rows.append({
+                'client_name': 'Bench Client', 'client_email': f'client{i % 5000}@example.com',
+                'subject': f'Ticket {i}', 'description': 'Synthetic benchmark ticket',
+                'status': status, 'priority': rng.choice(('baja', 'media', 'alta', 'critica')),
+                'created_at': created, 'updated_at': created, 'assigned_to_id': assigned
+            })
+        db.session.execute(insert(Ticket), rows)
+        db.session.commit()
+
+    comment_count = int(args.tickets * args.comments_per_ticket)
+    for start in range(0, comment_count, chunk):
+        db.session.execute(insert(Comment), [{
+            'ticket_id': rng.randint(1, args.tickets), 'author_name': 'Bench', 'author_email': 'bench@example.com',
+            'comment_text': 'Synthetic comment', 'is_internal': False,
+            'created_at': base + timedelta(seconds=rng.randint(0, 730 * 86400))
+        } for _ in range(start, min(start + chunk, comment_count))])
+        db.session.commit()
+    print(f"Seeded in {time.perf_counter() - started:.1f}s")
+
+
+def explain(db, sql, params):
+    from sqlalchemy import text
+    if db.engine.dialect.name == 'postgresql':
+        rows = db.session.execute(text('EXPLAIN ' + sql), params).all()
+        return '\n'.join(f'      {row[0]}' for row in rows)
+    rows = db.session.execute(text('EXPLAIN QUERY PLAN ' + sql), params).all()
+    return '\n'.join(f'      {row[-1]}' for row in rows)
+
+
+def time_query(db, sql, params, repeat):
+    from sqlalchemy import text
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        db.session.execute(text(sql), params).all()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def run_phase(db, label, queries, repeat):
+    print(f"\n=== {label} ===")
+    results = {}
+    for name, sql, params in queries:
+        results[name] = time_query(db, sql, params, repeat)
+        print(f"  {name}: {results[name]:.2f} ms (median of {repeat})")
+        print(explain(db, sql, params))
+    return results
+
+
+def main():
+    args = parse_args()
+    if not os.environ.get('DATABASE_URL') and not os.environ.get('POSTGRES_USER'):
+        path = os.path.join(tempfile.gettempdir(), 'tickets_index_benchmark.db')
+        if not args.keep_data and os.path.exists(path):
+            os.remove(path)
+        os.environ['DATABASE_URL'] = f'sqlite:///{path}'
+
+    from sqlalchemy import text
+    from app import create_app, db
+    from app.models import Ticket, User
+
+    app = create_app('production')
+    with app.app_context():
+        db.create_all()
+        if not args.keep_data or not Ticket.query.first():
+            seed(db, args)
+
+        agent_id = db.session.query(User.id).filter(User.role == 'agent').first()[0]
+        ticket_id = db.session.query(Ticket.id).order_by(Ticket.id.desc()).first()[0] // 2
+        queries = hot_queries(agent_id, ticket_id)
+        indexes = index_definitions()
+
+        for name in indexes:
+            db.session.execute(text(f'DROP INDEX IF EXISTS {name}'))
+        db.session.execute(text('ANALYZE'))
+        db.session.commit()
+        before = run_phase(db, 'Before (no composite indexes)', queries, args.repeat)
+
+        for index in indexes.values():
+            index.create(db.engine)
+        db.session.execute(text('ANALYZE'))
+        db.session.commit()
+        after = run_phase(db, 'After (composite indexes)', queries, args.repeat)
+
+        print("\n=== Summary (median ms) ===")
+        for name, _, _ in queries:
+            speedup = before[name] / after[name] if after[name] else float('inf')
+            print(f"  {name:32s} {before[name]:10.2f} -> {after[name]:8.2f}  ({speedup:.0f}x)")
+
+
+if __name__ == '__main__':
+    main()
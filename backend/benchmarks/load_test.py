@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+"""
+Load test the API in-process with concurrent clients
+Seeds users/tickets/comments through the models, starts a local stub for the
+n8n webhooks, then drives create_app() with N client threads over a weighted
+mix of endpoints and reports p50/p95/p99 latency, throughput and SQL
+statements per request for each endpoint
+
+Usage (from backend/):
+    python -m benchmarks.load_test --tickets 20000 --clients 8 --requests 4000
+    python -m benchmarks.load_test --json results.json
+    python -m benchmarks.load_test --baseline results.json --max-regression 0.25   # exit 1 on regression
+    DATABASE_URL=postgresql://... python -m benchmarks.load_test --keep-data
+
+Clients share one process (like a single gunicorn worker with threads), so
+compare runs made on the same machine and database
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from contextlib import nullcontext
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# name -> weight in the request mix
+DEFAULT_MIX = {
+    'list': 30,
+    'get': 20,
+    'create': 15,
+    'comment': 15,
+    'status': 10,
+    'search': 5,
+    'login': 5,
+}
+
+SEARCH_TERMS = ('impresora', 'correo', 'acceso', 'factura', 'red', 'contraseña')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--agents', type=int, default=20)
+    parser.add_argument('--tickets', type=int, default=20000)
+    parser.add_argument('--comments-per-ticket', type=float, default=2.0)
+    parser.add_argument('--clients', type=int, default=8, help='concurrent client threads')
+    parser.add_argument('--requests', type=int, default=4000, help='measured requests in total')
+    parser.add_argument('--warmup', type=int, default=200, help='unmeasured requests before the run')
+    parser.add_argument('--mix', default=','.join(f'{k}={v}' for k, v in DEFAULT_MIX.items()),
+                        help='endpoint weights, e.g. list=50,create=50')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--keep-data', action='store_true', help='reuse an already seeded database')
+    parser.add_argument('--json', dest='json_path', help='write results to this file')
+    parser.add_argument('--baseline', help='results file from a previous run to compare against')
+    parser.add_argument('--max-regression', type=float, default=0.25,
+                        help='allowed relative p95 increase vs the baseline (default 0.25 = 25%%)')
+    parser.add_argument('--max-sql-increase', type=float, default=0.5,
+                        help='allowed increase of mean SQL statements per request vs the baseline')
+    return parser.parse_args()
+
+
+def parse_mix(raw):
+    mix = {}
+    for part in raw.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in DEFAULT_MIX:
+            raise SystemExit(f"Unknown endpoint '{name}' in --mix (choose from {', '.join(DEFAULT_MIX)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+# n8n stub
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    received = 0
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        _StubHandler.received += 1
+        self.send_response(200)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'ok')
+
+    def log_message(self, *args):
+        pass
+
+
+def start_n8n_stub():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _StubHandler)
+    threading.Thread(target=server.serve_forever, name='n8n-stub', daemon=True).start()
+    return server
+
+
+# Dataset
+
+def seed(db, args):
+    from sqlalchemy import insert
+    from app.models import Ticket, Comment, User
+
+    print(f"Seeding {args.agents} agents, {args.tickets} tickets, "
+          f"{int(args.tickets * args.comments_per_ticket)} comments...")
+    started = time.perf_counter()
+
+    # One real hash shared by every seeded user keeps seeding fast while login stays realistic
+    template = User(username='template')
+    template.set_password('loadtest')
+    db.session.execute(insert(User), [{
+        'username': f'load_agent_{i}', 'email': f'load_agent_{i}@example.com',
+        'password_hash': template.password_hash, 'full_name': f'Agent {i}', 'role': 'agent',
+        'is_active': True, 'assignment_weight': 1, 'max_active_tickets': 5
+    } for i in range(args.agents)] + [{
+        'username': 'load_admin', 'email': 'load_admin@example.com', 'password_hash': template.password_hash,
+        'full_name': 'Load Admin', 'role': 'admin', 'is_active': True, 'assignment_weight': 1
+    }])
+    db.session.commit()
+    agent_ids = [row[0] for row in db.session.query(User.id).filter(User.role == 'agent').all()]
+
+    rng = random.Random(args.seed)
+    base = datetime.utcnow() - timedelta(days=365)
+    chunk = 5000
+    for start in range(0, args.tickets, chunk):
+        rows = []
+        for i in range(start, min(start + chunk, args.tickets)):
+            roll = rng.random()
+            status = 'cerrado' if roll < 0.85 else ('en_proceso' if roll < 0.97 else 'abierto')
+            assigned = None if status == 'abierto' else rng.choice(agent_ids)
+            created = base + timedelta(seconds=i * (365 * 86400 / max(args.tickets, 1)))
+            rows.append({
+                'client_name': 'Load Client', 'client_email': f'client{i % 2000}@example.com',
+                'subject': f'Problema de {rng.choice(SEARCH_TERMS)} #{i}',
+                'description': f'No funciona el {rng.choice(SEARCH_TERMS)} desde esta mañana',
+                'status': status, 'priority': rng.choice(('baja', 'media', 'alta', 'critica')),
+                'created_at': created, 'updated_at': created, 'assigned_to_id': assigned
+            })
+        db.session.execute(insert(Ticket), rows)
+        db.session.commit()
+
+    comment_total = int(args.tickets * args.comments_per_ticket)
+    for start in range(0, comment_total, chunk):
+        rows = [{
+            'ticket_id': rng.randint(1, args.tickets), 'author_name': 'Load', 'author_email': 'load@example.com',
+            'comment_text': f'Revisando el {rng.choice(SEARCH_TERMS)}', 'is_internal': False,
+            'created_at': base + timedelta(seconds=rng.randint(0, 365 * 86400))
+        } for _ in range(start, min(start + chunk, comment_total))]
+        db.session.execute(insert(Comment), rows)
+        db.session.commit()
+
+    # Denormalized comment stats, as the migration backfills them
+    db.session.execute(db.text(
+        "UPDATE tickets SET comment_count = (SELECT COUNT(*) FROM comments WHERE comments.ticket_id = tickets.id), "
+        "last_comment_at = (SELECT MAX(created_at) FROM comments WHERE comments.ticket_id = tickets.id)"
+    ))
+    db.session.commit()
+    print(f"Seeded in {time.perf_counter() - started:.1f}s")
+
+
+# Scenarios: each returns (response status, expected statuses)
+
+def make_scenarios(max_ticket_id):
+    def pick_ticket(rng):
+        return rng.randint(1, max_ticket_id)
+
+    def list_tickets(client, rng):
+        status = rng.choice((None, 'abierto', 'en_proceso', 'cerrado'))
+        url = '/api/tickets?limit=50' + (f'&status={status}' if status else '')
+        return client.get(url).status_code, (200,)
+
+    def get_ticket(client, rng):
+        return client.get(f'/api/tickets/{pick_ticket(rng)}').status_code, (200, 404)
+
+    def create_ticket(client, rng):
+        response = client.post('/api/tickets', json={
+            'client_name': 'Load Client', 'client_email': 'load@example.com',
+            'subject': f'Nuevo problema de {rng.choice(SEARCH_TERMS)}', 'description': 'Creado por la prueba de carga',
+            'priority': rng.choice(('baja', 'media', 'alta', 'critica'))
+        })
+        return response.status_code, (201,)
+
+    def add_comment(client, rng):
+        response = client.post(f'/api/tickets/{pick_ticket(rng)}/comments', json={
+            'author_name': 'Load', 'author_email': 'load@example.com', 'comment_text': 'Comentario de carga'
+        })
+        return response.status_code, (201, 404)
+
+    def update_status(client, rng):
+        response = client.put(f'/api/tickets/{pick_ticket(rng)}/status',
+                              json={'status': rng.choice(('en_proceso', 'cerrado'))})
+        return response.status_code, (200, 404)
+
+    def search(client, rng):
+        return client.get(f'/api/tickets/search?q={rng.choice(SEARCH_TERMS)}&limit=20').status_code, (200,)
+
+    def login(client, rng):
+        response = client.post('/api/auth/login', json={
+            'username': f'load_agent_{rng.randint(0, 4)}', 'password': 'loadtest'
+        })
+        return response.status_code, (200, 503)
+
+    return {
+        'list': list_tickets,
+        'get': get_ticket,
+        'create': create_ticket,
+        'comment': add_comment,
+        'status': update_status,
+        'search': search,
+        'login': login,
+    }
+
+
+# Runner
+
+def run_load(app, scenarios, mix, clients, total, seed, engine=None):
+    """
+    Run `total` requests over `clients` threads; returns a list of samples
+    SQL statements are counted per request when `engine` is given
+    """
+    from app.utils.query_counter import count_queries
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    samples = []
+    samples_lock = threading.Lock()
+    remaining = [total]
+
+    def worker(index):
+        rng = random.Random(seed + index)
+        client = app.test_client()
+        local = []
+        while True:
+            with samples_lock:
+                if remaining[0] <= 0:
+                    break
+                remaining[0] -= 1
+            name = rng.choices(names, weights)[0]
+            with (count_queries(engine) if engine is not None else nullcontext()) as counter:
+                started = time.perf_counter()
+                try:
+                    status, expected = scenarios[name](client, rng)
+                    ok = status in expected
+                except Exception:
+                    status, ok = None, False
+                elapsed = time.perf_counter() - started
+            local.append((name, elapsed, ok, counter.count if counter is not None else 0))
+        with samples_lock:
+            samples.extend(local)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+    return samples, wall
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(pct / 100.0 * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def summarize(samples, wall):
+    by_name = {}
+    for name, elapsed, ok, sql in samples:
+        by_name.setdefault(name, []).append((elapsed, ok, sql))
+
+    report = {'wall_seconds': wall, 'total_requests': len(samples),
+              'throughput_rps': len(samples) / wall if wall else 0.0, 'endpoints': {}}
+    for name, rows in sorted(by_name.items()):
+        latencies = sorted(elapsed * 1000 for elapsed, _, _ in rows)
+        sql_counts = [sql for _, _, sql in rows]
+        report['endpoints'][name] = {
+            'requests': len(rows),
+            'errors': sum(1 for _, ok, _ in rows if not ok),
+            'throughput_rps': len(rows) / wall if wall else 0.0,
+            'p50_ms': percentile(latencies, 50),
+            'p95_ms': percentile(latencies, 95),
+            'p99_ms': percentile(latencies, 99),
+            'sql_mean': sum(sql_counts) / len(sql_counts),
+            'sql_max': max(sql_counts),
+        }
+    return report
+
+
+def print_report(report):
+    print(f"\n{report['total_requests']} requests in {report['wall_seconds']:.1f}s "
+          f"({report['throughput_rps']:.1f} req/s)\n")
+    header = f"{'endpoint':10s} {'reqs':>6s} {'err':>5s} {'req/s':>8s} {'p50 ms':>9s} {'p95 ms':>9s} {'p99 ms':>9s} {'sql avg':>8s} {'sql max':>8s}"
+    print(header)
+    print('-' * len(header))
+    for name, stats in report['endpoints'].items():
+        print(f"{name:10s} {stats['requests']:6d} {stats['errors']:5d} {stats['throughput_rps']:8.1f} "
+              f"{stats['p50_ms']:9.2f} {stats['p95_ms']:9.2f} {stats['p99_ms']:9.2f} "
+              f"{stats['sql_mean']:8.1f} {stats['sql_max']:8d}")
+
+
+def compare(report, baseline, max_regression, max_sql_increase):
+    """Returns a list of regression messages (empty when within limits)"""
+    problems = []
+    for name, stats in report['endpoints'].items():
+        previous = baseline.get('endpoints', {}).get(name)
+        if previous is None:
+            continue
+        if previous['p95_ms'] and stats['p95_ms'] > previous['p95_ms'] * (1 + max_regression):
+            problems.append(f"{name}: p95 {previous['p95_ms']:.2f} -> {stats['p95_ms']:.2f} ms")
+        if stats['sql_mean'] > previous['sql_mean'] + max_sql_increase:
+            problems.append(f"{name}: SQL/request {previous['sql_mean']:.1f} -> {stats['sql_mean']:.1f}")
+        if stats['errors'] > previous['errors']:
+            problems.append(f"{name}: errors {previous['errors']} -> {stats['errors']}")
+    return problems
+
+
+def main():
+    args = parse_args()
+    mix = parse_mix(args.mix)
+
+    # Environment must be in place before config.py is imported
+    stub = start_n8n_stub()
+    stub_url = f'http://127.0.0.1:{stub.server_address[1]}'
+    os.environ['N8N_BASE_URL'] = stub_url
+    for key, path in (('N8N_WEBHOOK_NEW_TICKET', 'nuevo-ticket'), ('N8N_WEBHOOK_UPDATE_TICKET', 'actualizar-ticket'),
+                      ('N8N_WEBHOOK_CLOSE_TICKET', 'cerrar-ticket'), ('N8N_WEBHOOK_AGENT_ASSIGNMENT', 'asignar-agente')):
+        os.environ[key] = f'{stub_url}/webhook/{path}'
+    if not os.environ.get('DATABASE_URL') and not os.environ.get('POSTGRES_USER'):
+        path = os.path.join(tempfile.gettempdir(), 'tickets_load_test.db')
+        if not args.keep_data and os.path.exists(path):
+            os.remove(path)
+        os.environ['DATABASE_URL'] = f'sqlite:///{path}'
+
+    from app import create_app, db
+    from app.models import Ticket
+    from app.utils.query_counter import watch_engine
+
+    app = create_app('production')
+    with app.app_context():
+        db.create_all()
+        if not args.keep_data or not Ticket.query.first():
+            seed(db, args)
+        max_ticket_id = db.session.query(db.func.max(Ticket.id)).scalar() or 1
+        engine = db.engine
+        # Listener goes in before the client threads start
+        watch_engine(engine)
+
+    scenarios = make_scenarios(max_ticket_id)
+    if args.warmup:
+        run_load(app, scenarios, mix, args.clients, args.warmup, args.seed + 1000)
+
+    print(f"Running {args.requests} requests with {args.clients} clients...")
+    samples, wall = run_load(app, scenarios, mix, args.clients, args.requests, args.seed, engine)
+    report = summarize(samples, wall)
+    report['config'] = {key: getattr(args, key) for key in
+                        ('agents', 'tickets', 'comments_per_ticket', 'clients', 'requests', 'mix', 'seed')}
+    report['database'] = app.config['SQLALCHEMY_DATABASE_URI'].split(':', 1)[0]
+    report['webhooks_received'] = _StubHandler.received
+    print_report(report)
+
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.json_path}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        problems = compare(report, baseline, args.max_regression, args.max_sql_increase)
+        if problems:
+            print("\n❌ Regressions vs baseline:")
+            for problem in problems:
+                print(f"   {problem}")
+            sys.exit(1)
+        print("\n✅ Within baseline limits")
+
+
+if __name__ == '__main__':
+    main()
@@ -20,12 +20,115 @@ class Config:
         SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///tickets.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # Read replica for read-only endpoints (unset = everything uses the primary)
+    _pg_replica_host = os.environ.get('POSTGRES_REPLICA_HOST')
+    if _pg_user and _pg_password and _pg_db and _pg_replica_host:
+        SQLALCHEMY_REPLICA_URI = (
+            f"postgresql://{_pg_user}:{quote(_pg_password, safe='')}@{_pg_replica_host}:"
+            f"{os.environ.get('POSTGRES_REPLICA_PORT', _pg_port)}/{_pg_db}"
+        )
+    else:
+        SQLALCHEMY_REPLICA_URI = os.environ.get('DATABASE_REPLICA_URL')
+    # Seconds a client's reads stay on the primary after it writes (read-your-writes)
+    DB_REPLICA_STICKY_SECONDS = int(os.environ.get('DB_REPLICA_STICKY_SECONDS', '5'))
+
+    # Connection pool (PostgreSQL), per gunicorn worker: keep
+    # workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW) below Postgres max_connections
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', '5'))
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', '10'))
+    DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', '10'))  # seconds to wait for a free connection
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', '1800'))  # seconds
+    DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', 'true').lower() == 'true'
+    DB_STATEMENT_TIMEOUT_MS = int(os.environ.get('DB_STATEMENT_TIMEOUT_MS', '30000'))  # 0 disables
+    DB_CONNECT_TIMEOUT = int(os.environ.get('DB_CONNECT_TIMEOUT', '5'))  # seconds
+    DB_APPLICATION_NAME = os.environ.get('DB_APPLICATION_NAME', 'tickkk-backend')
+    # PgBouncer transaction pooling: no app-side pool and no startup options
+    DB_PGBOUNCER = os.environ.get('DB_PGBOUNCER', 'false').lower() == 'true'
+
     # n8n Configuration
     N8N_BASE_URL = os.environ.get('N8N_BASE_URL', 'http://n8n:5678')
     N8N_WEBHOOK_NEW_TICKET = os.environ.get('N8N_WEBHOOK_NEW_TICKET', f'{N8N_BASE_URL}/webhook/nuevo-ticket')
     N8N_WEBHOOK_UPDATE_TICKET = os.environ.get('N8N_WEBHOOK_UPDATE_TICKET', f'{N8N_BASE_URL}/webhook/actualizar-ticket')
     N8N_WEBHOOK_CLOSE_TICKET = os.environ.get('N8N_WEBHOOK_CLOSE_TICKET', f'{N8N_BASE_URL}/webhook/cerrar-ticket')
     N8N_WEBHOOK_AGENT_ASSIGNMENT = os.environ.get('N8N_WEBHOOK_AGENT_ASSIGNMENT', f'{N8N_BASE_URL}/webhook/asignar-agente')
+    # Webhooks that also receive legacy camelCase aliases (new_ticket,update_ticket,close_ticket,agent_assignment)
+    N8N_CAMELCASE_WEBHOOKS = [w.strip() for w in os.environ.get('N8N_CAMELCASE_WEBHOOKS', '').split(',') if w.strip()]
+    N8N_WEBHOOK_TIMEOUT = float(os.environ.get('N8N_WEBHOOK_TIMEOUT', '10'))  # read timeout
+    N8N_HTTP_CONNECT_TIMEOUT = float(os.environ.get('N8N_HTTP_CONNECT_TIMEOUT', '3.05'))
+    N8N_HTTP_POOL_CONNECTIONS = int(os.environ.get('N8N_HTTP_POOL_CONNECTIONS', '4'))  # distinct hosts kept
+    N8N_HTTP_POOL_MAXSIZE = int(os.environ.get('N8N_HTTP_POOL_MAXSIZE', '10'))  # connections per host
+
+    # Webhook outbox: 'thread' delivers from each web worker, 'worker' leaves it to `flask outbox-worker`
+    N8N_OUTBOX_DISPATCHER = os.environ.get('N8N_OUTBOX_DISPATCHER', 'thread')
+    N8N_OUTBOX_POLL_INTERVAL = float(os.environ.get('N8N_OUTBOX_POLL_INTERVAL', '2'))
+    N8N_OUTBOX_BATCH_SIZE = int(os.environ.get('N8N_OUTBOX_BATCH_SIZE', '50'))
+    N8N_OUTBOX_LEASE_SECONDS = int(os.environ.get('N8N_OUTBOX_LEASE_SECONDS', '60'))
+    N8N_OUTBOX_MAX_ATTEMPTS = int(os.environ.get('N8N_OUTBOX_MAX_ATTEMPTS', '8'))
+    N8N_OUTBOX_BACKOFF_BASE = float(os.environ.get('N8N_OUTBOX_BACKOFF_BASE', '2'))
+    N8N_OUTBOX_BACKOFF_MAX = float(os.environ.get('N8N_OUTBOX_BACKOFF_MAX', '300'))
+    N8N_OUTBOX_RETENTION_DAYS = int(os.environ.get('N8N_OUTBOX_RETENTION_DAYS', '7'))  # sent events, 0 keeps them
+    N8N_OUTBOX_PURGE_INTERVAL = float(os.environ.get('N8N_OUTBOX_PURGE_INTERVAL', '3600'))  # seconds between purges
+    # Seconds to buffer events before sending one batch per webhook URL (0 = one POST per event)
+    N8N_COALESCE_WINDOW = float(os.environ.get('N8N_COALESCE_WINDOW', '0'))
+    N8N_COALESCE_MAX_EVENTS = int(os.environ.get('N8N_COALESCE_MAX_EVENTS', '100'))
+
+    # Seconds before the in-memory agent availability index is rebuilt from the database
+    AGENT_INDEX_TTL = float(os.environ.get('AGENT_INDEX_TTL', '30'))
+    # Redis channel carrying committed workload deltas between workers (needs REDIS_URL)
+    AGENT_INDEX_CHANNEL = os.environ.get('AGENT_INDEX_CHANNEL', 'agents:index')
+
+    # Auto-assignment: random, least_loaded, weighted_round_robin or priority
+    ASSIGNMENT_STRATEGY = os.environ.get('ASSIGNMENT_STRATEGY', 'random')
+    AGENT_DEFAULT_CAPACITY = int(os.environ.get('AGENT_DEFAULT_CAPACITY', '1'))  # active tickets per agent
+    AGENT_STATS_CACHE_TTL = float(os.environ.get('AGENT_STATS_CACHE_TTL', '5'))  # seconds, 0 disables
+    ASSIGNMENT_PRIORITY_RESERVE = int(os.environ.get('ASSIGNMENT_PRIORITY_RESERVE', '1'))  # slots kept for critica/alta
+
+    # Authenticated-user cache used by token_required (per worker; 0 disables)
+    USER_CACHE_SIZE = int(os.environ.get('USER_CACHE_SIZE', '1024'))
+    USER_CACHE_TTL = float(os.environ.get('USER_CACHE_TTL', '30'))
+    # Redis channel telling the other workers to drop an updated user (needs REDIS_URL)
+    USER_CACHE_CHANNEL = os.environ.get('USER_CACHE_CHANNEL', 'users:cache')
+
+    # Password hashing: werkzeug method with work factor, hashed in a per-worker process pool
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', '0'))  # 0 = hash inline
+    PASSWORD_HASH_MAX_PENDING = int(os.environ.get('PASSWORD_HASH_MAX_PENDING', '8'))
+    PASSWORD_HASH_QUEUE_TIMEOUT = float(os.environ.get('PASSWORD_HASH_QUEUE_TIMEOUT', '2'))
+    PASSWORD_HASH_TIMEOUT = float(os.environ.get('PASSWORD_HASH_TIMEOUT', '10'))
+
+    # Redis (optional): response cache and cross-worker event fan-out
+    REDIS_URL = os.environ.get('REDIS_URL')
+    REDIS_SOCKET_TIMEOUT = float(os.environ.get('REDIS_SOCKET_TIMEOUT', '0.5'))
+    RESPONSE_CACHE_TTL = float(os.environ.get('RESPONSE_CACHE_TTL', '60'))  # seconds, 0 disables
+    # Where the collection cache version lives: database (bumped in the writing
+    # transaction) or redis (INCR after commit; writers don't serialize on one row)
+    CACHE_VERSION_BACKEND = os.environ.get('CACHE_VERSION_BACKEND', 'database')
+
+    # Bulk ticket operations (POST /api/tickets/bulk)
+    BULK_MAX_OPERATIONS = int(os.environ.get('BULK_MAX_OPERATIONS', '1000'))
+
+    # Ticket import/export (rows per fetch batch / insert chunk)
+    TICKET_TRANSFER_BATCH_SIZE = int(os.environ.get('TICKET_TRANSFER_BATCH_SIZE', '1000'))
+
+    # Archival of closed tickets (`flask tickets archive`, e.g. nightly from cron)
+    ARCHIVE_CLOSED_AFTER_DAYS = int(os.environ.get('ARCHIVE_CLOSED_AFTER_DAYS', '90'))
+    ARCHIVE_BATCH_SIZE = int(os.environ.get('ARCHIVE_BATCH_SIZE', '500'))
+
+    # Full-text search (PostgreSQL text search config; must match the search_vector columns)
+    SEARCH_TEXT_CONFIG = os.environ.get('SEARCH_TEXT_CONFIG', 'spanish')
+
+    # Live ticket event stream (GET /api/tickets/stream)
+    EVENT_STREAM_BACKEND = os.environ.get('EVENT_STREAM_BACKEND', 'auto')  # auto, memory, redis
+    EVENT_STREAM_CHANNEL = os.environ.get('EVENT_STREAM_CHANNEL', 'tickets:events')
+    EVENT_STREAM_QUEUE_SIZE = int(os.environ.get('EVENT_STREAM_QUEUE_SIZE', '100'))  # per client
+    EVENT_STREAM_MAX_CLIENTS = int(os.environ.get('EVENT_STREAM_MAX_CLIENTS', '8'))  # per worker, keep below gunicorn --threads
+    EVENT_STREAM_HEARTBEAT = float(os.environ.get('EVENT_STREAM_HEARTBEAT', '15'))  # seconds
+    EVENT_STREAM_MAX_DURATION = float(os.environ.get('EVENT_STREAM_MAX_DURATION', '300'))  # seconds per connection
+    EVENT_STREAM_RETRY_MS = int(os.environ.get('EVENT_STREAM_RETRY_MS', '3000'))
+
+    # Request instrumentation: Server-Timing headers and Prometheus /api/metrics
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'false').lower() == 'true'
+    METRICS_AUTH_TOKEN = os.environ.get('METRICS_AUTH_TOKEN')  # optional bearer token for /api/metrics
 
     # CORS Configuration
     CORS_ORIGINS = os.environ.get('CORS_ORIGINS', '*').split(',')
@@ -37,6 +140,8 @@ class DevelopmentConfig(Config):
 
 class ProductionConfig(Config):
     DEBUG = False
+    # Only the web servers get a hash pool by default; scripts and dev hash inline
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', '2'))
     # Inherit computed URI from Config
     pass
 
@@ -33,6 +33,8 @@ CREATE TABLE IF NOT EXISTS users (
     full_name VARCHAR(255),
     role user_role NOT NULL DEFAULT 'agent',
     is_active BOOLEAN DEFAULT TRUE,
+    max_active_tickets INTEGER,
+    assignment_weight INTEGER NOT NULL DEFAULT 1,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
@@ -47,12 +49,19 @@ CREATE TABLE IF NOT EXISTS tickets (
     description TEXT NOT NULL,
     status ticket_status DEFAULT 'abierto',
     priority ticket_priority DEFAULT 'media',
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     assigned_to_id INTEGER REFERENCES users(id),
     assigned_to VARCHAR(255),
     category VARCHAR(100),
-    department VARCHAR(100)
+    department VARCHAR(100),
+    comment_count INTEGER NOT NULL DEFAULT 0,
+    last_comment_at TIMESTAMP,
+    -- Full-text search (GET /api/tickets/search); config must match SEARCH_TEXT_CONFIG
+    search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('spanish', coalesce(subject, '')), 'A') ||
+        setweight(to_tsvector('spanish', coalesce(description, '')), 'B')
+    ) STORED
 );
 
 -- Create comments table
@@ -63,17 +72,95 @@ CREATE TABLE IF NOT EXISTS comments (
     author_email VARCHAR(255) NOT NULL,
     comment_text TEXT NOT NULL,
     is_internal BOOLEAN DEFAULT FALSE,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    search_vector tsvector GENERATED ALWAYS AS (to_tsvector('spanish', coalesce(comment_text, ''))) STORED
+);
+
+-- Create outbox table for asynchronous n8n webhook delivery
+DO $$ BEGIN
+    CREATE TYPE outbox_status AS ENUM ('pending', 'sent', 'failed');
+EXCEPTION
+    WHEN duplicate_object THEN null;
+END $$;
+
+CREATE TABLE IF NOT EXISTS webhook_outbox (
+    id SERIAL PRIMARY KEY,
+    event_type VARCHAR(50) NOT NULL,
+    ticket_id INTEGER,
+    webhook_url VARCHAR(500) NOT NULL,
+    payload TEXT NOT NULL,
+    status outbox_status NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    last_error TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    sent_at TIMESTAMP
+);
+
+-- Create collection version counters for ETags / response cache keys
+CREATE TABLE IF NOT EXISTS cache_versions (
+    name VARCHAR(50) PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0
+);
+
+-- Create materialized ticket counters for the dashboard summary
+CREATE TABLE IF NOT EXISTS ticket_counters (
+    dimension VARCHAR(20) NOT NULL,
+    value VARCHAR(100) NOT NULL,
+    count BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (dimension, value)
 );
 
+-- Create archive tables for closed tickets, partitioned by month of archived_at
+-- (monthly partitions are created by `flask tickets archive`)
+CREATE TABLE IF NOT EXISTS tickets_archive (
+    id INTEGER NOT NULL,
+    client_name VARCHAR(255) NOT NULL,
+    client_email VARCHAR(255) NOT NULL,
+    client_phone VARCHAR(20),
+    subject VARCHAR(500) NOT NULL,
+    description TEXT NOT NULL,
+    status ticket_status,
+    priority ticket_priority,
+    created_at TIMESTAMP,
+    updated_at TIMESTAMP,
+    assigned_to_id INTEGER,
+    category VARCHAR(100),
+    department VARCHAR(100),
+    comment_count INTEGER NOT NULL DEFAULT 0,
+    last_comment_at TIMESTAMP,
+    archived_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, archived_at)
+) PARTITION BY RANGE (archived_at);
+
+CREATE TABLE IF NOT EXISTS comments_archive (
+    id INTEGER NOT NULL,
+    ticket_id INTEGER NOT NULL,
+    author_name VARCHAR(255) NOT NULL,
+    author_email VARCHAR(255) NOT NULL,
+    comment_text TEXT NOT NULL,
+    is_internal BOOLEAN DEFAULT FALSE,
+    created_at TIMESTAMP,
+    archived_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, archived_at)
+) PARTITION BY RANGE (archived_at);
+
 -- Create indexes for better performance
-CREATE INDEX IF NOT EXISTS idx_tickets_status ON tickets(status);
 CREATE INDEX IF NOT EXISTS idx_tickets_priority ON tickets(priority);
 CREATE INDEX IF NOT EXISTS idx_tickets_created_at ON tickets(created_at);
 CREATE INDEX IF NOT EXISTS idx_tickets_client_email ON tickets(client_email);
-CREATE INDEX IF NOT EXISTS idx_tickets_assigned_to_id ON tickets(assigned_to_id);
-CREATE INDEX IF NOT EXISTS idx_comments_ticket_id ON comments(ticket_id);
+CREATE INDEX IF NOT EXISTS idx_tickets_status_created_at ON tickets(status, created_at);
+CREATE INDEX IF NOT EXISTS idx_tickets_assigned_status ON tickets(assigned_to_id, status);
+CREATE INDEX IF NOT EXISTS idx_tickets_assigned_created_at ON tickets(assigned_to_id, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_tickets_created_at_id ON tickets(created_at, id);
+CREATE INDEX IF NOT EXISTS idx_tickets_unassigned_backlog ON tickets(created_at, id)
+    WHERE assigned_to_id IS NULL AND status IN ('abierto', 'en_proceso');
+CREATE INDEX IF NOT EXISTS idx_comments_ticket_created_at ON comments(ticket_id, created_at);
 CREATE INDEX IF NOT EXISTS idx_comments_created_at ON comments(created_at);
+CREATE INDEX IF NOT EXISTS idx_tickets_search ON tickets USING GIN (search_vector);
+CREATE INDEX IF NOT EXISTS idx_comments_search ON comments USING GIN (search_vector);
+CREATE INDEX IF NOT EXISTS idx_comments_archive_ticket_created_at ON comments_archive(ticket_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_webhook_outbox_status_next_attempt ON webhook_outbox(status, next_attempt_at);
 
 -- Function to update updated_at timestamp
 CREATE OR REPLACE FUNCTION update_updated_at_column()
@@ -0,0 +1,3 @@
+-- Per-agent capacity and weight for auto-assignment strategies
+ALTER TABLE users ADD COLUMN IF NOT EXISTS max_active_tickets INTEGER;
+ALTER TABLE users ADD COLUMN IF NOT EXISTS assignment_weight INTEGER NOT NULL DEFAULT 1;
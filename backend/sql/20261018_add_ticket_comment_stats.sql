@@ -0,0 +1,14 @@
+-- Denormalized comment stats so ticket lists never load comments
+ALTER TABLE tickets ADD COLUMN IF NOT EXISTS comment_count INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE tickets ADD COLUMN IF NOT EXISTS last_comment_at TIMESTAMP;
+
+-- Backfill from existing comments
+UPDATE tickets t
+SET comment_count = stats.comment_count,
+    last_comment_at = stats.last_comment_at
+FROM (
+    SELECT ticket_id, COUNT(*) AS comment_count, MAX(created_at) AS last_comment_at
+    FROM comments
+    GROUP BY ticket_id
+) stats
+WHERE stats.ticket_id = t.id;
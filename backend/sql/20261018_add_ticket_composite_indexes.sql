@@ -0,0 +1,29 @@
+-- Composite and partial indexes for the ticket hot paths
+-- CONCURRENTLY avoids blocking writes; run with plain psql (autocommit), not inside a transaction or with --single-transaction
+
+-- GET /api/tickets?status=... ORDER BY created_at DESC
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tickets_status_created_at ON tickets(status, created_at);
+
+-- Agent workload: assigned_to_id = ? AND status IN (...)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tickets_assigned_status ON tickets(assigned_to_id, status);
+
+-- An agent's tickets, newest first (GET /api/tickets?assigned_to_id=...)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tickets_assigned_created_at ON tickets(assigned_to_id, created_at, id);
+
+-- Keyset pagination on (created_at, id)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tickets_created_at_id ON tickets(created_at, id);
+
+-- Unassigned backlog (get_oldest_unassigned_ticket), only the few rows waiting for an agent
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tickets_unassigned_backlog ON tickets(created_at, id)
+    WHERE assigned_to_id IS NULL AND status IN ('abierto', 'en_proceso');
+
+-- Comments of a ticket in order
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_comments_ticket_created_at ON comments(ticket_id, created_at);
+
+-- Superseded by the composite indexes above (same leading column)
+DROP INDEX CONCURRENTLY IF EXISTS idx_tickets_status;
+DROP INDEX CONCURRENTLY IF EXISTS idx_tickets_assigned_to_id;
+DROP INDEX CONCURRENTLY IF EXISTS idx_comments_ticket_id;
+
+ANALYZE tickets;
+ANALYZE comments;
@@ -0,0 +1,19 @@
+-- Full-text search over ticket subject/description and comment text
+-- Stored generated columns (PostgreSQL 12+) rewrite both tables once; run in a
+-- maintenance window. The text search config must match SEARCH_TEXT_CONFIG
+
+ALTER TABLE tickets ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+    setweight(to_tsvector('spanish', coalesce(subject, '')), 'A') ||
+    setweight(to_tsvector('spanish', coalesce(description, '')), 'B')
+) STORED;
+
+ALTER TABLE comments ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+    to_tsvector('spanish', coalesce(comment_text, ''))
+) STORED;
+
+-- CONCURRENTLY: run with psql -f (autocommit), not inside a transaction
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tickets_search ON tickets USING GIN (search_vector);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_comments_search ON comments USING GIN (search_vector);
+
+ANALYZE tickets;
+ANALYZE comments;
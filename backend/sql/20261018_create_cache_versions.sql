@@ -0,0 +1,8 @@
+-- Collection version counters for ETags / response cache keys
+CREATE TABLE IF NOT EXISTS cache_versions (
+    name VARCHAR(50) PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0
+);
+
+INSERT INTO cache_versions (name, version) VALUES ('tickets', 0)
+ON CONFLICT (name) DO NOTHING;
@@ -0,0 +1,37 @@
+-- Archive of closed tickets and their comments (flask tickets archive)
+-- Partitioned by month of archived_at; the archiver creates each month's
+-- partitions on demand (tickets_archive_YYYY_MM / comments_archive_YYYY_MM), and
+-- old months can be detached or dropped without touching the rest
+CREATE TABLE IF NOT EXISTS tickets_archive (
+    id INTEGER NOT NULL,
+    client_name VARCHAR(255) NOT NULL,
+    client_email VARCHAR(255) NOT NULL,
+    client_phone VARCHAR(20),
+    subject VARCHAR(500) NOT NULL,
+    description TEXT NOT NULL,
+    status ticket_status,
+    priority ticket_priority,
+    created_at TIMESTAMP,
+    updated_at TIMESTAMP,
+    assigned_to_id INTEGER,
+    category VARCHAR(100),
+    department VARCHAR(100),
+    comment_count INTEGER NOT NULL DEFAULT 0,
+    last_comment_at TIMESTAMP,
+    archived_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, archived_at)
+) PARTITION BY RANGE (archived_at);
+
+CREATE TABLE IF NOT EXISTS comments_archive (
+    id INTEGER NOT NULL,
+    ticket_id INTEGER NOT NULL,
+    author_name VARCHAR(255) NOT NULL,
+    author_email VARCHAR(255) NOT NULL,
+    comment_text TEXT NOT NULL,
+    is_internal BOOLEAN DEFAULT FALSE,
+    created_at TIMESTAMP,
+    archived_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, archived_at)
+) PARTITION BY RANGE (archived_at);
+
+CREATE INDEX IF NOT EXISTS idx_comments_archive_ticket_created_at ON comments_archive(ticket_id, created_at);
@@ -0,0 +1,21 @@
+-- Materialized ticket counters for GET /api/tickets/summary
+CREATE TABLE IF NOT EXISTS ticket_counters (
+    dimension VARCHAR(20) NOT NULL,
+    value VARCHAR(100) NOT NULL,
+    count BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (dimension, value)
+);
+
+-- Backfill from existing tickets ('' = no assignee / department)
+BEGIN;
+LOCK TABLE ticket_counters IN SHARE ROW EXCLUSIVE MODE;
+DELETE FROM ticket_counters;
+INSERT INTO ticket_counters (dimension, value, count)
+SELECT 'status', status::text, COUNT(*) FROM tickets GROUP BY status
+UNION ALL
+SELECT 'priority', priority::text, COUNT(*) FROM tickets GROUP BY priority
+UNION ALL
+SELECT 'department', COALESCE(department, ''), COUNT(*) FROM tickets GROUP BY COALESCE(department, '')
+UNION ALL
+SELECT 'assignee', COALESCE(assigned_to_id::text, ''), COUNT(*) FROM tickets GROUP BY COALESCE(assigned_to_id::text, '');
+COMMIT;
@@ -0,0 +1,22 @@
+-- Outbox for asynchronous n8n webhook delivery
+DO $$ BEGIN
+    CREATE TYPE outbox_status AS ENUM ('pending', 'sent', 'failed');
+EXCEPTION
+    WHEN duplicate_object THEN null;
+END $$;
+
+CREATE TABLE IF NOT EXISTS webhook_outbox (
+    id SERIAL PRIMARY KEY,
+    event_type VARCHAR(50) NOT NULL,
+    ticket_id INTEGER,
+    webhook_url VARCHAR(500) NOT NULL,
+    payload TEXT NOT NULL,
+    status outbox_status NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    last_error TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    sent_at TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_webhook_outbox_status_next_attempt ON webhook_outbox(status, next_attempt_at);
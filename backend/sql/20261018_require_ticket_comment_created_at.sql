@@ -0,0 +1,6 @@
+-- created_at is the keyset pagination key for tickets and comments, so it cannot be NULL
+UPDATE tickets SET created_at = COALESCE(updated_at, CURRENT_TIMESTAMP) WHERE created_at IS NULL;
+UPDATE comments c SET created_at = t.created_at FROM tickets t WHERE t.id = c.ticket_id AND c.created_at IS NULL;
+
+ALTER TABLE tickets ALTER COLUMN created_at SET NOT NULL;
+ALTER TABLE comments ALTER COLUMN created_at SET NOT NULL;
@@ -1,11 +1,14 @@
 import React, { useState, useEffect } from 'react';
-import { ticketsApi } from '../services/api';
+import { ticketsApi, TICKET_PAGE_SIZE } from '../services/api';
 import TicketDetail from './TicketDetail';
 import UserManagement from './UserManagement';
 import CategoryReports from './CategoryReports';
 
 const AdminPanel = ({ currentUser, onLogout }) => {
   const [tickets, setTickets] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [summary, setSummary] = useState(null);
   const [selectedTicket, setSelectedTicket] = useState(null);
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState(null);
@@ -15,25 +18,41 @@ const AdminPanel = ({ currentUser, onLogout }) => {
 
   useEffect(() => {
     loadTickets();
+    loadSummary();
   }, [filter]);
 
+  // Tile counts come from the maintained counters, not from the loaded page
+  const loadSummary = async () => {
+    try {
+      const response = await ticketsApi.getSummary();
+      setSummary(response.data);
+    } catch (error) {
+      console.error('Error loading ticket summary:', error);
+    }
+  };
+
+  const filterParams = () => {
+    const params = { limit: TICKET_PAGE_SIZE };
+
+    if (filter === 'unassigned') {
+      params.assigned = 'false';
+    } else if (filter === 'mine') {
+      params.assigned_to_id = currentUser.id;
+    } else if (filter === 'closed') {
+      params.status = 'cerrado';
+    }
+
+    return params;
+  };
+
   const loadTickets = async () => {
     setLoading(true);
     setError(null);
 
     try {
-      const params = {};
-
-      if (filter === 'unassigned') {
-        params.assigned = 'false';
-      } else if (filter === 'mine') {
-        params.assigned_to_id = currentUser.id;
-      } else if (filter === 'closed') {
-        params.status = 'cerrado';
-      }
-
-      const response = await ticketsApi.getTickets(params);
-      setTickets(response.data);
+      const response = await ticketsApi.getTickets(filterParams());
+      setTickets(response.data.tickets);
+      setNextCursor(response.data.next_cursor);
     } catch (error) {
       console.error('Error loading tickets:', error);
       setError('Error al cargar los tickets');
@@ -42,6 +61,22 @@ const AdminPanel = ({ currentUser, onLogout }) => {
     }
   };
 
+  const loadMoreTickets = async () => {
+    if (!nextCursor) return;
+    setLoadingMore(true);
+
+    try {
+      const response = await ticketsApi.getTickets({ ...filterParams(), cursor: nextCursor });
+      setTickets(prev => [...prev, ...response.data.tickets]);
+      setNextCursor(response.data.next_cursor);
+    } catch (error) {
+      console.error('Error loading more tickets:', error);
+      setError('Error al cargar más tickets');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const handleTicketUpdate = (updatedTicket) => {
     setTickets(prev =>
       prev.map(ticket =>
@@ -49,6 +84,7 @@ const AdminPanel = ({ currentUser, onLogout }) => {
       )
     );
     setSelectedTicket(updatedTicket);
+    loadSummary();
   };
 
   const containerStyle = {
@@ -158,7 +194,21 @@ const AdminPanel = ({ currentUser, onLogout }) => {
   };
 
   const getFilterCount = () => {
-    return tickets.length;
+    if (!summary) {
+      return '—';
+    }
+    switch (filter) {
+      case 'unassigned':
+        return summary.by_assignee[''] || 0;
+      case 'mine':
+        return summary.by_assignee[String(currentUser.id)] || 0;
+      case 'all':
+        return summary.total;
+      case 'closed':
+        return summary.by_status.cerrado || 0;
+      default:
+        return 0;
+    }
   };
 
   const getFilterLabel = () => {
@@ -508,6 +558,23 @@ const AdminPanel = ({ currentUser, onLogout }) => {
                     )}
                   </div>
                 ))}
+                {nextCursor && (
+                  <button
+                    onClick={loadMoreTickets}
+                    disabled={loadingMore}
+                    style={{
+                      width: '100%',
+                      padding: '12px',
+                      backgroundColor: 'transparent',
+                      border: 'none',
+                      color: 'var(--primary)',
+                      cursor: loadingMore ? 'default' : 'pointer',
+                      fontSize: '14px'
+                    }}
+                  >
+                    {loadingMore ? 'Cargando...' : 'Cargar más tickets'}
+                  </button>
+                )}
               </div>
             )}
           </div>
@@ -7,7 +7,7 @@ import WelcomeScreen from './WelcomeScreen';
 import Login from './Login';
 import AdminPanel from './AdminPanel';
 import authService from '../services/auth';
-import { ticketsApi } from '../services/api';
+import { ticketsApi, TICKET_PAGE_SIZE } from '../services/api';
 
 const App = () => {
   const [currentUser, setCurrentUser] = useState(null);
@@ -16,6 +16,8 @@ const App = () => {
 
   // Public view states
   const [tickets, setTickets] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [selectedTicket, setSelectedTicket] = useState(null);
   const [currentView, setCurrentView] = useState('welcome'); // 'welcome', 'list', 'detail', 'new'
   const [loading, setLoading] = useState(false);
@@ -73,8 +75,9 @@ const App = () => {
     setLoading(true);
     setError(null);
     try {
-      const response = await ticketsApi.getTickets();
-      setTickets(response.data);
+      const response = await ticketsApi.getTickets({ limit: TICKET_PAGE_SIZE });
+      setTickets(response.data.tickets);
+      setNextCursor(response.data.next_cursor);
     } catch (error) {
       console.error('Error loading tickets:', error);
       setError('Error al cargar los tickets. Por favor recarga la página.');
@@ -83,6 +86,21 @@ const App = () => {
     }
   };
 
+  const loadMoreTickets = async () => {
+    if (!nextCursor) return;
+    setLoadingMore(true);
+    try {
+      const response = await ticketsApi.getTickets({ limit: TICKET_PAGE_SIZE, cursor: nextCursor });
+      setTickets(prev => [...prev, ...response.data.tickets]);
+      setNextCursor(response.data.next_cursor);
+    } catch (error) {
+      console.error('Error loading more tickets:', error);
+      setError('Error al cargar más tickets.');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const handleNewTicket = () => {
     setCurrentView('new');
     setSelectedTicket(null);
@@ -247,6 +265,9 @@ const App = () => {
             selectedTicket={selectedTicket}
             loading={loading}
             onRefresh={loadTickets}
+            hasMore={nextCursor !== null}
+            loadingMore={loadingMore}
+            onLoadMore={loadMoreTickets}
           />
         );
 
@@ -27,6 +27,11 @@ const TicketDetail = ({ ticket, onBack, onTicketUpdate }) => {
   useEffect(() => {
     if (ticket?.comments) {
       setComments(ticket.comments);
+    } else if (ticket?.id) {
+      // Ticket lists don't embed comments; load them on demand
+      ticketsApi.getTicketComments(ticket.id)
+        .then((response) => setComments(response.data))
+        .catch((error) => console.error('Error loading comments:', error));
     }
   }, [ticket]);
 
@@ -2,7 +2,7 @@ import React from 'react';
 import TicketListItem from './TicketListItem';
 import { Search, Filter, RefreshCw } from 'lucide-react';
 
-const TicketList = ({ tickets, onTicketSelect, selectedTicket, loading, onRefresh }) => {
+const TicketList = ({ tickets, onTicketSelect, selectedTicket, loading, onRefresh, hasMore, loadingMore, onLoadMore }) => {
   const [searchTerm, setSearchTerm] = React.useState('');
   const [filterStatus, setFilterStatus] = React.useState('all');
   const [filterPriority, setFilterPriority] = React.useState('all');
@@ -113,6 +113,19 @@ const TicketList = ({ tickets, onTicketSelect, selectedTicket, loading, onRefres
     transition: 'all 0.2s ease'
   };
 
+  const loadMoreStyle = {
+    display: 'block',
+    width: 'calc(100% - 48px)',
+    margin: '16px 24px',
+    padding: '10px 12px',
+    backgroundColor: 'transparent',
+    border: '1px solid var(--border)',
+    borderRadius: 'var(--radius)',
+    color: 'var(--text-light)',
+    cursor: loadingMore ? 'default' : 'pointer',
+    fontSize: '14px'
+  };
+
   return (
     <div style={containerStyle} className="animate-fade-in">
       <div style={headerStyle}>
@@ -189,6 +202,15 @@ const TicketList = ({ tickets, onTicketSelect, selectedTicket, loading, onRefres
             />
           ))
         )}
+        {!loading && hasMore && (
+          <button
+            onClick={onLoadMore}
+            disabled={loadingMore}
+            style={loadMoreStyle}
+          >
+            {loadingMore ? 'Cargando...' : 'Cargar más tickets'}
+          </button>
+        )}
       </div>
     </div>
   );
@@ -123,10 +123,10 @@ const TicketListItem = ({ ticket, onClick, isSelected }) => {
           <Calendar size={14} />
           {formatDate(ticket.created_at)}
         </div>
-        {ticket.comments && ticket.comments.length > 0 && (
+        {ticket.comment_count > 0 && (
           <div style={metaItemStyle}>
             <MessageCircle size={14} />
-            {ticket.comments.length} comentario{ticket.comments.length !== 1 ? 's' : ''}
+            {ticket.comment_count} comentario{ticket.comment_count !== 1 ? 's' : ''}
           </div>
         )}
       </div>
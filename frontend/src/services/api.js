@@ -31,10 +31,17 @@ api.interceptors.response.use(
   }
 );
 
+// Tickets per page for the lists (the backend caps limit at 200)
+export const TICKET_PAGE_SIZE = 50;
+
 export const ticketsApi = {
-  // Get all tickets with optional filters
+  // Get tickets with optional filters; with limit/cursor the response is
+  // { tickets, next_cursor } (next_cursor is null on the last page)
   getTickets: (params = {}) => api.get('/tickets', { params }),
 
+  // Dashboard counts per status / priority / department / assignee
+  getSummary: () => api.get('/tickets/summary'),
+
   // Get specific ticket
   getTicket: (id) => api.get(`/tickets/${id}`),
 